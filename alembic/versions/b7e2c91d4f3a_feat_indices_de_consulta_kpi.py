@@ -0,0 +1,44 @@
+"""feat: índices compuestos para consultas filtradas de kpi y kpi_acumulado
+
+Revision ID: b7e2c91d4f3a
+Revises: 94a2198ecc55
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2c91d4f3a'
+down_revision: Union[str, None] = '94a2198ecc55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = [
+    ("FechaOperacion", ["FechaOperacion"]),
+    ("Ejecutivo_FechaOperacion", ["Ejecutivo", "FechaOperacion"]),
+    ("Mes_Ejecutivo", ["Mes", "Ejecutivo"]),
+    ("RUCPagador_FechaOperacion", ["RUCPagador", "FechaOperacion"]),
+    ("RUCCliente_FechaOperacion", ["RUCCliente", "FechaOperacion"]),
+    ("CodigoLiquidacion", ["CodigoLiquidacion"]),
+    (
+        "Moneda_TipoOperacion_FechaOperacion",
+        ["Moneda", "TipoOperacion", "FechaOperacion"],
+    ),
+]
+TABLAS = ["kpi", "kpi_acumulado"]
+
+
+def upgrade() -> None:
+    for tabla in TABLAS:
+        for sufijo, columnas in INDICES:
+            op.create_index(f"ix_{tabla}_{sufijo}", tabla, columnas, unique=False)
+
+
+def downgrade() -> None:
+    for tabla in TABLAS:
+        for sufijo, _ in INDICES:
+            op.drop_index(f"ix_{tabla}_{sufijo}", table_name=tabla)
@@ -8,6 +8,8 @@ from typing import Dict, Any
 from config.logger import logger
 from background.schemas.task_schema import TaskStatusResponse
 from config.celery_config import celery_app
+from config.redis import progress_from_meta, redis_manager, redis_manager_sync
+from config.refresh_lock import RefreshLock, reserve_refresh
 from datetime import datetime, timedelta, time
 import pytz
 
@@ -63,6 +65,7 @@ class BaseProcessor:
                 "ready": result.ready(),
                 "successful": result.successful() if result.ready() else None,
                 "failed": result.failed() if result.ready() else None,
+                "progress": self.get_task_progress(task_id),
             }
 
         except Exception as e:
@@ -77,6 +80,44 @@ class BaseProcessor:
                 "error": str(e),
             }
 
+    @staticmethod
+    def get_task_progress(task_id: str) -> Dict[str, Any] | None:
+        """Progreso por etapas que la task reporta con JobProgress (o None)."""
+        try:
+            meta = redis_manager_sync.get_client_sync().hgetall(
+                redis_manager._meta_key(task_id)
+            )
+            return progress_from_meta(meta)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo leer el progreso de {task_id}: {e}")
+            return None
+
+    @staticmethod
+    def enqueue_single_flight(task, lock_name: str) -> Dict[str, Any]:
+        """
+        Encola `task` solo si no hay otra ejecución de la recarga `lock_name`
+        (ver config/refresh_lock.py); si la hay, devuelve el id de esa.
+        """
+        task_id, reservado = reserve_refresh(lock_name)
+        if not reservado:
+            logger.info(f"⏭️ {lock_name} ya está en ejecución con ID: {task_id}")
+            return {
+                "status": "already_running",
+                "task_id": task_id,
+                "message": f"Ya hay una ejecución de {lock_name} en curso",
+            }
+        try:
+            task.apply_async(task_id=task_id)
+        except Exception:
+            RefreshLock(lock_name, task_id).release()
+            raise
+        logger.info(f"✅ Task enviada a Celery con ID: {task_id}")
+        return {
+            "status": "enqueued",
+            "task_id": task_id,
+            "message": "Task enviada a Celery exitosamente",
+        }
+
     @staticmethod
     def format_task_response(task_id: str) -> TaskStatusResponse:
         """
@@ -115,6 +156,7 @@ class BaseProcessor:
                 "successful": status_info.get("successful"),
                 "failed": status_info.get("failed"),
                 "error": error_msg,
+                "progress": status_info.get("progress"),
             }
 
             return TaskStatusResponse(**response_data)
@@ -172,6 +214,7 @@ class BaseProcessor:
                 "successful": status_info.get("successful"),
                 "failed": status_info.get("failed"),
                 "error": error_msg,
+                "progress": status_info.get("progress"),
             }
 
             return TaskStatusResponse(**response_data)
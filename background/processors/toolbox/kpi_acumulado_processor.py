@@ -1,5 +1,8 @@
 from typing import Dict, Any
-from background.tasks.toolbox.kpi_acumulado_task import actualizar_kpi_acumulado_task
+from background.tasks.toolbox.kpi_acumulado_task import (
+    REFRESH_LOCK,
+    actualizar_kpi_acumulado_task,
+)
 from background.processors.base_processor import BaseProcessor
 from config.logger import logger
 
@@ -23,16 +26,10 @@ class KPIAcumuladoProcessor(BaseProcessor):
         try:
             logger.info("🔄 Enviando KPI Acumulado task a Celery...")
 
-            # Enviar task a Celery de forma asíncrona
-            result = actualizar_kpi_acumulado_task.delay()
-
-            logger.info(f"✅ Task enviada a Celery con ID: {result.id}")
-
-            return {
-                "status": "enqueued",
-                "task_id": result.id,
-                "message": "Task enviada a Celery exitosamente",
-            }
+            # Enviar task a Celery salvo que ya haya una ejecución en curso
+            return self.enqueue_single_flight(
+                actualizar_kpi_acumulado_task, REFRESH_LOCK
+            )
 
         except Exception as e:
             logger.error(f"❌ Error enviando task a Celery: {str(e)}")
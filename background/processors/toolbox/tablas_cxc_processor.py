@@ -1,5 +1,5 @@
 from typing import Dict, Any
-from background.tasks.toolbox.tablas_cxc_task import tablas_cxc_task
+from background.tasks.toolbox.tablas_cxc_task import REFRESH_LOCK, tablas_cxc_task
 from background.processors.base_processor import BaseProcessor
 from config.logger import logger
 
@@ -25,16 +25,8 @@ class TablasCXCProcessor(BaseProcessor):
         try:
             logger.info("🔄 Enviando Tablas CXC task a Celery...")
 
-            # Enviar task a Celery de forma asíncrona
-            result = tablas_cxc_task.delay()
-
-            logger.info(f"✅ Task enviada a Celery con ID: {result.id}")
-
-            return {
-                "status": "enqueued",
-                "task_id": result.id,
-                "message": "Task enviada a Celery exitosamente",
-            }
+            # Enviar task a Celery salvo que ya haya una ejecución en curso
+            return self.enqueue_single_flight(tablas_cxc_task, REFRESH_LOCK)
 
         except Exception as e:
             logger.error(f"❌ Error enviando task a Celery: {str(e)}")
@@ -47,8 +39,8 @@ class TablasCXCProcessor(BaseProcessor):
         try:
             logger.info("🔄 Ejecutando Tablas CXC task síncronamente...")
 
-            # Ejecutar task directamente (sin Celery)
-            result = tablas_cxc_task()
+            # Ejecutar en modo eager: el chord de subtareas corre en este proceso
+            result = tablas_cxc_task.apply().get()
 
             logger.info("✅ Task ejecutada síncronamente")
             return result
@@ -1,5 +1,8 @@
 from typing import Dict, Any
-from background.tasks.toolbox.tablas_reportes_task import tablas_reportes_task
+from background.tasks.toolbox.tablas_reportes_task import (
+    REFRESH_LOCK,
+    tablas_reportes_task,
+)
 from background.processors.base_processor import BaseProcessor
 from config.logger import logger
 
@@ -24,16 +27,8 @@ class TablasReportesProcessor(BaseProcessor):
         try:
             logger.info("🔄 Enviando Tablas Reportes task a Celery...")
 
-            # Enviar task a Celery de forma asíncrona
-            result = tablas_reportes_task.delay()
-
-            logger.info(f"✅ Task enviada a Celery con ID: {result.id}")
-
-            return {
-                "status": "enqueued",
-                "task_id": result.id,
-                "message": "Task enviada a Celery exitosamente",
-            }
+            # Enviar task a Celery salvo que ya haya una ejecución en curso
+            return self.enqueue_single_flight(tablas_reportes_task, REFRESH_LOCK)
 
         except Exception as e:
             logger.error(f"❌ Error enviando task a Celery: {str(e)}")
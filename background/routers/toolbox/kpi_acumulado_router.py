@@ -36,12 +36,17 @@ async def execute_kpi_acumulado_task():
         # Ejecutar task
         result = await kpi_celery.run()
 
-        logger.info(f"✅ API: Task enviada exitosamente - ID: {result['task_id']}")
+        if result["status"] == "already_running":
+            # un disparo duplicado recibe el id de la ejecución en curso
+            message = result["message"]
+        else:
+            logger.info(f"✅ API: Task enviada exitosamente - ID: {result['task_id']}")
+            message = "Task KPI Acumulado enviada a Celery exitosamente"
 
         return TaskExecuteResponse(
             success=True,
             task_id=result["task_id"],
-            message="Task KPI Acumulado enviada a Celery exitosamente",
+            message=message,
             task_name="actualizar_kpi_acumulado_task",
         )
 
@@ -30,6 +30,7 @@ class TaskStatusResponse(BaseModel):
     successful: Optional[bool] = None
     failed: Optional[bool] = None
     error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None  # etapa, %, filas y tiempos por etapa
 
 
 # 🆕 Schemas específicos para Tipo de Cambio SUNAT
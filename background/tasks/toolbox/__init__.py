@@ -7,13 +7,24 @@ Asegura que todas las tasks estén registradas en Celery
 # Importar todas las tasks para asegurar registro en Celery
 from .kpi_acumulado_task import actualizar_kpi_acumulado_task
 from .tablas_reportes_task import tablas_reportes_task
-from .tablas_cxc_task import tablas_cxc_task
+from .tablas_cxc_task import (
+    tablas_cxc_task,
+    cxc_pagos_task,
+    cxc_dev_task,
+    cxc_acumulado_task,
+)
 from .tipo_cambio_task import tipo_cambio_task  # 🆕 Nuevo task Tipo de Cambio
+from .refresh_dag_task import refresh_dag_task, refresh_intermedio_task
 
 # Lista de todas las tasks exportadas
 __all__ = [
     "actualizar_kpi_acumulado_task",
     "tablas_reportes_task",
     "tablas_cxc_task",
+    "cxc_pagos_task",
+    "cxc_dev_task",
+    "cxc_acumulado_task",
     "tipo_cambio_task",  # 🆕 Exportar nuevo task
+    "refresh_dag_task",
+    "refresh_intermedio_task",
 ]
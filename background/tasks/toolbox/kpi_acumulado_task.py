@@ -3,17 +3,26 @@
 Migración de cronjobs a tareas de Celery
 """
 
-import asyncio
 import pandas as pd
 import gc
 from datetime import datetime
 from typing import Dict, Any
 
 from config.celery_config import celery_app
+from config.worker_runtime import run_async
 from config.repository_factory import create_repository_factory
 from config.logger import logger
+from config.settings import settings
 from cronjobs.BaseCronjob import BaseCronjob
 from toolbox.api.kpi_api import get_kpi
+from utils.data_version import bump_data_version_sync
+from config.job_progress import JobProgress
+from config.export_snapshots import publish_exports
+from utils.export_profiles import get_export_profile
+from utils.refresh_intermediates import ashared_intermediate, refresh_run
+from config.refresh_lock import single_flight
+
+REFRESH_LOCK = "kpi_acumulado"  # lock:refresh:kpi_acumulado (single-flight)
 
 
 @celery_app.task(
@@ -23,16 +32,21 @@ from toolbox.api.kpi_api import get_kpi
     max_retries=0,  # Sin reintentos, una sola ejecución
     default_retry_delay=60,
 )
-def actualizar_kpi_acumulado_task(self) -> Dict[str, Any]:
+@single_flight(REFRESH_LOCK)
+def actualizar_kpi_acumulado_task(self, run_id: str | None = None) -> Dict[str, Any]:
     """
     🎯 Task Celery: Actualizar KPI Acumulado
     Equivalente a ActualizarTablaKPIAcumuladoCronjob
+    run_id: corrida del DAG de recarga cuyos insumos compartidos reutiliza
     """
+    progreso = JobProgress(self.request.id, self.name, ttl=settings.JOB_INDEX_RETENTION)
     try:
         logger.info("🚀 Iniciando task: Actualizar KPI Acumulado")
 
         # Ejecutar lógica async en event loop
-        result = asyncio.run(_actualizar_kpi_acumulado_logic())
+        with refresh_run(run_id):
+            result = run_async(_actualizar_kpi_acumulado_logic(progreso))
+        progreso.finish("completed")
 
         logger.info("✅ Task completada: Actualizar KPI Acumulado")
         return {
@@ -43,6 +57,7 @@ def actualizar_kpi_acumulado_task(self) -> Dict[str, Any]:
         }
 
     except Exception as e:
+        progreso.finish("failed")
         error_msg = f"❌ Error en task KPI Acumulado: {str(e)}"
         error_type = type(e).__name__
         logger.error(error_msg)
@@ -70,7 +85,7 @@ def actualizar_kpi_acumulado_task(self) -> Dict[str, Any]:
             }
 
 
-async def _actualizar_kpi_acumulado_logic() -> Dict[str, Any]:
+async def _actualizar_kpi_acumulado_logic(progreso: JobProgress) -> Dict[str, Any]:
     """
     Lógica principal para actualizar KPI Acumulado
     Manejo robusto de conexiones DB para evitar event loop issues
@@ -85,33 +100,53 @@ async def _actualizar_kpi_acumulado_logic() -> Dict[str, Any]:
         tipo_cambio_repo = await repo_factory.create_tipo_cambio_repository()
         kpi_acumulado_repo = await repo_factory.create_kpi_acumulado_repository()
 
-        logger.info("📊 Obteniendo datos de TipoCambio...")
-
-        # TipoCambio
-        tipo_cambio_records = await tipo_cambio_repo.get_all_dicts(exclude_pk=True)
-        tipo_cambio_df = pd.DataFrame(tipo_cambio_records)
-        tipo_cambio_df["TipoCambioFecha"] = pd.to_datetime(
-            tipo_cambio_df["TipoCambioFecha"]
-        )
+        with progreso.stage("TipoCambio"):
+            logger.info("📊 Obteniendo datos de TipoCambio...")
 
-        logger.info("🧮 Calculando KPI Acumulado...")
+            # TipoCambio
+            tipo_cambio_records = await ashared_intermediate(
+                "tipo_cambio", lambda: tipo_cambio_repo.get_all_dicts(exclude_pk=True)
+            )
+            tipo_cambio_df = pd.DataFrame(tipo_cambio_records)
+            tipo_cambio_df["TipoCambioFecha"] = pd.to_datetime(
+                tipo_cambio_df["TipoCambioFecha"]
+            )
 
-        # KPI Acumulado
-        kpi_acumulado_calcular = await get_kpi(
-            tipo_cambio_df=tipo_cambio_df,
-            start_date=BaseCronjob.obtener_datetime_fecha_inicio(),
-            end_date=BaseCronjob.obtener_datetime_fecha_fin(),
-            fecha_corte=BaseCronjob.obtener_datetime_fecha_fin(),
-            tipo_reporte=0,
-            as_df=False,
-        )
+        with progreso.stage("KPIAcumulado"):
+            logger.info("🧮 Calculando KPI Acumulado...")
+
+            # KPI Acumulado
+            kpi_acumulado_calcular = await get_kpi(
+                tipo_cambio_df=tipo_cambio_df,
+                start_date=BaseCronjob.obtener_datetime_fecha_inicio(),
+                end_date=BaseCronjob.obtener_datetime_fecha_fin(),
+                fecha_corte=BaseCronjob.obtener_datetime_fecha_fin(),
+                tipo_reporte=0,
+                as_df=False,
+            )
 
-        logger.info(f"💾 Insertando {len(kpi_acumulado_calcular)} registros...")
+        with progreso.stage("Carga"):
+            logger.info(f"💾 Insertando {len(kpi_acumulado_calcular)} registros...")
 
-        # Usar bulk insert optimizado
-        await kpi_acumulado_repo.delete_and_bulk_insert_chunked(
-            kpi_acumulado_calcular, chunk_size=5000
-        )
+            # Carga paralela sobre staging + swap atómico
+            await kpi_acumulado_repo.reload_via_staging(
+                kpi_acumulado_calcular,
+                repo_factory.session_manager,
+                chunk_size=5000,
+                max_concurrency=settings.BULK_INSERT_CONCURRENCY,
+            )
+        bump_data_version_sync("kpi_acumulado")
+
+        with progreso.stage("Exportaciones"):
+            # una sola lectura: el informe se proyecta del DataFrame completo
+            completo = pd.DataFrame(await kpi_acumulado_repo.get_all_dicts())
+            informe = get_export_profile("kpi_acumulado", "informe")
+            publish_exports(
+                "kpi_acumulado",
+                {"completo": completo, "informe": informe.proyectar(completo)},
+                name="Calcular KPI Acumulado",
+                description="Generar un excel con los KPI Acumulados calculados",
+            )
 
         logger.info("✅ KPI Acumulado completado exitosamente")
         return {"records": len(kpi_acumulado_calcular)}
@@ -119,5 +154,3 @@ async def _actualizar_kpi_acumulado_logic() -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"❌ Error en lógica KPI Acumulado: {str(e)}")
         raise e
-
-
@@ -0,0 +1,212 @@
+# background/tasks/toolbox/refresh_dag_task.py
+"""
+🔗 DAG de recarga: una corrida para tablas_reportes, kpi_acumulado y tablas_cxc
+
+Cada nodo declara la task que lo ejecuta, los insumos que lee y las tablas
+que recarga. La corrida:
+1. Obtiene en paralelo, una sola vez, los insumos compartidos que piden los
+   nodos (tipo de cambio, hojas de referencia, colocaciones) y los deja en
+   refresh:{run_id}:* (ver utils/refresh_intermediates.py).
+2. Ejecuta los nodos por capas: los que no dependen entre sí corren en
+   paralelo en los workers; un nodo que lee una tabla que otro recarga va en
+   una capa posterior.
+
+Si un insumo falla al precargarse, el nodo que lo necesite lo obtiene por su
+cuenta como cuando corre suelto.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict
+
+from celery import chain, group
+
+from config.celery_config import celery_app
+from config.worker_runtime import run_async
+from config.repository_factory import create_repository_factory
+from config.logger import logger
+from cronjobs.BaseCronjob import BaseCronjob
+from utils.adelantafactoring.obtener.FondoCrecerObtener import FondoCrecerObtener
+from utils.adelantafactoring.obtener.FondoPromocionalObtener import (
+    FondoPromocionalObtener,
+)
+from utils.adelantafactoring.obtener.KPIObtener import KPIObtener
+from utils.adelantafactoring.obtener.OperacionesFueraSistemaObtener import (
+    OperacionesFueraSistemaObtener,
+)
+from utils.adelantafactoring.obtener.ReferidosObtener import ReferidosObtener
+from utils.adelantafactoring.obtener.SectorPagadoresObtener import (
+    SectorPagadoresObtener,
+)
+from utils.refresh_intermediates import ashared_intermediate, refresh_run
+
+
+@dataclass(frozen=True)
+class RefreshNode:
+    nombre: str
+    task: str
+    entradas: tuple[str, ...] = ()  # insumos compartidos y tablas que lee
+    salidas: tuple[str, ...] = ()  # tablas que recarga
+
+
+REFRESH_DAG: tuple[RefreshNode, ...] = (
+    RefreshNode(
+        "tablas_reportes",
+        "toolbox.tablas_reportes",
+        entradas=(
+            "tipo_cambio",
+            "sector_pagadores",
+            "fuera_sistema",
+            "referencias_comisiones",
+            "colocaciones_detalle",
+        ),
+        salidas=(
+            "kpi",
+            "kpi_rollup_mensual",
+            "nuevos_clientes_nuevos_pagadores",
+            "saldos",
+        ),
+    ),
+    RefreshNode(
+        "kpi_acumulado",
+        "toolbox.kpi_acumulado",
+        entradas=(
+            "tipo_cambio",
+            "sector_pagadores",
+            "fuera_sistema",
+            "referencias_comisiones",
+            "colocaciones_acumulado",
+        ),
+        salidas=("kpi_acumulado",),
+    ),
+    RefreshNode(
+        "tablas_cxc",
+        "toolbox.tablas_cxc",
+        entradas=("tipo_cambio", "sector_pagadores"),
+        salidas=("cxc_pagos_fact", "cxc_dev_fact", "cxc_acumulado_dim"),
+    ),
+)
+
+
+async def _tipo_cambio() -> None:
+    repo_factory = create_repository_factory()
+    try:
+        repo = await repo_factory.create_tipo_cambio_repository()
+        await ashared_intermediate(
+            "tipo_cambio", lambda: repo.get_all_dicts(exclude_pk=True)
+        )
+    finally:
+        await repo_factory.cleanup()
+
+
+def _fuera_sistema() -> None:
+    obtener = OperacionesFueraSistemaObtener()
+    obtener.obtener_operaciones_fuera_sistema_pen()
+    obtener.obtener_operaciones_fuera_sistema_usd()
+
+
+def _referencias_comisiones() -> None:
+    # hojas que lee ComisionesCalcular al enriquecer el KPI con referidos
+    ReferidosObtener().referidos_obtener()
+    FondoCrecerObtener().fondo_crecer_obtener()
+    FondoPromocionalObtener().fondo_promocional_obtener()
+
+
+def _colocaciones(tipo_reporte: int) -> Callable[[], Awaitable[Any]]:
+    # mismas fechas que usan las tasks al llamar a get_kpi
+    return lambda: KPIObtener().obtener_colocaciones(
+        BaseCronjob.obtener_datetime_fecha_inicio(),
+        BaseCronjob.obtener_datetime_fecha_fin(),
+        BaseCronjob.obtener_datetime_fecha_fin(),
+        tipo_reporte,
+    )
+
+
+# insumo -> función que lo obtiene (las descargas quedan en la caché de la corrida)
+INTERMEDIOS: Dict[str, Callable[[], Any]] = {
+    "tipo_cambio": _tipo_cambio,
+    "sector_pagadores": lambda: SectorPagadoresObtener().obtener_sector_pagadores(),
+    "fuera_sistema": _fuera_sistema,
+    "referencias_comisiones": _referencias_comisiones,
+    "colocaciones_detalle": _colocaciones(2),
+    "colocaciones_acumulado": _colocaciones(0),
+}
+
+
+def refresh_layers(nodos: tuple[RefreshNode, ...]) -> list[list[RefreshNode]]:
+    """Agrupa los nodos en capas según las tablas que leen de otros nodos."""
+    pendientes = list(nodos)
+    capas: list[list[RefreshNode]] = []
+    while pendientes:
+        capa = [
+            n
+            for n in pendientes
+            if not any(
+                set(n.entradas) & set(otro.salidas)
+                for otro in pendientes
+                if otro is not n
+            )
+        ]
+        if not capa:
+            raise ValueError(
+                f"El DAG de recarga tiene un ciclo: {[n.nombre for n in pendientes]}"
+            )
+        capas.append(capa)
+        pendientes = [n for n in pendientes if n not in capa]
+    return capas
+
+
+def build_refresh_canvas(run_id: str, nodos: tuple[RefreshNode, ...] = REFRESH_DAG):
+    """Canvas de Celery de una corrida: insumos en paralelo, luego cada capa."""
+    insumos = sorted({e for n in nodos for e in n.entradas if e in INTERMEDIOS})
+    pasos = [group([refresh_intermedio_task.si(run_id, nombre) for nombre in insumos])]
+    for capa in refresh_layers(nodos):
+        pasos.append(
+            group(
+                [
+                    celery_app.signature(
+                        n.task, kwargs={"run_id": run_id}, immutable=True
+                    ).set(queue="cronjobs")
+                    for n in capa
+                ]
+            )
+        )
+    return chain(*pasos)
+
+
+@celery_app.task(
+    bind=True,
+    name="toolbox.refresh_intermedio",
+    queue="cronjobs",
+    max_retries=0,
+)
+def refresh_intermedio_task(self, run_id: str, nombre: str) -> Dict[str, Any]:
+    """Precarga un insumo compartido de la corrida `run_id`."""
+    try:
+        with refresh_run(run_id):
+            resultado = INTERMEDIOS[nombre]()
+            if asyncio.iscoroutine(resultado):
+                run_async(resultado)
+        return {"status": "success", "intermedio": nombre}
+    except Exception as e:
+        # no se corta la corrida: el nodo lo obtendrá por su cuenta
+        logger.warning(f"⚠️ No se precargó el insumo {nombre} ({run_id}): {e}")
+        return {"status": "failed", "intermedio": nombre, "error": str(e)}
+
+
+@celery_app.task(
+    bind=True,
+    name="toolbox.refresh_dag",
+    queue="cronjobs",
+    max_retries=0,
+)
+def refresh_dag_task(self) -> Dict[str, Any]:
+    """
+    🎯 Task Celery: lanza una corrida del DAG de recarga (REFRESH_DAG)
+    El id de la corrida es el de esta task.
+    """
+    run_id = self.request.id
+    capas = [[n.nombre for n in capa] for capa in refresh_layers(REFRESH_DAG)]
+    build_refresh_canvas(run_id).apply_async()
+    logger.info(f"🔗 Corrida de recarga {run_id} lanzada: {capas}")
+    return {"status": "scheduled", "run_id": run_id, "capas": capas}
@@ -1,16 +1,43 @@
 # background/tasks/toolbox/tablas_cxc_task.py
-"""🚀 Celery Task para Tablas CXC - Business Logic Completa"""
+"""
+🚀 Celery Task para Tablas CXC - Business Logic Completa
+
+La recarga se ejecuta como un chord:
+- cxc_pagos y cxc_dev calculan y recargan sus tablas en paralelo (pueden caer
+  en workers distintos), cada una con sus propios reintentos.
+- cxc_acumulado corre al terminar ambas: lee los pagos que dejó cxc_pagos en
+  el artifact store (Parquet comprimido, no el resultado JSON de la task),
+  recarga el acumulado, publica las exportaciones y resume el estado de las
+  tres subtareas.
+
+toolbox.tablas_cxc solo lanza el chord y se reemplaza por él: la subtarea
+final hereda su id, así TablasCXCProcessor, el beat y el DAG siguen viendo un
+único task id con el resultado agregado. El lock de single-flight
+(config/refresh_lock.py) se toma con ese id en la lanzadora, lo renuevan las
+subtareas mientras trabajan y lo libera cxc_acumulado al terminar.
+"""
 
 import asyncio
+import io
 import pandas as pd
-import gc
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from celery import chord
+
+from config.artifact_store import artifact_store
 from config.celery_config import celery_app
+from config.worker_runtime import run_async
+from config.job_progress import JobProgress
 from config.repository_factory import create_repository_factory
 from config.logger import logger
+from config.redis import redis_manager_sync
+from config.refresh_lock import RefreshLock, RefreshLockLost, single_flight
+from config.settings import settings
 from cronjobs.BaseCronjob import BaseCronjob
+from config.export_snapshots import publish_exports
+from utils.data_version import bump_data_version_sync
+from utils.refresh_intermediates import ashared_intermediate, refresh_run
 
 # Importar los calculadores
 from utils.adelantafactoring.calculos.CXCPagosFactCalcular import CXCPagosFactCalcular
@@ -19,185 +46,404 @@ from utils.adelantafactoring.calculos.CXCAcumuladoDIMCalcular import (
     CXCAcumuladoDIMCalcular,
 )
 
+TASK_NAME = "toolbox.tablas_cxc"
+PAGOS_VARIANTE = "cxc_pagos"  # artefacto job:{id}:artifact:cxc_pagos
+REFRESH_LOCK = "tablas_cxc"  # lock:refresh:tablas_cxc, a nombre del id agregado
+
+
+def _progreso(job_id: str) -> JobProgress:
+    # las tres subtareas escriben sus etapas en el hash del id agregado
+    return JobProgress(job_id, TASK_NAME, ttl=settings.JOB_INDEX_RETENTION)
+
+
+def _error_serializable(e: Exception) -> Dict[str, Any]:
+    return {
+        "error_type": type(e).__name__,
+        "error_message": str(e),
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+def _omitida(e: RefreshLockLost) -> Dict[str, Any]:
+    """Resultado de una subtarea cuyo lock caducó en cola y tomó otra ejecución."""
+    logger.warning(f"⏭️ {e}; se aborta esta ejecución de Tablas CXC")
+    return {
+        "status": "skipped",
+        "message": str(e),
+        "running_task_id": e.dueno,
+    }
+
+
+def _guardar_pagos(job_id: str, pagos_data: List[Dict[str, Any]]) -> None:
+    """Deja los pagos en el artifact store para la subtarea de acumulado."""
+    buffer = io.BytesIO()
+    pd.DataFrame(pagos_data).to_parquet(buffer, index=False)
+    artifact = artifact_store.prepare_sync(
+        job_id, "parquet", buffer.getvalue(), variante=PAGOS_VARIANTE
+    )
+    client = redis_manager_sync.get_binary_client_sync()
+    artifact_store.write_chunks_sync(client, artifact, settings.CHORD_HANDOFF_TTL)
+    with client.pipeline() as pipe:
+        artifact_store.enqueue(pipe, artifact, settings.CHORD_HANDOFF_TTL)
+        pipe.execute()
+    logger.info(
+        f"📦 Pagos CXC compartidos: {artifact.size} bytes en "
+        f"{len(artifact.chunks)} chunks ({artifact.stored_size} comprimidos)"
+    )
+
+
+def _leer_pagos(job_id: str) -> pd.DataFrame:
+    data = artifact_store.read_sync(
+        redis_manager_sync.get_binary_client_sync(), job_id, PAGOS_VARIANTE
+    )
+    if data is None:
+        return pd.DataFrame()
+    return pd.read_parquet(io.BytesIO(data))
+
+
+# === TASK LANZADORA ===
+
+
+def tablas_cxc_canvas(job_id: str, run_id: str | None = None):
+    """Chord pagos + devoluciones -> acumulado; `job_id` agrupa el progreso."""
+    return chord(
+        [
+            cxc_pagos_task.si(job_id, run_id=run_id).set(queue="cronjobs"),
+            cxc_dev_task.si(job_id, run_id=run_id).set(queue="cronjobs"),
+        ],
+        cxc_acumulado_task.s(job_id, run_id=run_id).set(queue="cronjobs"),
+    )
+
 
 @celery_app.task(
     bind=True,
-    name="toolbox.tablas_cxc",
+    name=TASK_NAME,
     queue="cronjobs",
-    max_retries=0,  # Sin reintentos, una sola ejecución
-    default_retry_delay=60,
+    max_retries=0,  # Sin reintentos: los tienen las subtareas
 )
-def tablas_cxc_task(self) -> Dict[str, Any]:
+@single_flight(REFRESH_LOCK, release=False)
+def tablas_cxc_task(self, run_id: str | None = None) -> Dict[str, Any]:
     """
     🎯 Task Celery: Actualizar Tablas CXC con ETL Power BI completo
     Equivalente a ActualizarTablasCXCCronjob
+    run_id: corrida del DAG de recarga cuyos insumos compartidos reutiliza
+
+    Se reemplaza por el chord de subtareas; el resultado final (el de
+    cxc_acumulado) queda bajo el id de esta task.
     """
-    try:
-        logger.info("🚀 Iniciando task: Tablas CXC")
+    logger.info(f"🚀 Iniciando task: Tablas CXC ({self.request.id})")
+    return self.replace(tablas_cxc_canvas(self.request.id, run_id))
 
-        # Ejecutar lógica async en event loop
-        result = asyncio.run(_actualizar_tablas_cxc_logic())
 
-        logger.info("✅ Task completada: Tablas CXC")
-        return {
-            "status": "success",
-            "message": "Tablas CXC actualizadas exitosamente",
-            "records": result.get("records", {}),
-            "timestamp": result.get("timestamp"),
-        }
+# === SUBTAREAS ===
+
+
+@celery_app.task(
+    bind=True,
+    name="toolbox.tablas_cxc.pagos",
+    queue="cronjobs",
+    max_retries=2,
+    default_retry_delay=60,
+)
+def cxc_pagos_task(self, job_id: str, run_id: str | None = None) -> Dict[str, Any]:
+    """Calcula y recarga CXC Pagos Fact; comparte los pagos con cxc_acumulado."""
+    try:
+        with refresh_run(run_id), RefreshLock(REFRESH_LOCK, job_id).hold():
+            total = run_async(_actualizar_pagos_logic(job_id))
+        return {"status": "success", "records": total}
 
+    except RefreshLockLost as e:
+        return _omitida(e)
     except Exception as e:
-        error_msg = f"❌ Error en task Tablas CXC: {str(e)}"
-        error_type = type(e).__name__
-        logger.error(error_msg)
-
-        # Crear error serializable para Celery
-        serializable_error = {
-            "error_type": error_type,
-            "error_message": str(e),
-            "timestamp": datetime.now().isoformat(),
-        }
+        logger.error(f"❌ Error actualizando CXCPagosFact: {e}")
+        if self.request.retries < self.max_retries:
+            logger.info(
+                f"🔄 Reintentando pagos CXC (intento {self.request.retries + 1}/{self.max_retries})"
+            )
+            raise self.retry(countdown=60)
+        # el acumulado sigue con las devoluciones y registra el fallo
+        return {"status": "failed", "records": 0, "error": _error_serializable(e)}
+
+
+@celery_app.task(
+    bind=True,
+    name="toolbox.tablas_cxc.dev",
+    queue="cronjobs",
+    max_retries=2,
+    default_retry_delay=60,
+)
+def cxc_dev_task(self, job_id: str, run_id: str | None = None) -> Dict[str, Any]:
+    """Calcula y recarga CXC Dev Fact."""
+    try:
+        with refresh_run(run_id), RefreshLock(REFRESH_LOCK, job_id).hold():
+            total = run_async(_actualizar_dev_logic(job_id))
+        return {"status": "success", "records": total}
 
-        # Intentar retry con error serializable
+    except RefreshLockLost as e:
+        return _omitida(e)
+    except Exception as e:
+        logger.error(f"❌ Error actualizando devoluciones: {e}")
         if self.request.retries < self.max_retries:
             logger.info(
-                f"🔄 Reintentando task (intento {self.request.retries + 1}/{self.max_retries})"
+                f"🔄 Reintentando devoluciones CXC (intento {self.request.retries + 1}/{self.max_retries})"
             )
             raise self.retry(countdown=60)
-        else:
-            # Si ya no hay más retries, devolver el error serializable
-            logger.error("❌ Máximo de reintentos alcanzado")
-            return {
-                "status": "failed",
-                "error": serializable_error,
-                "message": "Error al actualizar tablas CXC",
-            }
+        return {"status": "failed", "records": 0, "error": _error_serializable(e)}
 
 
-async def _actualizar_tablas_cxc_logic() -> Dict[str, Any]:
+@celery_app.task(
+    bind=True,
+    name="toolbox.tablas_cxc.acumulado",
+    queue="cronjobs",
+    max_retries=1,
+    default_retry_delay=60,
+)
+def cxc_acumulado_task(
+    self, partes: List[Dict[str, Any]], job_id: str, run_id: str | None = None
+) -> Dict[str, Any]:
     """
-    Lógica principal para actualizar Tablas CXC
-    Manejo robusto de conexiones DB para evitar event loop issues
+    Cuerpo del chord: ETL Acumulado DIM con los pagos de cxc_pagos, versión de
+    datos y exportaciones. Devuelve el resultado agregado de Tablas CXC:
+    "success", "partial" si falló una subtarea o "failed" si fallaron todas;
+    "skipped" si el lock pasó a otra ejecución mientras esperaba en cola.
+    partes: resultados de [cxc_pagos, cxc_dev], en ese orden.
     """
-    # Crear factory fresco para esta task
-    repo_factory = create_repository_factory()
-
+    pagos, dev = partes
+    subtasks = {"pagos": pagos, "devoluciones": dev}
+    progreso = _progreso(job_id)
+    omitidas = [r for r in partes if r.get("status") == "skipped"]
+    if omitidas:
+        # otra ejecución tiene el lock: no se toca el acumulado ni se libera
+        progreso.finish("failed")
+        return {**omitidas[0], "subtasks": subtasks}
+    fallidas = [n for n, r in subtasks.items() if r.get("status") != "success"]
+    recargadas = [
+        tabla
+        for tabla, subtarea in (("cxc_pagos_fact", pagos), ("cxc_dev_fact", dev))
+        if subtarea.get("status") == "success"
+    ]
+    lock = RefreshLock(REFRESH_LOCK, job_id)
     try:
-        logger.info("🔄 Creando repositories...")
+        with refresh_run(run_id), lock.hold():
+            result = run_async(
+                _actualizar_acumulado_logic(job_id, progreso, recargadas)
+            )
+        progreso.finish("failed" if fallidas else "completed")
+        lock.release()
 
-        # Crear repositories frescos
-        tipo_cambio_repo = await repo_factory.create_tipo_cambio_repository()
-        cxc_acumulado_dim_repo = (
-            await repo_factory.create_cxc_acumulado_dim_repository()
+        records = {
+            "pagos": pagos.get("records", 0),
+            "devoluciones": dev.get("records", 0),
+            "acumulados": result["acumulados"],
+        }
+        logger.info(
+            f"📈 Resumen: {records['pagos']} pagos, {records['devoluciones']} devoluciones, {records['acumulados']} acumulados procesados"
         )
-        cxc_pagos_fact_repo = await repo_factory.create_cxc_pagos_fact_repository()
-        cxc_dev_fact_repo = await repo_factory.create_cxc_dev_fact_repository()
-
-        # Inicializar calculadores
-        pagos_calculador = CXCPagosFactCalcular()
-        dev_calculador = CXCDevFactCalcular()
-        acumulado_calculador = CXCAcumuladoDIMCalcular()
+        if not fallidas:
+            logger.info("✅ Task completada: Tablas CXC")
+            return {
+                "status": "success",
+                "message": "Tablas CXC actualizadas exitosamente",
+                "records": records,
+                "subtasks": subtasks,
+                "timestamp": result["timestamp"],
+            }
 
-        # === 1. OBTENER TIPO DE CAMBIO ===
-        logger.info("💱 Obteniendo tipos de cambio...")
+        logger.error(f"❌ Tablas CXC con subtareas fallidas: {', '.join(fallidas)}")
+        todas = len(fallidas) == len(subtasks)
+        return {
+            "status": "failed" if todas else "partial",
+            "error": subtasks[fallidas[0]].get("error"),
+            "message": (
+                "Error al actualizar tablas CXC"
+                if todas
+                else f"Tablas CXC actualizadas parcialmente; falló: {', '.join(fallidas)}"
+            ),
+            "failed_subtasks": fallidas,
+            "records": records,
+            "subtasks": subtasks,
+            "timestamp": result["timestamp"],
+        }
 
-        try:
-            tipo_cambio_records = await tipo_cambio_repo.get_all_dicts(exclude_pk=True)
-            tipo_cambio_df = pd.DataFrame(tipo_cambio_records)
+    except RefreshLockLost as e:
+        progreso.finish("failed")
+        return {**_omitida(e), "subtasks": subtasks}
+    except Exception as e:
+        logger.error(f"❌ Error en task Tablas CXC: {str(e)}")
+        if self.request.retries < self.max_retries:
             logger.info(
-                f"✅ Tipos de cambio obtenidos: {len(tipo_cambio_df)} registros"
+                f"🔄 Reintentando acumulado CXC (intento {self.request.retries + 1}/{self.max_retries})"
             )
-        except Exception as e:
-            logger.error(f"❌ Error obteniendo tipos de cambio: {e}")
-            tipo_cambio_df = pd.DataFrame()
+            raise self.retry(countdown=60)
+        progreso.finish("failed")
+        lock.release()
+        logger.error("❌ Máximo de reintentos alcanzado")
+        return {
+            "status": "failed",
+            "error": _error_serializable(e),
+            "message": "Error al actualizar tablas CXC",
+            "subtasks": subtasks,
+        }
+
+
+# === LÓGICA ===
+
+
+async def _actualizar_pagos_logic(job_id: str) -> int:
+    """Recarga CXC Pagos Fact y deja los pagos para el acumulado."""
+    repo_factory = create_repository_factory()
+    try:
+        cxc_pagos_fact_repo = await repo_factory.create_cxc_pagos_fact_repository()
 
-        # === 2. ACTUALIZAR CXC PAGOS FACT ===
-        pagos_data = []
-        try:
+        with _progreso(job_id).stage("Pagos"):
             logger.info("📊 Procesando datos de pagos...")
-            pagos_data = await pagos_calculador.calcular()
+            pagos_data = await CXCPagosFactCalcular().calcular()
 
             if pagos_data:
                 logger.info(f"💾 Insertando {len(pagos_data)} registros de pagos...")
-                await cxc_pagos_fact_repo.delete_and_bulk_insert_chunked(
-                    pagos_data, chunk_size=2000
+                await cxc_pagos_fact_repo.reload_via_staging(
+                    pagos_data,
+                    repo_factory.session_manager,
+                    chunk_size=2000,
+                    max_concurrency=settings.BULK_INSERT_CONCURRENCY,
                 )
+                await asyncio.to_thread(_guardar_pagos, job_id, pagos_data)
                 logger.info("✅ Pagos actualizados correctamente")
             else:
                 logger.warning("⚠️ No se obtuvieron datos de pagos")
 
-        except Exception as e:
-            logger.error(f"❌ Error actualizando CXCPagosFact: {e}")
+        return len(pagos_data) if pagos_data else 0
+    finally:
+        await repo_factory.cleanup()
+
 
-        # === 3. ACTUALIZAR CXC DEV FACT ===
-        dev_data = []
-        try:
+async def _actualizar_dev_logic(job_id: str) -> int:
+    """Recarga CXC Dev Fact."""
+    repo_factory = create_repository_factory()
+    try:
+        cxc_dev_fact_repo = await repo_factory.create_cxc_dev_fact_repository()
+
+        with _progreso(job_id).stage("Devoluciones"):
             logger.info("📊 Procesando datos de devoluciones...")
-            dev_data = await dev_calculador.calcular()
+            dev_data = await CXCDevFactCalcular().calcular()
 
             if dev_data:
                 logger.info(
                     f"💾 Insertando {len(dev_data)} registros de devoluciones..."
                 )
-                await cxc_dev_fact_repo.delete_and_bulk_insert_chunked(
-                    dev_data, chunk_size=2000
+                await cxc_dev_fact_repo.reload_via_staging(
+                    dev_data,
+                    repo_factory.session_manager,
+                    chunk_size=2000,
+                    max_concurrency=settings.BULK_INSERT_CONCURRENCY,
                 )
                 logger.info("✅ Devoluciones actualizadas correctamente")
 
-        except Exception as e:
-            logger.error(f"❌ Error actualizando devoluciones: {e}")
+        return len(dev_data) if dev_data else 0
+    finally:
+        await repo_factory.cleanup()
 
-        # === 4. ACTUALIZAR CXC ACUMULADO DIM CON ETL COMPLETO ===
-        acumulado_data = []
-        try:
-            logger.info("📊 Procesando ETL Acumulado DIM (replica Power BI)...")
 
-            pagos_df = pd.DataFrame(pagos_data) if pagos_data else pd.DataFrame()
-            if pagos_df.empty:
-                logger.warning("⚠️ No hay datos de pagos para procesar")
-            else:
-                acumulado_data = await acumulado_calculador.calcular(
-                    cxc_pagos_fact_df=pagos_df, tipo_cambio_df=tipo_cambio_df
-                )
+async def _actualizar_acumulado_logic(
+    job_id: str, progreso: JobProgress, recargadas: List[str]
+) -> Dict[str, Any]:
+    """
+    ETL Acumulado DIM (replica Power BI) y exportaciones de las tablas
+    recargadas. `recargadas`: tablas cuyas subtareas terminaron bien; sin
+    cxc_pagos_fact (falló cxc_pagos) no hay pagos y se omite el acumulado.
+    Manejo robusto de conexiones DB para evitar event loop issues
+    """
+    # Crear factory fresco para esta task
+    repo_factory = create_repository_factory()
 
-                if acumulado_data:
-                    logger.info(
-                        f"💾 Insertando {len(acumulado_data)} registros acumulados..."
-                    )
-                    await cxc_acumulado_dim_repo.delete_and_bulk_insert_chunked(
-                        acumulado_data, chunk_size=2000
-                    )
-                    logger.info("✅ ETL Acumulado DIM completado correctamente")
+    try:
+        logger.info("🔄 Creando repositories...")
 
-        except Exception as e:
-            logger.error(f"❌ Error en ETL Acumulado DIM: {e}")
-            raise
+        # Crear repositories frescos
+        tipo_cambio_repo = await repo_factory.create_tipo_cambio_repository()
+        cxc_acumulado_dim_repo = (
+            await repo_factory.create_cxc_acumulado_dim_repository()
+        )
+        cxc_pagos_fact_repo = await repo_factory.create_cxc_pagos_fact_repository()
+        cxc_dev_fact_repo = await repo_factory.create_cxc_dev_fact_repository()
 
-        # === 5. RESUMEN FINAL ===
-        total_pagos = len(pagos_data) if pagos_data else 0
-        total_dev = len(dev_data) if dev_data else 0
-        total_acum = len(acumulado_data) if acumulado_data else 0
+        acumulado_data = []
+        if "cxc_pagos_fact" not in recargadas:
+            logger.warning("⚠️ Falló la recarga de pagos: se omite el Acumulado DIM")
+        else:
+            # === 1. OBTENER TIPO DE CAMBIO ===
+            logger.info("💱 Obteniendo tipos de cambio...")
 
-        now = datetime.now(BaseCronjob.peru_tz)
-        now_str = now.isoformat()
+            try:
+                tipo_cambio_records = await ashared_intermediate(
+                    "tipo_cambio",
+                    lambda: tipo_cambio_repo.get_all_dicts(exclude_pk=True),
+                )
+                tipo_cambio_df = pd.DataFrame(tipo_cambio_records)
+                logger.info(
+                    f"✅ Tipos de cambio obtenidos: {len(tipo_cambio_df)} registros"
+                )
+            except Exception as e:
+                logger.error(f"❌ Error obteniendo tipos de cambio: {e}")
+                tipo_cambio_df = pd.DataFrame()
+
+            # === 2. ACTUALIZAR CXC ACUMULADO DIM CON ETL COMPLETO ===
+            with progreso.stage("Acumulado"):
+                try:
+                    logger.info("📊 Procesando ETL Acumulado DIM (replica Power BI)...")
+
+                    pagos_df = await asyncio.to_thread(_leer_pagos, job_id)
+                    if pagos_df.empty:
+                        logger.warning("⚠️ No hay datos de pagos para procesar")
+                    else:
+                        acumulado_data = await CXCAcumuladoDIMCalcular().calcular(
+                            cxc_pagos_fact_df=pagos_df, tipo_cambio_df=tipo_cambio_df
+                        )
+
+                        if acumulado_data:
+                            logger.info(
+                                f"💾 Insertando {len(acumulado_data)} registros acumulados..."
+                            )
+                            await cxc_acumulado_dim_repo.reload_via_staging(
+                                acumulado_data,
+                                repo_factory.session_manager,
+                                chunk_size=2000,
+                                max_concurrency=settings.BULK_INSERT_CONCURRENCY,
+                            )
+                            logger.info("✅ ETL Acumulado DIM completado correctamente")
+
+                except Exception as e:
+                    logger.error(f"❌ Error en ETL Acumulado DIM: {e}")
+                    raise
+            recargadas = [*recargadas, "cxc_acumulado_dim"]
+
+        # === 3. EXPORTACIONES PRE-GENERADAS ===
+        with progreso.stage("Exportaciones"):
+            if recargadas:
+                bump_data_version_sync(*recargadas)
+            for tabla, repo in (
+                ("cxc_pagos_fact", cxc_pagos_fact_repo),
+                ("cxc_dev_fact", cxc_dev_fact_repo),
+                ("cxc_acumulado_dim", cxc_acumulado_dim_repo),
+            ):
+                if tabla not in recargadas:
+                    continue
+                publish_exports(
+                    tabla,
+                    {"completo": pd.DataFrame(await repo.get_all_dicts())},
+                    name=f"Exportar {tabla}",
+                    description=f"Exportación de {tabla} tras la recarga de CXC",
+                )
 
         logger.info("🎉 ETL CXC completo finalizado exitosamente")
-        logger.info(
-            f"📈 Resumen: {total_pagos} pagos, {total_dev} devoluciones, {total_acum} acumulados procesados"
-        )
 
         return {
-            "status": "success",
-            "records": {
-                "pagos": total_pagos,
-                "devoluciones": total_dev,
-                "acumulados": total_acum,
-            },
-            "timestamp": now_str,
+            "acumulados": len(acumulado_data) if acumulado_data else 0,
+            "timestamp": datetime.now(BaseCronjob.peru_tz).isoformat(),
         }
 
     except Exception as e:
         logger.error(f"❌ Error en lógica Tablas CXC: {str(e)}")
         raise e
-
-
+    finally:
+        await repo_factory.cleanup()
@@ -1,23 +1,32 @@
 # background/tasks/toolbox/tablas_reportes_task.py
 """� Celery Task para Tablas Reportes - Business Logic Completa"""
 
-import asyncio
 import pandas as pd
 from datetime import datetime
 from typing import Dict, Any
 from config.celery_config import celery_app
+from config.worker_runtime import run_async
 from config.repository_factory import (
     create_repository_factory,
     create_repository_factory_sync,
 )
 from config.logger import logger
+from config.settings import settings
 from cronjobs.BaseCronjob import BaseCronjob
 from utils.adelantafactoring.calculos import NuevosClientesNuevosPagadoresCalcular
 from utils.adelantafactoring.calculos import SaldosCalcular
+from utils.adelantafactoring.calculos import KPIRollupCalcular
 import orjson
 from config.redis import redis_manager_sync
+from utils.data_version import bump_data_version_sync
+from config.job_progress import JobProgress
+from config.export_snapshots import publish_exports
+from utils.export_profiles import get_export_profile
+from utils.refresh_intermediates import ashared_intermediate, refresh_run
+from config.refresh_lock import single_flight
 from toolbox.api.kpi_api import get_kpi
 
+REFRESH_LOCK = "tablas_reportes"  # lock:refresh:tablas_reportes (single-flight)
 
 
 # @celery_app.task(
@@ -98,7 +107,7 @@ from toolbox.api.kpi_api import get_kpi
 #         logger.info("🧮 Calculando KPI (sync)...")
 
 #         # KPI - Nota: get_kpi es async, pero podemos usar asyncio.run solo para esta parte
-#         kpi_calcular = asyncio.run(
+#         kpi_calcular = run_async(
 #             get_kpi(
 #                 tipo_cambio_df=tipo_cambio_df,
 #                 start_date=BaseCronjob.obtener_datetime_fecha_inicio(),
@@ -172,7 +181,7 @@ from toolbox.api.kpi_api import get_kpi
 #         redis_client_sync = redis_manager_sync.get_client_sync()
 #         redis_client_sync.set(status_key, status_value)
 
-#         # asyncio.run(set_redis_status())
+#         # run_async(set_redis_status())
 
 #         logger.info("✅ Tablas Reportes SYNC completado exitosamente")
 
@@ -208,7 +217,6 @@ from toolbox.api.kpi_api import get_kpi
 #         ).decode("utf-8")
 
 
-
 #         redis_client_sync = redis_manager_sync.get_client_sync()
 #         redis_client_sync.set(status_key, status_value)
 
@@ -224,8 +232,6 @@ from toolbox.api.kpi_api import get_kpi
 #             logger.warning(f"⚠️ Error durante cleanup sync: {cleanup_error}")
 
 
-
-
 @celery_app.task(
     bind=True,
     name="toolbox.tablas_reportes",
@@ -233,16 +239,21 @@ from toolbox.api.kpi_api import get_kpi
     max_retries=0,  # Sin reintentos, una sola ejecución
     default_retry_delay=60,
 )
-def tablas_reportes_task(self) -> Dict[str, Any]:
+@single_flight(REFRESH_LOCK)
+def tablas_reportes_task(self, run_id: str | None = None) -> Dict[str, Any]:
     """
     🎯 Task Celery: Actualizar Tablas Reportes (KPI, NuevosClientes, Saldos)
     Equivalente a ActualizarTablasReportesCronjob
+    run_id: corrida del DAG de recarga cuyos insumos compartidos reutiliza
     """
+    progreso = JobProgress(self.request.id, self.name, ttl=settings.JOB_INDEX_RETENTION)
     try:
         logger.info("🚀 Iniciando task: Tablas Reportes")
 
         # Ejecutar lógica async en event loop
-        result = asyncio.run(_actualizar_tablas_reportes_logic())
+        with refresh_run(run_id):
+            result = run_async(_actualizar_tablas_reportes_logic(progreso))
+        progreso.finish("completed")
 
         logger.info("✅ Task completada: Tablas Reportes")
         return {
@@ -253,6 +264,7 @@ def tablas_reportes_task(self) -> Dict[str, Any]:
         }
 
     except Exception as e:
+        progreso.finish("failed")
         error_msg = f"❌ Error en task Tablas Reportes: {str(e)}"
         error_type = type(e).__name__
         logger.error(error_msg)
@@ -280,7 +292,7 @@ def tablas_reportes_task(self) -> Dict[str, Any]:
             }
 
 
-async def _actualizar_tablas_reportes_logic() -> Dict[str, Any]:
+async def _actualizar_tablas_reportes_logic(progreso: JobProgress) -> Dict[str, Any]:
     """
     Lógica principal para actualizar Tablas Reportes
     Manejo robusto de conexiones DB para evitar event loop issues
@@ -295,6 +307,7 @@ async def _actualizar_tablas_reportes_logic() -> Dict[str, Any]:
         # Crear repositories frescos
         tipo_cambio_repo = await repo_factory.create_tipo_cambio_repository()
         kpi_repo = await repo_factory.create_kpi_repository()
+        kpi_rollup_repo = await repo_factory.create_kpi_rollup_mensual_repository()
         nuevos_clientes_repo = (
             await repo_factory.create_nuevos_clientes_nuevos_pagadores_repository()
         )
@@ -303,65 +316,87 @@ async def _actualizar_tablas_reportes_logic() -> Dict[str, Any]:
             await repo_factory.create_actualizacion_reportes_repository()
         )
 
-        logger.info("📊 Obteniendo datos de TipoCambio...")
+        with progreso.stage("TipoCambio"):
+            logger.info("📊 Obteniendo datos de TipoCambio...")
 
-        # TipoCambio
-        tipo_cambio_records = await tipo_cambio_repo.get_all_dicts(exclude_pk=True)
-        tipo_cambio_df = pd.DataFrame(tipo_cambio_records)
-        tipo_cambio_df["TipoCambioFecha"] = pd.to_datetime(
-            tipo_cambio_df["TipoCambioFecha"]
-        )
+            # TipoCambio
+            tipo_cambio_records = await ashared_intermediate(
+                "tipo_cambio", lambda: tipo_cambio_repo.get_all_dicts(exclude_pk=True)
+            )
+            tipo_cambio_df = pd.DataFrame(tipo_cambio_records)
+            tipo_cambio_df["TipoCambioFecha"] = pd.to_datetime(
+                tipo_cambio_df["TipoCambioFecha"]
+            )
 
-        logger.info("🧮 Calculando KPI...")
+        with progreso.stage("KPI"):
+            logger.info("🧮 Calculando KPI...")
+
+            # KPI
+            kpi_calcular = await get_kpi(
+                tipo_cambio_df=tipo_cambio_df,
+                start_date=BaseCronjob.obtener_datetime_fecha_inicio(),
+                end_date=BaseCronjob.obtener_datetime_fecha_fin(),
+                fecha_corte=BaseCronjob.obtener_datetime_fecha_fin(),
+                tipo_reporte=2,
+                as_df=False,
+            )
 
-        # KPI
-        kpi_calcular = await get_kpi(
-            tipo_cambio_df=tipo_cambio_df,
-            start_date=BaseCronjob.obtener_datetime_fecha_inicio(),
-            end_date=BaseCronjob.obtener_datetime_fecha_fin(),
-            fecha_corte=BaseCronjob.obtener_datetime_fecha_fin(),
-            tipo_reporte=2,
-            as_df=False,
-        )
+            logger.info(f"💾 Insertando {len(kpi_calcular)} registros KPI...")
 
-        logger.info(f"💾 Insertando {len(kpi_calcular)} registros KPI...")
+            await kpi_repo.reload_via_staging(
+                kpi_calcular,
+                repo_factory.session_manager,
+                chunk_size=5000,
+                max_concurrency=settings.BULK_INSERT_CONCURRENCY,
+            )
 
-        await kpi_repo.delete_and_bulk_insert_chunked(kpi_calcular, chunk_size=5000)
+        kpi_df = pd.DataFrame(kpi_calcular)
 
-        logger.info("🧮 Calculando NuevosClientesNuevosPagadores...")
+        with progreso.stage("KPIRollup"):
+            logger.info("🧮 Calculando rollup mensual de KPI...")
 
-        # NuevosClientesNuevosPagadores
-        nuevos_clientes_nuevos_pagadores_calcular = (
-            NuevosClientesNuevosPagadoresCalcular(pd.DataFrame(kpi_calcular)).calcular(
-                start_date=BaseCronjob.obtener_string_fecha_inicio(tipo=1),
-                end_date=BaseCronjob.obtener_string_fecha_fin(tipo=1),
-                ruc_c_col="RUCCliente",
-                ruc_p_col="RUCPagador",
-                ruc_c_ns_col="RazonSocialCliente",
-                ruc_p_ns_col="RazonSocialPagador",
-                ejecutivo_col="Ejecutivo",
-                type_op_col="TipoOperacion",
+            # Rollup mensual (Mes × Ejecutivo × Sector × TipoOperacion × Moneda)
+            kpi_rollup_calcular = KPIRollupCalcular(kpi_df).calcular()
+            await kpi_rollup_repo.reload_via_staging(
+                kpi_rollup_calcular, repo_factory.session_manager
             )
-        )
 
-        logger.info(
-            f"💾 Insertando {len(nuevos_clientes_nuevos_pagadores_calcular)} registros NuevosClientes..."
-        )
+        with progreso.stage("NuevosClientes"):
+            logger.info("🧮 Calculando NuevosClientesNuevosPagadores...")
+
+            # NuevosClientesNuevosPagadores
+            nuevos_clientes_nuevos_pagadores_calcular = (
+                NuevosClientesNuevosPagadoresCalcular(kpi_df).calcular(
+                    start_date=BaseCronjob.obtener_string_fecha_inicio(tipo=1),
+                    end_date=BaseCronjob.obtener_string_fecha_fin(tipo=1),
+                    ruc_c_col="RUCCliente",
+                    ruc_p_col="RUCPagador",
+                    ruc_c_ns_col="RazonSocialCliente",
+                    ruc_p_ns_col="RazonSocialPagador",
+                    ejecutivo_col="Ejecutivo",
+                    type_op_col="TipoOperacion",
+                )
+            )
 
-        await nuevos_clientes_repo.delete_and_bulk_insert_chunked(
-            nuevos_clientes_nuevos_pagadores_calcular, chunk_size=5000
-        )
+            logger.info(
+                f"💾 Insertando {len(nuevos_clientes_nuevos_pagadores_calcular)} registros NuevosClientes..."
+            )
 
-        logger.info("🧮 Calculando Saldos...")
+            await nuevos_clientes_repo.delete_and_bulk_insert_chunked(
+                nuevos_clientes_nuevos_pagadores_calcular, chunk_size=5000
+            )
 
-        # Saldos
-        saldos_calcular = SaldosCalcular().calcular()
+        with progreso.stage("Saldos"):
+            logger.info("🧮 Calculando Saldos...")
 
-        logger.info(f"💾 Insertando {len(saldos_calcular)} registros Saldos...")
+            # Saldos
+            saldos_calcular = SaldosCalcular().calcular()
 
-        await saldos_repo.delete_and_bulk_insert_chunked(
-            saldos_calcular, chunk_size=5000
-        )
+            logger.info(f"💾 Insertando {len(saldos_calcular)} registros Saldos...")
+
+            await saldos_repo.delete_and_bulk_insert_chunked(
+                saldos_calcular, chunk_size=5000
+            )
 
         # Obtenemos el timestamp
         now = datetime.now(BaseCronjob.peru_tz)
@@ -376,14 +411,32 @@ async def _actualizar_tablas_reportes_logic() -> Dict[str, Any]:
         status_value = orjson.dumps(
             {"status": "Active", "timestamp": now_str, "error": None}
         ).decode("utf-8")
-        redis_client_sync = redis_manager_sync.get_client_sync()
-        redis_client_sync.set(status_key, status_value)
+        redis_manager_sync.set_status(status_key, status_value)
+        # invalida los archivos memoizados de create_job de estas tablas
+        bump_data_version_sync(
+            "kpi", "kpi_rollup_mensual", "nuevos_clientes_nuevos_pagadores"
+        )
+
+        with progreso.stage("Exportaciones"):
+            # mismas filas que lee /datamart/kpi/file/{tipo}; una sola lectura,
+            # el informe se proyecta del DataFrame completo
+            completo = pd.DataFrame(await kpi_repo.get_all_dicts())
+            publish_exports(
+                "kpi",
+                {
+                    "completo": completo,
+                    "informe": get_export_profile("kpi", "informe").proyectar(completo),
+                },
+                name="Calcular KPI",
+                description="Generar un excel con los KPI calculados",
+            )
 
         logger.info("✅ Tablas Reportes completado exitosamente")
         return {
             "status": "success",
             "records": {
                 "kpi": len(kpi_calcular) if kpi_calcular else 0,
+                "kpi_rollup_mensual": len(kpi_rollup_calcular),
                 "nuevos_clientes": (
                     len(nuevos_clientes_nuevos_pagadores_calcular)
                     if nuevos_clientes_nuevos_pagadores_calcular
@@ -405,8 +458,7 @@ async def _actualizar_tablas_reportes_logic() -> Dict[str, Any]:
         status_value = orjson.dumps(
             {"status": "Error", "timestamp": now_str, "error": error_message}
         ).decode("utf-8")
-        redis_client_sync = redis_manager_sync.get_client_sync()
-        redis_client_sync.set(status_key, status_value)
+        redis_manager_sync.set_status(status_key, status_value)
         logger.error(f"❌ Error en lógica Tablas Reportes: {str(e)}")
         raise e
     finally:
@@ -415,7 +467,3 @@ async def _actualizar_tablas_reportes_logic() -> Dict[str, Any]:
             logger.debug("✅ RepositoryFactory cleanup completado")
         except Exception as cleanup_error:
             logger.warning(f"⚠️ Error durante cleanup: {cleanup_error}")
-
-
-
-
@@ -6,6 +6,7 @@
 
 from typing import Dict, Any
 from config.celery_config import celery_app
+from config.worker_runtime import run_async
 from config.repository_factory import create_repository_factory
 from config.logger import logger
 from schemas.datamart.TipoCambioSchema import TipoCambioPostRequestSchema
@@ -16,6 +17,7 @@ import httpx
 import asyncio
 from typing import List, Set
 from cronjobs.BaseCronjob import BaseCronjob
+from utils.data_version import bump_data_version_sync
 
 
 @celery_app.task(name="toolbox.tipo_cambio", bind=True, max_retries=0)
@@ -37,7 +39,7 @@ def tipo_cambio_task(self, batch_size: int = 1):
         )
 
         # 🎯 Business Logic: Ejecutar actualización
-        result = asyncio.run(_execute_tipo_cambio_update(batch_size=batch_size))
+        result = run_async(_execute_tipo_cambio_update(batch_size=batch_size))
 
         logger.info(f"✅ Task completada exitosamente: {result}")
         return result
@@ -128,6 +130,7 @@ async def _execute_tipo_cambio_update(
                     else len(final_results)
                 )
                 logger.info(f"💾 Guardados {records_count} registros en BD")
+                bump_data_version_sync("tipo_cambio")
             except Exception as e:
                 logger.error(f"❌ Error guardando en BD: {str(e)}")
                 raise
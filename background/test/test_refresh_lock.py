@@ -0,0 +1,182 @@
+# background/test/test_refresh_lock.py
+"""
+🧪 Tests del single-flight de recargas (config/refresh_lock.py)
+
+Corren contra un Redis de pruebas: TEST_REDIS_URL (por defecto la base 15 de
+localhost). Si no hay Redis disponible, se omiten.
+"""
+
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+import redis
+from celery.exceptions import Ignore
+
+from config import refresh_lock
+from config.redis import redis_manager_sync
+from config.settings import settings
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+NOMBRE = "test_refresh_lock"
+KEY = f"lock:refresh:{NOMBRE}"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = redis.Redis.from_url(TEST_REDIS_URL, decode_responses=True)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        pytest.skip(f"Redis de pruebas no disponible en {TEST_REDIS_URL}")
+    monkeypatch.setattr(redis_manager_sync, "get_client_sync", lambda: client)
+    monkeypatch.setattr(settings, "REFRESH_LOCK_TTL", 30)
+    client.delete(KEY)
+    yield client
+    client.delete(KEY)
+    client.close()
+
+
+def _task(task_id: str) -> SimpleNamespace:
+    """Lo que single_flight usa de una task de Celery con bind=True."""
+    return SimpleNamespace(request=SimpleNamespace(id=task_id), name="toolbox.test")
+
+
+def test_acquire_lock_libre_y_propio(client):
+    lock = refresh_lock.RefreshLock(NOMBRE, "task-a")
+
+    assert lock.acquire() == "task-a"
+    assert client.get(KEY) == "task-a"
+    assert 0 < client.ttl(KEY) <= 30
+    # el dueño puede volver a tomarlo (p.ej. la task con el id reservado)
+    assert lock.acquire() == "task-a"
+
+
+def test_acquire_con_otro_dueno_devuelve_su_id(client):
+    refresh_lock.RefreshLock(NOMBRE, "task-a").acquire()
+
+    assert refresh_lock.RefreshLock(NOMBRE, "task-b").acquire() == "task-a"
+    assert client.get(KEY) == "task-a"
+
+
+def test_renew_y_release_no_hacen_nada_si_no_es_el_dueno(client):
+    refresh_lock.RefreshLock(NOMBRE, "task-a").acquire()
+    client.expire(KEY, 10)
+    ajeno = refresh_lock.RefreshLock(NOMBRE, "task-b")
+
+    assert ajeno.renew() is False
+    assert client.ttl(KEY) <= 10
+    ajeno.release()
+    assert client.get(KEY) == "task-a"
+
+
+def test_renew_y_release_del_dueno(client):
+    lock = refresh_lock.RefreshLock(NOMBRE, "task-a")
+    lock.acquire()
+    client.expire(KEY, 10)
+
+    assert lock.renew() is True
+    assert client.ttl(KEY) > 10
+    lock.release()
+    assert client.get(KEY) is None
+
+
+def test_reserve_refresh(client):
+    task_id, reservado = refresh_lock.reserve_refresh(NOMBRE)
+    assert reservado and client.get(KEY) == task_id
+
+    duplicado, reservado = refresh_lock.reserve_refresh(NOMBRE)
+    assert not reservado and duplicado == task_id
+
+
+def test_heartbeat_renueva_el_ttl(client, monkeypatch):
+    monkeypatch.setattr(settings, "REFRESH_LOCK_TTL", 2)
+    monkeypatch.setattr(settings, "REFRESH_LOCK_HEARTBEAT", 0.5)
+    lock = refresh_lock.RefreshLock(NOMBRE, "task-a")
+    lock.acquire()
+
+    with lock.heartbeat():
+        time.sleep(3)  # más que el TTL: sin latido habría caducado
+        assert client.get(KEY) == "task-a"
+
+
+def test_single_flight_libera_al_terminar(client):
+    @refresh_lock.single_flight(NOMBRE)
+    def task(self):
+        assert client.get(KEY) == self.request.id
+        return {"status": "success"}
+
+    assert task(_task("task-a")) == {"status": "success"}
+    assert client.get(KEY) is None
+
+
+def test_single_flight_omite_duplicados(client):
+    refresh_lock.RefreshLock(NOMBRE, "task-a").acquire()
+    llamadas = []
+
+    @refresh_lock.single_flight(NOMBRE)
+    def task(self):
+        llamadas.append(self.request.id)
+
+    resultado = task(_task("task-b"))
+
+    assert llamadas == []
+    assert resultado["status"] == "skipped"
+    assert resultado["running_task_id"] == "task-a"
+    assert client.get(KEY) == "task-a"
+
+
+def test_single_flight_libera_si_la_task_falla(client):
+    @refresh_lock.single_flight(NOMBRE, release=False)
+    def task(self):
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        task(_task("task-a"))
+    assert client.get(KEY) is None
+
+
+def test_single_flight_task_reemplazada_conserva_el_lock(client):
+    # replace() fuera de modo eager lanza Ignore: sigue el chord que la reemplazó
+    @refresh_lock.single_flight(NOMBRE, release=False)
+    def task(self):
+        raise Ignore()
+
+    with pytest.raises(Ignore):
+        task(_task("task-a"))
+    assert client.get(KEY) == "task-a"
+
+
+def test_single_flight_sin_liberar_al_terminar(client):
+    @refresh_lock.single_flight(NOMBRE, release=False)
+    def task(self):
+        return {"status": "success"}
+
+    task(_task("task-a"))
+    assert client.get(KEY) == "task-a"
+
+
+def test_hold_vuelve_a_tomar_un_lock_caducado(client):
+    # la subtarea esperó en cola más que el TTL: el lock de su chord caducó
+    refresh_lock.RefreshLock(NOMBRE, "chord-a").acquire()
+    client.delete(KEY)
+
+    with refresh_lock.RefreshLock(NOMBRE, "chord-a").hold():
+        assert client.get(KEY) == "chord-a"
+        assert 0 < client.ttl(KEY) <= 30
+
+
+def test_hold_aborta_si_otra_ejecucion_tomo_el_lock(client):
+    refresh_lock.RefreshLock(NOMBRE, "chord-a").acquire()
+    client.delete(KEY)  # caducó en cola...
+    refresh_lock.RefreshLock(NOMBRE, "chord-b").acquire()  # ...y empezó otra corrida
+    ejecutado = False
+
+    with pytest.raises(refresh_lock.RefreshLockLost) as exc:
+        with refresh_lock.RefreshLock(NOMBRE, "chord-a").hold():
+            ejecutado = True
+
+    assert not ejecutado
+    assert exc.value.dueno == "chord-b"
+    assert client.get(KEY) == "chord-b"
@@ -0,0 +1,181 @@
+"""
+Dataset canónico de los jobs y renderización de formatos bajo demanda.
+
+Si un job con is_buffer devuelve un DataFrame (pandas o polars) o una tabla
+Arrow, se guarda una sola vez como Parquet; /cronjob/download/{job_id}?format=
+lo convierte al formato pedido (excel, csv, orjson, arrow) en el pool de procesos la
+primera vez y guarda esa renderización como variante del artefacto, con el
+mismo TTL que el dataset. El cálculo pesado del job corre una sola vez sin
+importar cuántos formatos se descarguen.
+"""
+
+import asyncio
+from io import BytesIO
+from typing import Any
+
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import redis.asyncio as aioredis
+
+from config.artifact_retention import artifact_retention
+from config.artifact_store import FORMATOS, artifact_store
+from config.job_executor import job_executor
+from config.logger import logger
+from utils.excel_writer import XlsxBatchWriter
+
+CANONICAL_FORMAT = "parquet"
+
+# nombres aceptados en ?format= (además de las claves de FORMATOS)
+ALIAS_FORMATOS = {"xlsx": "excel", "json": "orjson"}
+
+
+def is_dataset(data: Any) -> bool:
+    return isinstance(data, (pd.DataFrame, pl.DataFrame, pa.Table))
+
+
+def normalize_format(formato: str) -> str:
+    formato = formato.lower()
+    return ALIAS_FORMATOS.get(formato, formato)
+
+
+def dictionary_encode_strings(table: pa.Table, max_ratio: float = 0.5) -> pa.Table:
+    """
+    Codifica como diccionario las columnas de texto con valores repetidos
+    (distintos / filas <= max_ratio): Moneda, Ejecutivo, Sector... Los
+    consumidores (pandas, Power BI) las leen como categóricas.
+    """
+    if table.num_rows == 0:
+        return table
+    for i, campo in enumerate(table.schema):
+        tipo = campo.type
+        if not (
+            pa.types.is_string(tipo)
+            or pa.types.is_large_string(tipo)
+            or pa.types.is_string_view(tipo)
+        ):
+            continue
+        columna = table.column(i)
+        if pa.types.is_string_view(tipo):
+            columna = columna.cast(pa.large_string())
+        if pc.count_distinct(columna).as_py() <= max_ratio * table.num_rows:
+            table = table.set_column(i, campo.name, pc.dictionary_encode(columna))
+    return table
+
+
+def dataset_to_parquet(data: pd.DataFrame | pl.DataFrame | pa.Table) -> bytes:
+    """Serializa el resultado del job a Parquet (zstd, texto como diccionario)."""
+    if isinstance(data, pl.DataFrame):
+        table = data.to_arrow()
+    elif isinstance(data, pd.DataFrame):
+        try:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # columnas object con tipos mezclados: se guardan como texto
+            mixtas = data.select_dtypes(include="object").columns
+            table = pa.Table.from_pandas(
+                data.astype({c: "string" for c in mixtas}), preserve_index=False
+            )
+    else:
+        table = data
+    sink = pa.BufferOutputStream()
+    pq.write_table(dictionary_encode_strings(table), sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+
+def render_parquet(data: bytes, formato: str) -> bytes:
+    """Convierte el Parquet canónico a `formato`; corre en el pool de procesos."""
+    if formato == "excel":
+        # por lotes y en modo constant_memory: no se arma el DataFrame completo
+        parquet = pq.ParquetFile(pa.BufferReader(data))
+        buf = BytesIO()
+        writer = XlsxBatchWriter(buf, parquet.schema_arrow.names)
+        for lote in parquet.iter_batches(batch_size=50_000):
+            writer.write_batch(lote)
+        writer.close()
+        return buf.getvalue()
+    if formato == "arrow":
+        # Arrow IPC (archivo) con buffers zstd; conserva tipos y diccionarios
+        table = pq.read_table(pa.BufferReader(data))
+        sink = pa.BufferOutputStream()
+        opciones = pa.ipc.IpcWriteOptions(compression="zstd")
+        with pa.ipc.new_file(sink, table.schema, options=opciones) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    df = pq.read_table(pa.BufferReader(data)).to_pandas()
+    if formato == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if formato == "orjson":
+        return df.to_json(
+            orient="records", date_format="iso", force_ascii=False
+        ).encode("utf-8")
+    raise ValueError(f"No se puede renderizar un dataset como {formato}")
+
+
+class ArtifactRenderer:
+    def __init__(self):
+        # una renderización por (job, formato) a la vez dentro del proceso
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+
+    async def resolve(
+        self,
+        client: aioredis.Redis,
+        job_id: str,
+        manifest: dict[str, Any],
+        formato: str | None,
+    ) -> dict[str, Any]:
+        """
+        Manifiesto del artefacto a descargar en `formato` (por defecto el del
+        job). Lanza ValueError si el job no tiene ese formato disponible.
+        """
+        formato = normalize_format(formato or manifest["default_format"] or "")
+        if not formato or formato == manifest["format"]:
+            return manifest
+        if manifest["format"] != CANONICAL_FORMAT or formato not in FORMATOS:
+            raise ValueError(
+                f"El resultado del job está disponible solo como {manifest['format']}"
+            )
+
+        if cached := await artifact_store.get_manifest(client, job_id, formato):
+            return cached
+        lock = self._locks.setdefault((job_id, formato), asyncio.Lock())
+        try:
+            async with lock:
+                if cached := await artifact_store.get_manifest(client, job_id, formato):
+                    return cached
+                return await self._render(client, job_id, manifest, formato)
+        finally:
+            if not lock.locked():
+                self._locks.pop((job_id, formato), None)
+
+    async def _render(
+        self,
+        client: aioredis.Redis,
+        job_id: str,
+        manifest: dict[str, Any],
+        formato: str,
+    ) -> dict[str, Any]:
+        # la variante vive lo mismo que el dataset del que sale
+        ttl = await client.ttl(artifact_store.manifest_key(job_id))
+        if ttl <= 0:
+            raise ValueError("El resultado del job expiró")
+        data = await artifact_store.read(client, job_id, manifest)
+        rendered = await job_executor.run_cpu(render_parquet, data, formato)
+        artifact = await artifact_store.prepare(
+            job_id, formato, rendered, variante=formato, pinned=manifest["pinned"]
+        )
+        await artifact_store.write_chunks(client, artifact, ttl)
+        async with client.pipeline(transaction=True) as pipe:
+            artifact_store.enqueue(pipe, artifact, ttl)
+            artifact_retention.track(pipe, artifact)
+            await pipe.execute()
+        await artifact_retention.enforce(client)
+        logger.debug(f"[artifact_render] {job_id} renderizado como {formato}")
+        if rendido := await artifact_store.get_manifest(client, job_id, formato):
+            return rendido
+        raise ValueError("El resultado del job fue expulsado por falta de espacio")
+
+
+artifact_renderer = ArtifactRenderer()
@@ -0,0 +1,159 @@
+"""
+Retención de los artefactos de jobs con un presupuesto de memoria en Redis.
+
+- Cada artefacto guardado en Redis (y cada variante renderizada) se registra
+  en artifacts:lru (zset, score = momento en que se guardó) con su tamaño
+  comprimido en artifacts:sizes.
+- En el barrido periódico (config/job_sweeper.py, cada JOB_SWEEP_INTERVAL) y
+  tras renderizar una variante, si el total supera ARTIFACT_REDIS_BUDGET se
+  expulsan los artefactos más antiguos (manifiesto, chunks y variantes) hasta
+  volver al presupuesto; el hash del job queda marcado con artifact_evicted.
+- Los jobs en ARTIFACT_PINNED_RETENTION (p.ej. las comisiones mensuales) no
+  entran al LRU y se conservan al menos esos segundos.
+
+Solo se registran artefactos de jobs completados; los volcados a disco no
+cuentan para el presupuesto (los limpia purge_spill, en el mismo barrido).
+"""
+
+import datetime
+import time
+
+import redis.asyncio as aioredis
+
+from config.artifact_store import Artifact, artifact_store
+from config.logger import logger
+from config.settings import settings
+
+
+class ArtifactRetention:
+    LRU_KEY = "artifacts:lru"
+    SIZES_KEY = "artifacts:sizes"
+    LOCK_KEY = "artifacts:retention:lock"
+
+    def __init__(self, budget: int, pinned: dict[str, int]):
+        self.budget = budget
+        self.pinned = pinned
+
+    def is_pinned(self, name: str) -> bool:
+        return name in self.pinned
+
+    def expire_for(self, name: str, expire: int) -> int:
+        """TTL del resultado de un job `name`: el del job o el de su pin."""
+        return max(expire, self.pinned.get(name, 0))
+
+    @staticmethod
+    def _member(job_id: str, variante: str = "") -> str:
+        return f"{job_id}:{variante}" if variante else job_id
+
+    def track(self, pipe: aioredis.client.Pipeline, artifact: Artifact) -> None:
+        """Encola el registro del artefacto en el LRU (salvo pineados o en disco)."""
+        if artifact.pinned or artifact.backend != "redis":
+            return
+        member = self._member(artifact.job_id, artifact.variante)
+        pipe.zadd(self.LRU_KEY, {member: time.time()})
+        pipe.hset(self.SIZES_KEY, member, artifact.stored_size)
+
+    async def usage(self, client: aioredis.Redis) -> dict:
+        sizes = await client.hvals(self.SIZES_KEY)
+        return {
+            "artifacts": len(sizes),
+            "bytes": sum(int(s) for s in sizes),
+            "budget": self.budget,
+            "pinned": self.pinned,
+        }
+
+    async def enforce(self, client: aioredis.Redis) -> int:
+        """
+        Olvida los artefactos ya expirados y, si el total sigue por encima del
+        presupuesto, expulsa los más antiguos. Devuelve cuántos jobs expulsó.
+        """
+        # un solo proceso a la vez; si otro ya está en ello, basta con el suyo
+        if not await client.set(self.LOCK_KEY, "1", nx=True, ex=30):
+            return 0
+        try:
+            return await self._enforce(client)
+        finally:
+            await client.delete(self.LOCK_KEY)
+
+    async def _enforce(self, client: aioredis.Redis) -> int:
+        members = [
+            m.decode() if isinstance(m, bytes) else m
+            for m in await client.zrange(self.LRU_KEY, 0, -1)
+        ]
+        if not members:
+            return 0
+        async with client.pipeline(transaction=False) as pipe:
+            for member in members:
+                job_id, _, variante = member.partition(":")
+                pipe.exists(artifact_store.manifest_key(job_id, variante))
+            pipe.hmget(self.SIZES_KEY, members)
+            *vivos, sizes = await pipe.execute()
+
+        expirados = [m for m, vivo in zip(members, vivos) if not vivo]
+        if expirados:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.zrem(self.LRU_KEY, *expirados)
+                pipe.hdel(self.SIZES_KEY, *expirados)
+                await pipe.execute()
+
+        tamanos = {m: int(s or 0) for m, s, vivo in zip(members, sizes, vivos) if vivo}
+        total = sum(tamanos.values())
+        if not self.budget or total <= self.budget:
+            return 0
+
+        # los más antiguos primero; cada job sale con todas sus variantes
+        expulsados: list[str] = []
+        for member in tamanos:
+            if total <= self.budget:
+                break
+            job_id = member.partition(":")[0]
+            if job_id in expulsados:
+                continue
+            variantes = [m for m in tamanos if m.partition(":")[0] == job_id]
+            await self._evict(client, job_id, variantes)
+            total -= sum(tamanos[m] for m in variantes)
+            expulsados.append(job_id)
+
+        logger.info(
+            f"[artifact_retention] {len(expulsados)} artefactos expulsados; "
+            f"{total} de {self.budget} bytes en uso"
+        )
+        return len(expulsados)
+
+    async def _evict(self, client: aioredis.Redis, job_id: str, members: list[str]):
+        async with client.pipeline(transaction=False) as pipe:
+            for member in members:
+                pipe.hget(
+                    artifact_store.manifest_key(job_id, member.partition(":")[2]),
+                    "chunks",
+                )
+            chunks = await pipe.execute()
+
+        ahora = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        async with client.pipeline(transaction=True) as pipe:
+            for member, n in zip(members, chunks):
+                variante = member.partition(":")[2]
+                pipe.delete(
+                    artifact_store.manifest_key(job_id, variante),
+                    *(
+                        artifact_store.chunk_key(job_id, i, variante)
+                        for i in range(int(n or 0))
+                    ),
+                )
+            pipe.zrem(self.LRU_KEY, *members)
+            pipe.hdel(self.SIZES_KEY, *members)
+            # hset con xx no existe: solo se marca si el hash sigue vivo
+            pipe.eval(
+                "if redis.call('EXISTS', KEYS[1]) == 1 then "
+                "redis.call('HSET', KEYS[1], 'artifact_evicted', ARGV[1]) end",
+                1,
+                f"job:{job_id}:meta",
+                ahora,
+            )
+            await pipe.execute()
+
+
+artifact_retention = ArtifactRetention(
+    budget=settings.ARTIFACT_REDIS_BUDGET,
+    pinned=settings.ARTIFACT_PINNED_RETENTION,
+)
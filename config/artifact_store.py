@@ -0,0 +1,319 @@
+"""
+Almacenamiento de los artefactos (Excel/CSV/ZIP/JSON/Parquet/Arrow) que generan
+los jobs.
+
+Cada artefacto se guarda como un manifiesto (hash job:{id}:artifact) y una
+serie de chunks de tamaño fijo comprimidos con zstd (job:{id}:artifact:{n}),
+así la descarga lee y envía un chunk a la vez en lugar de cargar el archivo
+completo en memoria. Los chunks se escriben primero, en pipelines de
+ARTIFACT_WRITE_BATCH chunks sin MULTI, y el manifiesto al final en el MULTI
+del job: un lector nunca ve un artefacto a medias y un archivo grande no
+ocupa Redis con una sola transacción. Los artefactos que superan ARTIFACT_SPILL_THRESHOLD se
+vuelcan a disco local (ARTIFACT_SPILL_DIR) y en Redis queda solo el manifiesto.
+
+Un artefacto puede tener variantes (job:{id}:artifact:{variante}): son las
+renderizaciones en otros formatos de un dataset canónico en Parquet, ver
+config/artifact_render.py.
+
+El volcado a disco asume que la descarga la sirve el mismo host que ejecutó el
+job (create_job corre dentro del proceso de la API).
+"""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator
+
+import redis
+import redis.asyncio as aioredis
+import zstandard
+
+from config.logger import logger
+from config.settings import settings
+
+# formato -> (extensión, media type)
+FORMATOS: dict[str, tuple[str, str]] = {
+    "zip": ("zip", "application/x-zip-compressed"),
+    "excel": (
+        "xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ),
+    "csv": ("csv", "text/csv"),
+    "orjson": ("json", "application/json"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+@dataclass
+class Artifact:
+    """Artefacto ya comprimido, listo para encolarse en un pipeline."""
+
+    job_id: str
+    formato: str
+    size: int
+    backend: str  # "redis" | "disk"
+    chunks: list[bytes] = field(default_factory=list)
+    path: str = ""
+    variante: str = ""
+    # formato en que se descarga por defecto un dataset canónico (Parquet)
+    default_format: str = ""
+    # fuera del LRU de config/artifact_retention.py
+    pinned: bool = False
+
+    @property
+    def stored_size(self) -> int:
+        """Bytes comprimidos que ocupa en Redis."""
+        return sum(len(c) for c in self.chunks)
+
+    @property
+    def filename(self) -> str:
+        return f"job_{self.job_id}.{FORMATOS[self.formato][0]}"
+
+    @property
+    def media_type(self) -> str:
+        return FORMATOS[self.formato][1]
+
+
+class ArtifactStore:
+    def __init__(
+        self,
+        chunk_size: int,
+        level: int,
+        spill_threshold: int,
+        spill_dir: str,
+        write_batch: int,
+    ):
+        self.chunk_size = chunk_size
+        self.level = level
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.write_batch = write_batch
+
+    @staticmethod
+    def manifest_key(job_id: str, variante: str = "") -> str:
+        if variante:
+            return f"job:{job_id}:artifact:{variante}"
+        return f"job:{job_id}:artifact"
+
+    @classmethod
+    def chunk_key(cls, job_id: str, n: int, variante: str = "") -> str:
+        return f"{cls.manifest_key(job_id, variante)}:{n}"
+
+    def _spill_path(self, job_id: str, variante: str = "") -> str:
+        nombre = f"{job_id}.{variante}" if variante else job_id
+        return os.path.join(self.spill_dir, f"{nombre}.zst")
+
+    async def prepare(
+        self,
+        job_id: str,
+        formato: str,
+        data: bytes,
+        variante: str = "",
+        default_format: str = "",
+        pinned: bool = False,
+    ) -> Artifact:
+        """
+        Comprime `data` (en un hilo, para no bloquear el event loop) en chunks
+        o, si supera el umbral, la escribe comprimida en disco.
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de artefacto no soportado: {formato}")
+        extra = {
+            "variante": variante,
+            "default_format": default_format,
+            "pinned": pinned,
+        }
+        if self.spill_threshold and len(data) > self.spill_threshold:
+            path = await asyncio.to_thread(self._write_spill, job_id, data, variante)
+            return Artifact(job_id, formato, len(data), "disk", path=path, **extra)
+        chunks = await asyncio.to_thread(self._compress_chunks, data)
+        return Artifact(job_id, formato, len(data), "redis", chunks=chunks, **extra)
+
+    def prepare_sync(
+        self, job_id: str, formato: str, data: bytes, **campos
+    ) -> Artifact:
+        """
+        Versión síncrona de prepare, siempre en Redis: para procesos que no
+        comparten disco con la API (p.ej. los workers de Celery).
+        """
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de artefacto no soportado: {formato}")
+        chunks = self._compress_chunks(data)
+        return Artifact(job_id, formato, len(data), "redis", chunks=chunks, **campos)
+
+    def _compress_chunks(self, data: bytes) -> list[bytes]:
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        view = memoryview(data)
+        return [
+            compressor.compress(view[i : i + self.chunk_size])
+            for i in range(0, len(data), self.chunk_size)
+        ]
+
+    def _write_spill(self, job_id: str, data: bytes, variante: str = "") -> str:
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = self._spill_path(job_id, variante)
+        tmp = f"{path}.tmp"
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        with open(tmp, "wb") as f:
+            with compressor.stream_writer(f, closefd=False) as writer:
+                writer.write(data)
+        os.replace(tmp, path)
+        return path
+
+    def _lotes(self, artifact: Artifact):
+        """Chunks de `artifact` como (n, chunk), en lotes de write_batch."""
+        numerados = list(enumerate(artifact.chunks))
+        for i in range(0, len(numerados), self.write_batch):
+            yield numerados[i : i + self.write_batch]
+
+    async def write_chunks(
+        self, client: aioredis.Redis, artifact: Artifact, expire: int
+    ) -> None:
+        """
+        Escribe los chunks (con TTL) en pipelines sin MULTI de write_batch
+        chunks. Va antes de enqueue: sin manifiesto nadie los lee todavía.
+        """
+        job_id, variante = artifact.job_id, artifact.variante
+        for lote in self._lotes(artifact):
+            async with client.pipeline(transaction=False) as pipe:
+                for n, chunk in lote:
+                    pipe.set(self.chunk_key(job_id, n, variante), chunk, ex=expire)
+                await pipe.execute()
+
+    def write_chunks_sync(
+        self, client: redis.Redis, artifact: Artifact, expire: int
+    ) -> None:
+        """Versión síncrona de write_chunks (p.ej. Celery)."""
+        job_id, variante = artifact.job_id, artifact.variante
+        for lote in self._lotes(artifact):
+            with client.pipeline(transaction=False) as pipe:
+                for n, chunk in lote:
+                    pipe.set(self.chunk_key(job_id, n, variante), chunk, ex=expire)
+                pipe.execute()
+
+    def enqueue(
+        self, pipe: aioredis.client.Pipeline, artifact: Artifact, expire: int
+    ) -> None:
+        """
+        Encola el manifiesto (con TTL) en el pipeline del job. Los chunks ya
+        deben estar escritos con write_chunks / write_chunks_sync.
+        """
+        job_id, variante = artifact.job_id, artifact.variante
+        manifest = {
+            "format": artifact.formato,
+            "backend": artifact.backend,
+            "size": artifact.size,
+            "chunks": len(artifact.chunks),
+            "path": artifact.path,
+            "filename": artifact.filename,
+            "media_type": artifact.media_type,
+            "variant": variante,
+            "default_format": artifact.default_format,
+            "pinned": int(artifact.pinned),
+        }
+        pipe.hset(self.manifest_key(job_id, variante), mapping=manifest)
+        pipe.expire(self.manifest_key(job_id, variante), expire)
+
+    async def get_manifest(
+        self, client: aioredis.Redis, job_id: str, variante: str = ""
+    ) -> dict[str, Any] | None:
+        raw = await client.hgetall(self.manifest_key(job_id, variante))
+        if not raw:
+            return None
+        manifest = {
+            (k.decode() if isinstance(k, bytes) else k): (
+                v.decode() if isinstance(v, bytes) else v
+            )
+            for k, v in raw.items()
+        }
+        manifest["size"] = int(manifest["size"])
+        manifest["chunks"] = int(manifest["chunks"])
+        manifest.setdefault("variant", "")
+        manifest.setdefault("default_format", "")
+        manifest["pinned"] = manifest.get("pinned") == "1"
+        return manifest
+
+    async def iter_chunks(
+        self, client: aioredis.Redis, job_id: str, manifest: dict[str, Any]
+    ) -> AsyncIterator[bytes]:
+        """Devuelve el artefacto descomprimido, un chunk a la vez."""
+        if manifest["backend"] == "disk":
+            async for chunk in self._iter_spill(manifest["path"]):
+                yield chunk
+            return
+
+        decompressor = zstandard.ZstdDecompressor()
+        for n in range(manifest["chunks"]):
+            chunk = await client.get(self.chunk_key(job_id, n, manifest["variant"]))
+            if chunk is None:
+                raise RuntimeError(f"Chunk {n} del artefacto {job_id} expirado")
+            yield decompressor.decompress(chunk)
+
+    async def read(
+        self, client: aioredis.Redis, job_id: str, manifest: dict[str, Any]
+    ) -> bytes:
+        """Artefacto completo en memoria (p.ej. para renderizar otro formato)."""
+        return b"".join([c async for c in self.iter_chunks(client, job_id, manifest)])
+
+    def read_sync(
+        self, client: redis.Redis, job_id: str, variante: str = ""
+    ) -> bytes | None:
+        """
+        Versión síncrona de get_manifest + read para artefactos en Redis (los
+        de prepare_sync). `client` no debe decodificar las respuestas.
+        Devuelve None si el artefacto no existe.
+        """
+        chunks = client.hget(self.manifest_key(job_id, variante), "chunks")
+        if chunks is None:
+            return None
+        keys = [self.chunk_key(job_id, n, variante) for n in range(int(chunks))]
+        datos = client.mget(keys) if keys else []
+        if any(c is None for c in datos):
+            raise RuntimeError(f"Chunks del artefacto {job_id} expirados")
+        decompressor = zstandard.ZstdDecompressor()
+        return b"".join(decompressor.decompress(c) for c in datos)
+
+    async def _iter_spill(self, path: str) -> AsyncIterator[bytes]:
+        with open(path, "rb") as f:
+            reader = zstandard.ZstdDecompressor().stream_reader(f)
+            while chunk := await asyncio.to_thread(reader.read, self.chunk_size):
+                yield chunk
+
+    async def purge_spill(self, client: aioredis.Redis) -> int:
+        """
+        Borra los archivos volcados a disco cuyo manifiesto ya expiró en Redis.
+        Devuelve la cantidad de archivos eliminados.
+        """
+        if not os.path.isdir(self.spill_dir):
+            return 0
+        borrados = 0
+        ahora = time.time()
+        for nombre in os.listdir(self.spill_dir):
+            path = os.path.join(self.spill_dir, nombre)
+            try:
+                # margen para jobs cuyo manifiesto aún no se ha escrito
+                if ahora - os.path.getmtime(path) < 300:
+                    continue
+                # {job_id}[.{variante}].zst: las variantes caen con el artefacto base
+                job_id = nombre.split(".", 1)[0]
+                if nombre.endswith(".tmp") or not await client.exists(
+                    self.manifest_key(job_id)
+                ):
+                    os.remove(path)
+                    borrados += 1
+            except FileNotFoundError:
+                pass
+        if borrados:
+            logger.info(f"[artifact_store] {borrados} artefactos de disco eliminados")
+        return borrados
+
+
+artifact_store = ArtifactStore(
+    chunk_size=settings.ARTIFACT_CHUNK_SIZE,
+    level=settings.ARTIFACT_ZSTD_LEVEL,
+    spill_threshold=settings.ARTIFACT_SPILL_THRESHOLD,
+    spill_dir=settings.ARTIFACT_SPILL_DIR,
+    write_batch=settings.ARTIFACT_WRITE_BATCH,
+)
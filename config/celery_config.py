@@ -2,10 +2,26 @@
 🚀 Configuración de Celery para Adelanta Backend Toolbox
 """
 
+import os
+import time
+
+from config import metrics  # primero: fija PROMETHEUS_MULTIPROC_DIR
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import (
+    task_failure,
+    task_postrun,
+    task_prerun,
+    task_success,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+    worker_ready,
+)
 from config.settings import settings
 from config.logger import logger
+from config.redis import redis_manager_sync
+from config import worker_runtime
 
 # Configuración de Celery
 celery_app = Celery(
@@ -49,7 +65,10 @@ celery_app.conf.update(
         "toolbox.kpi_acumulado": {"queue": "cronjobs"},
         "toolbox.tablas_reportes": {"queue": "cronjobs"},
         "toolbox.tablas_cxc": {"queue": "cronjobs"},
+        "toolbox.tablas_cxc.*": {"queue": "cronjobs"},
         "toolbox.tipo_cambio": {"queue": "cronjobs"},  # 🆕 Nuevo task Tipo de Cambio
+        "toolbox.refresh_dag": {"queue": "cronjobs"},
+        "toolbox.refresh_intermedio": {"queue": "cronjobs"},
     },
     # Configuración de colas
     task_default_queue="default",
@@ -67,14 +86,16 @@ celery_app.conf.update(
     },
     # 🕐 CONFIGURACIÓN DE CELERY BEAT - CRÍTICA PARA FUNCIONAMIENTO
     beat_schedule={
-        # 📊 Actualización automática de Tablas Reportes - 3 veces al día
-        "actualizar-tablas-reportes-manana": {
-            "task": "toolbox.tablas_reportes",
+        # 🔗 Corrida de la mañana: Tablas Reportes, KPI Acumulado y Tablas CXC en
+        # un solo DAG con insumos compartidos (toolbox/refresh_dag_task.py)
+        "refresh-dag-manana": {
+            "task": "toolbox.refresh_dag",
             "schedule": crontab(
                 hour=7, minute=0
             ),  # Todos los días a las 7:00 AM (GMT-5 Lima)
             "options": {"queue": "cronjobs"},
         },
+        # 📊 Actualización automática de Tablas Reportes - mediodía y tarde
         "actualizar-tablas-reportes-mediodia": {
             "task": "toolbox.tablas_reportes",
             "schedule": crontab(
@@ -89,14 +110,7 @@ celery_app.conf.update(
             ),  # Todos los días a las 6:00 PM (GMT-5 Lima)
             "options": {"queue": "cronjobs"},
         },
-        # 📈 Actualización automática de KPI Acumulado - 2 veces al día
-        "actualizar-kpi-acumulado-manana": {
-            "task": "toolbox.kpi_acumulado",
-            "schedule": crontab(
-                hour=7, minute=30
-            ),  # Todos los días a las 7:30 AM (GMT-5 Lima)
-            "options": {"queue": "cronjobs"},
-        },
+        # 📈 Actualización automática de KPI Acumulado - mediodía
         "actualizar-kpi-acumulado-mediodia": {
             "task": "toolbox.kpi_acumulado",
             "schedule": crontab(
@@ -104,14 +118,7 @@ celery_app.conf.update(
             ),  # Todos los días a las 12:30 PM (GMT-5 Lima)
             "options": {"queue": "cronjobs"},
         },
-        # � Actualización automática de Tablas CXC - 2 veces al día
-        "actualizar-tablas-cxc-manana": {
-            "task": "toolbox.tablas_cxc",
-            "schedule": crontab(
-                hour=8, minute=0
-            ),  # Todos los días a las 8:00 AM (GMT-5 Lima)
-            "options": {"queue": "cronjobs"},
-        },
+        # � Actualización automática de Tablas CXC - tarde
         "actualizar-tablas-cxc-tarde": {
             "task": "toolbox.tablas_cxc",
             "schedule": crontab(
@@ -133,4 +140,77 @@ celery_app.conf.update(
     beat_scheduler="celery.beat:PersistentScheduler",  # Scheduler por defecto
 )
 
+
+# 📡 Publicar los cambios de estado de las tareas en jobs:status (pub/sub), así
+# los websockets se enteran sin consultar el backend de resultados
+def _publicar_estado_task(task, task_id: str, state: str) -> None:
+    try:
+        redis_manager_sync.publish_status(
+            f"celery:{task.name}", {"task_id": task_id, "state": state}
+        )
+    except Exception as e:
+        logger.warning(f"No se pudo publicar el estado de {task_id}: {e}")
+
+
+@task_prerun.connect
+def _on_task_prerun(sender=None, task_id=None, **kwargs):
+    _inicio_tasks[task_id] = time.perf_counter()
+    _publicar_estado_task(sender, task_id, "STARTED")
+
+
+@task_success.connect
+def _on_task_success(sender=None, **kwargs):
+    _publicar_estado_task(sender, sender.request.id, "SUCCESS")
+
+
+@task_failure.connect
+def _on_task_failure(sender=None, task_id=None, **kwargs):
+    _publicar_estado_task(sender, task_id, "FAILURE")
+
+
+# 📈 Métricas de Prometheus (config/metrics.py): duración y resultado por task
+_inicio_tasks: dict[str, float] = {}
+
+
+@task_postrun.connect
+def _on_task_postrun(sender=None, task_id=None, retval=None, state=None, **kwargs):
+    inicio = _inicio_tasks.pop(task_id, None)
+    if inicio is not None:
+        metrics.CELERY_TASK_DURATION.labels(sender.name).observe(
+            time.perf_counter() - inicio
+        )
+    outcome = (state or "unknown").lower()
+    # las tasks de toolbox capturan sus errores y devuelven status "failed"
+    # (o "partial" si falló solo parte de un chord, p.ej. tablas_cxc)
+    if isinstance(retval, dict) and retval.get("status") in ("failed", "partial"):
+        outcome = retval["status"]
+    metrics.CELERY_TASKS.labels(sender.name, outcome).inc()
+
+
+@worker_init.connect
+def _on_worker_init(**kwargs):
+    # proceso principal, antes de crear los hijos del pool prefork
+    metrics.reset_multiprocess_dir()
+    worker_runtime.preload_modules()
+
+
+@worker_ready.connect
+def _on_worker_ready(**kwargs):
+    if settings.CELERY_METRICS_PORT:
+        metrics.start_metrics_server(settings.CELERY_METRICS_PORT)
+
+
+@worker_process_shutdown.connect
+def _on_worker_process_shutdown(pid=None, **kwargs):
+    worker_runtime.shutdown_process()
+    metrics.mark_process_dead(pid or os.getpid())
+
+
+# 🔥 Cada hijo del pool (se reciclan cada worker_max_tasks_per_child) arranca
+# con engine, sesión HTTP y datos de referencia listos: config/worker_runtime.py
+@worker_process_init.connect
+def _on_worker_process_init(**kwargs):
+    worker_runtime.warm_process()
+
+
 logger.info("✅ Celery configurado correctamente")
@@ -1,6 +1,7 @@
 from dependency_injector import containers, providers
 from config.settings import settings
 from config.db_mysql import DatabaseSessionManager, get_db
+from config.db_pool import pool_profile
 from repositories.datamart.TipoCambioRepository import TipoCambioRepository
 from services.datamart.TipoCambioService import TipoCambioService
 from repositories.datamart.KPIRepository import KPIRepository
@@ -44,13 +45,7 @@ class Container(containers.DeclarativeContainer):
     db_session_manager = providers.ThreadSafeSingleton(
         DatabaseSessionManager,
         host=str(settings.DATABASE_MYSQL_URL),
-        engine_kwargs={
-            "echo": True,
-            "future": True,
-            "pool_size": 40,
-            "max_overflow": 20,
-            "pool_recycle": 3600,
-        },
+        engine_kwargs=pool_profile(),
     )
 
     db_session = providers.Resource(get_db)
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 from config.settings import settings
+from config.db_pool import InstrumentedAsyncQueuePool, pool_metrics, pool_profile
 from fastapi import Depends
 from typing import Annotated
 
@@ -17,10 +18,15 @@ class Base(DeclarativeBase):
 
 
 class DatabaseSessionManager:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
-        self._engine = create_async_engine(host, **engine_kwargs)
+    def __init__(
+        self, host: str, engine_kwargs: dict[str, Any] = {}, nombre: str = "datamart"
+    ):
+        self._engine = create_async_engine(
+            host, **{"poolclass": InstrumentedAsyncQueuePool, **engine_kwargs}
+        )
+        pool_metrics.register(nombre, self._engine.sync_engine)
         self._sessionmaker = async_sessionmaker(
-            autocommit=False, autoflush=False, bind=self._engine , class_=AsyncSession
+            autocommit=False, autoflush=False, bind=self._engine, class_=AsyncSession
         )
 
     async def close(self):
@@ -58,20 +64,8 @@ class DatabaseSessionManager:
             await session.close()
 
 
-
 sessionmanager = DatabaseSessionManager(
-    str(settings.DATABASE_MYSQL_URL),
-    {
-        "echo": False,  # Sin logging en producción para mejor performance
-        "future": True,
-        "pool_size": 8,
-        "max_overflow": 4,
-        "pool_recycle": 1800,
-        "connect_args": {
-            "connect_timeout": 10,
-            "charset": "utf8mb4",  # Charset moderno
-        },
-    },
+    str(settings.DATABASE_MYSQL_URL), pool_profile(), nombre="datamart"
 )
 
 
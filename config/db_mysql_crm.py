@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import DeclarativeBase
 from config.settings import settings
+from config.db_pool import InstrumentedAsyncQueuePool, pool_metrics, pool_profile
 from fastapi import Depends
 from typing import Annotated
 
@@ -17,11 +18,14 @@ class BaseCRM(DeclarativeBase):
 
 
 class DatabaseSessionManagerCRM:
-    def __init__(self, host: str, engine_kwargs: dict[str, Any] = {}):
+    def __init__(
+        self, host: str, engine_kwargs: dict[str, Any] = {}, nombre: str = "crm"
+    ):
         self._engine = create_async_engine(
             host,
-            **engine_kwargs,
+            **{"poolclass": InstrumentedAsyncQueuePool, **engine_kwargs},
         )
+        pool_metrics.register(nombre, self._engine.sync_engine)
         self._sessionmaker = async_sessionmaker(
             autocommit=False,
             bind=self._engine,
@@ -66,15 +70,7 @@ class DatabaseSessionManagerCRM:
 
 
 sessionmanager_CRM = DatabaseSessionManagerCRM(
-    str(settings.DATABASE_MYSQL_URL_CRM),
-    {
-        "echo": True,
-        "future": True,
-        "pool_size": 100,
-        "max_overflow": 20,
-        "pool_recycle": 200,
-        "connect_args": {"connect_timeout": 10},
-    },
+    str(settings.DATABASE_MYSQL_URL_CRM), pool_profile()
 )
 
 
@@ -0,0 +1,192 @@
+"""
+Perfil único de pool de conexiones por tipo de proceso (web / celery) y
+métricas de los pools de todos los engines del proceso.
+"""
+
+import bisect
+import threading
+import time
+import weakref
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from config import metrics
+from config.settings import settings
+
+# Límites superiores (ms) del histograma de espera al obtener una conexión
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def pool_profile(process_type: str | None = None, **overrides) -> dict[str, Any]:
+    """
+    engine_kwargs del perfil de pool de `process_type` (por defecto el del
+    proceso actual, settings.PROCESS_TYPE). Todos los engines se crean desde
+    aquí para dimensionar los pools desde settings y no en cada módulo.
+    """
+    tipo = (process_type or settings.PROCESS_TYPE).upper()
+    if tipo not in ("WEB", "CELERY"):
+        raise ValueError(f"PROCESS_TYPE inválido: {tipo}")
+    kwargs = {
+        "echo": settings.DB_ECHO,
+        "future": True,
+        "pool_size": getattr(settings, f"DB_POOL_SIZE_{tipo}"),
+        "max_overflow": getattr(settings, f"DB_MAX_OVERFLOW_{tipo}"),
+        "pool_recycle": getattr(settings, f"DB_POOL_RECYCLE_{tipo}"),
+        "pool_timeout": getattr(settings, f"DB_POOL_TIMEOUT_{tipo}"),
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": {"connect_timeout": 10, "charset": "utf8mb4"},
+    }
+    kwargs.update(overrides)
+    return kwargs
+
+
+class PoolStats:
+    """Contadores acumulados de todos los engines registrados con un mismo nombre."""
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+        self.checkouts = 0
+        self.connects = 0
+        self.recycles = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.wait_count = 0
+        self.wait_sum_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.pools: weakref.WeakSet = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def observe_wait(self, ms: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum_ms += ms
+            self.wait_max_ms = max(self.wait_max_ms, ms)
+            self.wait_buckets[bisect.bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+        metrics.DB_POOL_WAIT.labels(self.nombre).observe(ms / 1000)
+
+    def snapshot(self) -> dict:
+        pools = list(self.pools)
+        acumulado = 0
+        histograma = {}
+        for limite, n in zip([*WAIT_BUCKETS_MS, "+Inf"], self.wait_buckets):
+            acumulado += n
+            histograma[str(limite)] = acumulado
+        return {
+            "engine": self.nombre,
+            "engines_activos": len(pools),
+            "pool_size": sum(p.size() for p in pools),
+            "checked_out": sum(p.checkedout() for p in pools),
+            "checked_in": sum(p.checkedin() for p in pools),
+            "overflow": sum(max(p.overflow(), 0) for p in pools),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "recycles": self.recycles,
+            "invalidations": self.invalidations,
+            "timeouts": self.timeouts,
+            "wait_ms": {
+                "count": self.wait_count,
+                "sum": round(self.wait_sum_ms, 3),
+                "max": round(self.wait_max_ms, 3),
+                "buckets": histograma,
+            },
+        }
+
+
+class _InstrumentedPoolMixin:
+    """Mide el tiempo de obtención de cada conexión (espera en cola + connect)."""
+
+    _pool_stats: PoolStats | None = None
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self._pool_stats is not None:
+                self._pool_stats.timeouts += 1
+                metrics.DB_POOL_EVENTS.labels(self._pool_stats.nombre, "timeout").inc()
+            raise
+        finally:
+            if self._pool_stats is not None:
+                self._pool_stats.observe_wait((time.perf_counter() - inicio) * 1000)
+
+    def recreate(self):
+        # engine.dispose() sustituye el pool: conservar las métricas
+        nuevo = super().recreate()
+        nuevo._pool_stats = self._pool_stats
+        if self._pool_stats is not None:
+            self._pool_stats.pools.add(nuevo)
+        return nuevo
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class PoolMetricsRegistry:
+    def __init__(self):
+        self._stats: dict[str, PoolStats] = {}
+        self._lock = threading.Lock()
+
+    def _get_stats(self, nombre: str) -> PoolStats:
+        with self._lock:
+            if nombre not in self._stats:
+                self._stats[nombre] = PoolStats(nombre)
+            return self._stats[nombre]
+
+    def register(self, nombre: str, engine: Engine) -> None:
+        """
+        Instrumenta el pool de `engine` (sync, o `async_engine.sync_engine`).
+        Engines efímeros con el mismo nombre (p.ej. uno por task de Celery)
+        acumulan en las mismas métricas.
+        """
+        stats = self._get_stats(nombre)
+        en_uso = metrics.DB_POOL_CHECKED_OUT.labels(nombre)
+        pool = engine.pool
+        stats.pools.add(pool)
+        if isinstance(pool, _InstrumentedPoolMixin):
+            pool._pool_stats = stats
+
+        @event.listens_for(pool, "checkout")
+        def _checkout(dbapi_connection, connection_record, connection_proxy):
+            stats.checkouts += 1
+            metrics.DB_POOL_CHECKOUTS.labels(nombre).inc()
+            en_uso.inc()
+
+        @event.listens_for(pool, "checkin")
+        def _checkin(dbapi_connection, connection_record):
+            en_uso.dec()
+
+        @event.listens_for(pool, "connect")
+        def _connect(dbapi_connection, connection_record):
+            stats.connects += 1
+            evento = "connect"
+            # record_info sobrevive a las reconexiones del mismo slot del pool
+            if connection_record.record_info.get("conectado"):
+                stats.recycles += 1
+                evento = "recycle"
+            connection_record.record_info["conectado"] = True
+            metrics.DB_POOL_EVENTS.labels(nombre, evento).inc()
+
+        @event.listens_for(pool, "invalidate")
+        def _invalidate(dbapi_connection, connection_record, exception):
+            stats.invalidations += 1
+            metrics.DB_POOL_EVENTS.labels(nombre, "invalidate").inc()
+
+    def get(self, nombre: str) -> dict | None:
+        stats = self._stats.get(nombre)
+        return stats.snapshot() if stats else None
+
+    def snapshot(self) -> list[dict]:
+        return [s.snapshot() for s in self._stats.values()]
+
+
+pool_metrics = PoolMetricsRegistry()
@@ -0,0 +1,164 @@
+"""
+Exportaciones estándar pre-generadas al terminar cada recarga.
+
+Las tareas de recarga (tablas_reportes, kpi_acumulado, tablas_cxc) llaman a
+publish_exports() con el DataFrame que acaban de cargar. Cada exportación de
+EXPORTS_ESTANDAR se guarda como un job ya completado (metadata + artefacto,
+igual que uno de create_job), así /cronjob/download/{job_id} y el estado del
+job funcionan sin cambios. exports:{tabla}:{perfil}:{formato} apunta a la
+última, con la fecha de la recarga y la versión de datos de la tabla; al
+publicar una nueva se borra la anterior (manifiesto, chunks, variantes
+renderizadas al descargarla en otro formato y metadata).
+
+Los endpoints de exportación consultan find_export() antes de lanzar un job:
+si la petición coincide y la tabla no cambió desde la recarga, devuelven ese
+job al instante.
+"""
+
+import datetime
+import uuid
+
+import pandas as pd
+import pytz
+
+from config.artifact_render import dataset_to_parquet, render_parquet
+from config.artifact_store import FORMATOS, artifact_store
+from config.logger import logger
+from config.redis import (
+    JOBS_CHANNEL,
+    job_event,
+    redis_manager,
+    redis_manager_sync,
+)
+from config.settings import settings
+from utils.data_version import _version_key, get_data_version
+
+# (perfil, formato) que se generan por tabla; "informe" solo si la tabla
+# tiene ese perfil (utils/export_profiles.py)
+EXPORTS_ESTANDAR: tuple[tuple[str, str], ...] = (
+    ("completo", "csv"),
+    ("completo", "parquet"),
+    ("informe", "excel"),
+)
+
+
+def _export_key(tabla: str, perfil: str, formato: str) -> str:
+    return f"exports:{tabla}:{perfil}:{formato}"
+
+
+def _claves_anteriores(client, export_key: str) -> list[str]:
+    """
+    Claves en Redis de la exportación a la que apunta hoy `export_key`: su
+    artefacto y las variantes que se renderizaron de él (una por formato).
+    """
+    job_id = client.hget(export_key, "job_id")
+    if not job_id:
+        return []
+    variantes = ("", *FORMATOS)
+    with client.pipeline(transaction=False) as pipe:
+        for variante in variantes:
+            pipe.hget(artifact_store.manifest_key(job_id, variante), "chunks")
+        chunks = pipe.execute()
+    claves = [redis_manager._meta_key(job_id)]
+    for variante, n in zip(variantes, chunks):
+        if n is None:
+            continue
+        claves.append(artifact_store.manifest_key(job_id, variante))
+        claves.extend(
+            artifact_store.chunk_key(job_id, i, variante) for i in range(int(n))
+        )
+    return claves
+
+
+def publish_exports(
+    tabla: str,
+    datasets: dict[str, pd.DataFrame],
+    name: str,
+    description: str,
+) -> dict[str, str]:
+    """
+    Genera y guarda las exportaciones estándar de `tabla` (versión síncrona,
+    para Celery). `datasets` trae el DataFrame de cada perfil ("completo",
+    "informe"...); `name`/`description` son los del job equivalente de
+    create_job. Devuelve {perfil:formato: job_id}; un error no interrumpe la
+    recarga.
+    """
+    if not settings.EXPORT_PRERENDER:
+        return {}
+    client = redis_manager_sync.get_client_sync()
+    publicados = {}
+    try:
+        refreshed_at = datetime.datetime.now(pytz.timezone("America/Lima"))
+        version = client.get(_version_key(tabla)) or "0"
+        parquets = {perfil: dataset_to_parquet(df) for perfil, df in datasets.items()}
+
+        for perfil, formato in EXPORTS_ESTANDAR:
+            if perfil not in parquets:
+                continue
+            data = parquets[perfil]
+            if formato != "parquet":
+                data = render_parquet(data, formato)
+            job_id = str(uuid.uuid4())
+            # fuera del LRU de retención: la siguiente recarga borra esta
+            artifact = artifact_store.prepare_sync(job_id, formato, data, pinned=True)
+            meta_key = redis_manager._meta_key(job_id)
+            export_key = _export_key(tabla, perfil, formato)
+            anteriores = _claves_anteriores(client, export_key)
+            ttl = settings.EXPORT_PRERENDER_TTL
+            artifact_store.write_chunks_sync(client, artifact, ttl)
+            with client.pipeline(transaction=True) as pipe:
+                if anteriores:
+                    pipe.delete(*anteriores)
+                artifact_store.enqueue(pipe, artifact, ttl)
+                pipe.hset(
+                    meta_key,
+                    mapping={
+                        "status": "completed",
+                        "name": name,
+                        "description": f"{description} (pre-generado)",
+                        "created_at": refreshed_at.isoformat(),
+                        "created_by": "recarga",
+                        "error": "",
+                    },
+                )
+                pipe.expire(meta_key, ttl)
+                pipe.hset(
+                    export_key,
+                    mapping={
+                        "job_id": job_id,
+                        "refreshed_at": refreshed_at.isoformat(),
+                        "version": version,
+                    },
+                )
+                pipe.expire(export_key, ttl)
+                pipe.publish(JOBS_CHANNEL, job_event(job_id, "completed"))
+                pipe.execute()
+            publicados[f"{perfil}:{formato}"] = job_id
+
+        logger.info(f"[export_snapshots] {tabla}: {len(publicados)} exportaciones")
+    except Exception as e:
+        logger.warning(f"[export_snapshots] No se pre-generaron las de {tabla}: {e}")
+    return publicados
+
+
+async def find_export(
+    tabla: str, perfil: str, formato: str, verificar_version: bool = True
+) -> str | None:
+    """
+    job_id de la exportación pre-generada de la última recarga, o None si no
+    hay, expiró o (con verificar_version) la tabla cambió después.
+    """
+    client = redis_manager.get_client()
+    export = await client.hgetall(_export_key(tabla, perfil, formato))
+    if not export:
+        return None
+    export = {
+        redis_manager._decode(k): redis_manager._decode(v) for k, v in export.items()
+    }
+    if verificar_version:
+        actual = (await get_data_version([tabla])).partition("=")[2]
+        if actual != export["version"]:
+            return None
+    if not await client.exists(artifact_store.manifest_key(export["job_id"])):
+        return None
+    return export["job_id"]
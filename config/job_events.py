@@ -0,0 +1,80 @@
+"""
+Suscripción única por proceso a los canales pub/sub de estado de jobs.
+
+Un solo listener (una conexión Redis) recibe los eventos de jobs:events y
+jobs:status y los reparte a las colas de los websockets suscritos; sin
+clientes conectados el listener se detiene, así los dashboards inactivos no
+generan tráfico contra Redis.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import orjson
+
+from config.logger import logger
+from config.redis import JOBS_CHANNEL, STATUS_CHANNEL, redis_manager
+
+
+class JobEventHub:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {
+            JOBS_CHANNEL: set(),
+            STATUS_CHANNEL: set(),
+        }
+        self._task: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        """Cola que recibe (como dict) cada evento publicado en `channel`."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[channel].add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        try:
+            yield queue
+        finally:
+            self._subscribers[channel].discard(queue)
+
+    def _has_subscribers(self) -> bool:
+        return any(self._subscribers.values())
+
+    async def _listen(self):
+        while self._has_subscribers():
+            pubsub = redis_manager.get_client().pubsub()
+            try:
+                await pubsub.subscribe(*self._subscribers)
+                while self._has_subscribers():
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=1.0
+                    )
+                    if message is not None:
+                        self._dispatch(message)
+            except Exception as e:
+                logger.error(f"[job_events] Error en la suscripción pub/sub: {e}")
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.reset()
+                except Exception:
+                    pass
+
+    def _dispatch(self, message: dict):
+        channel = message["channel"]
+        if isinstance(channel, bytes):
+            channel = channel.decode("utf-8")
+        try:
+            event = orjson.loads(message["data"])
+        except orjson.JSONDecodeError:
+            return
+        for queue in list(self._subscribers.get(channel, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # cliente lento: basta con que procese los eventos ya encolados
+                pass
+
+
+job_event_hub = JobEventHub()
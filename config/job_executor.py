@@ -0,0 +1,140 @@
+"""
+Ejecución de los jobs de create_job fuera del event loop de la API.
+
+- Admisión: cada job se admite al crearse; si ya hay JOB_QUEUE_MAX_DEPTH jobs
+  admitidos (en curso + en cola) se rechaza con HTTP 429.
+- Concurrencia: como máximo JOB_MAX_CONCURRENCY jobs en ejecución, y por tipo
+  (nombre del job) JOB_TYPE_CONCURRENCY / JOB_TYPE_DEFAULT_CONCURRENCY; el
+  resto espera su turno con status pending.
+- CPU: las partes pesadas (pandas) se envían con run_cpu() a un pool acotado
+  de procesos (JOB_PROCESS_WORKERS), así no bloquean el event loop ni compiten
+  por el GIL con las peticiones.
+"""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable
+
+from fastapi import HTTPException
+
+from config.logger import logger
+from config.settings import settings
+
+# (job_id, nombre) del job en ejecución; lo fija _job_wrapper y run_cpu lo
+# propaga a los procesos del pool (lo usa config/job_progress.py)
+current_job: ContextVar[tuple[str, str] | None] = ContextVar(
+    "current_job", default=None
+)
+
+
+def _run_in_job(job: tuple[str, str] | None, func: Callable[..., Any], *args: Any):
+    current_job.set(job)
+    return func(*args)
+
+
+class JobExecutor:
+    def __init__(
+        self,
+        process_workers: int,
+        max_concurrency: int,
+        max_queue_depth: int,
+        type_concurrency: dict[str, int],
+        default_type_concurrency: int,
+    ):
+        self.process_workers = process_workers
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.type_concurrency = type_concurrency
+        self.default_type_concurrency = default_type_concurrency
+        self.admitidos: dict[str, int] = {}
+        self._global: asyncio.Semaphore | None = None
+        self._por_tipo: dict[str, asyncio.Semaphore] = {}
+        self._pool: ProcessPoolExecutor | None = None
+
+    @property
+    def total_admitidos(self) -> int:
+        return sum(self.admitidos.values())
+
+    def admit(self, job_type: str) -> None:
+        """Reserva un lugar para un job o lanza HTTPException 429 si la cola está llena."""
+        if self.total_admitidos >= self.max_queue_depth:
+            logger.warning(f"[job_executor] Cola llena, se rechaza '{job_type}'")
+            raise HTTPException(
+                status_code=429,
+                detail="Hay demasiados procesos en cola, intente nuevamente en unos minutos",
+            )
+        self.admitidos[job_type] = self.admitidos.get(job_type, 0) + 1
+
+    def release(self, job_type: str) -> None:
+        restantes = self.admitidos.get(job_type, 0) - 1
+        if restantes > 0:
+            self.admitidos[job_type] = restantes
+        else:
+            self.admitidos.pop(job_type, None)
+
+    @asynccontextmanager
+    async def slot(self, job_type: str):
+        """Espera turno (global y por tipo) y libera la admisión al terminar."""
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        if job_type not in self._por_tipo:
+            self._por_tipo[job_type] = asyncio.Semaphore(
+                self.type_concurrency.get(job_type, self.default_type_concurrency)
+            )
+        try:
+            async with self._por_tipo[job_type], self._global:
+                yield
+        finally:
+            self.release(job_type)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: los workers no heredan el event loop ni las conexiones abiertas
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.process_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=settings.JOB_PROCESS_MAX_TASKS,
+            )
+        return self._pool
+
+    async def run_cpu(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Ejecuta `func(*args)` en el pool de procesos. `func` y sus argumentos
+        deben ser picklables (funciones de módulo, DataFrames, bytes...).
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_pool(), _run_in_job, current_job.get(), func, *args
+            )
+        except BrokenProcessPool:
+            # un worker murió (p.ej. OOM): recrear el pool para los siguientes jobs
+            logger.error("[job_executor] Pool de procesos roto, se recrea")
+            self._pool = None
+            raise
+
+    def snapshot(self) -> dict:
+        return {
+            "admitidos": dict(self.admitidos),
+            "max_queue_depth": self.max_queue_depth,
+            "max_concurrency": self.max_concurrency,
+            "process_workers": self.process_workers,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+job_executor = JobExecutor(
+    process_workers=settings.JOB_PROCESS_WORKERS,
+    max_concurrency=settings.JOB_MAX_CONCURRENCY,
+    max_queue_depth=settings.JOB_QUEUE_MAX_DEPTH,
+    type_concurrency=settings.JOB_TYPE_CONCURRENCY,
+    default_type_concurrency=settings.JOB_TYPE_DEFAULT_CONCURRENCY,
+)
@@ -0,0 +1,226 @@
+"""
+Progreso por etapas de los jobs largos (create_job y tareas de Celery).
+
+    progreso = job_progress()
+    with progreso.stage("Calculando"):
+        for i, lote in enumerate(lotes):
+            ...
+            progreso.update(percent=100 * (i + 1) / len(lotes), rows=filas)
+
+Cada cambio se guarda en el hash del job (stage, percent, rows y
+stage:<nombre> con los segundos de cada etapa terminada) y se publica en
+jobs:events. Al terminar, los tiempos por etapa se archivan en
+jobs:timings:{nombre} para comparar ejecuciones. Fuera de un job,
+job_progress() devuelve un objeto que no hace nada.
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from config.job_executor import current_job
+from config.logger import logger
+from config import metrics
+from config.redis import JOBS_CHANNEL, redis_manager, redis_manager_sync
+from config.settings import settings
+
+# Copia los tiempos stage:* del hash del job al historial de su nombre.
+# KEYS[1] = job:{id}:meta, KEYS[2] = jobs:timings:{nombre}
+# ARGV = job_id, status, terminado (iso), total (s), largo máximo del historial
+_ARCHIVE_LUA = """
+local campos = redis.call('HGETALL', KEYS[1])
+local etapas = {}
+local hay = false
+for i = 1, #campos, 2 do
+    if string.sub(campos[i], 1, 6) == 'stage:' then
+        etapas[string.sub(campos[i], 7)] = tonumber(campos[i + 1])
+        hay = true
+    end
+end
+if not hay then
+    return 0
+end
+redis.call('LPUSH', KEYS[2], cjson.encode({
+    job_id = ARGV[1], status = ARGV[2], finished_at = ARGV[3],
+    total = tonumber(ARGV[4]), stages = etapas
+}))
+redis.call('LTRIM', KEYS[2], 0, tonumber(ARGV[5]) - 1)
+return 1
+"""
+
+
+def _timings_key(name: str) -> str:
+    return f"jobs:timings:{name}"
+
+
+class JobProgress:
+    def __init__(
+        self, job_id: str, name: str, ttl: int | None = None, min_interval: float = 0.5
+    ):
+        """
+        ttl: expiración del hash de progreso, para tareas sin metadata de
+        create_job (p.ej. Celery). min_interval: segundos mínimos entre
+        escrituras de update().
+        """
+        self.job_id = job_id
+        self.name = name
+        self.ttl = ttl
+        self.min_interval = min_interval
+        self._inicio = time.perf_counter()
+        self._ultima_escritura = 0.0
+        self._pendientes: set[asyncio.Task] = set()
+
+    @contextmanager
+    def stage(self, nombre: str):
+        """Marca el inicio de una etapa y guarda su duración al salir."""
+        inicio = time.perf_counter()
+        self._write({"stage": nombre, "percent": 0, "rows": 0})
+        try:
+            yield self
+        finally:
+            elapsed = round(time.perf_counter() - inicio, 3)
+            self._write({"stage": nombre, "percent": 100, f"stage:{nombre}": elapsed})
+            metrics.JOB_STAGE_DURATION.labels(self.name, nombre).observe(elapsed)
+
+    def update(self, percent: float | None = None, rows: int | None = None) -> None:
+        """Avance dentro de la etapa actual (se escribe como máximo cada min_interval)."""
+        if time.monotonic() - self._ultima_escritura < self.min_interval:
+            return
+        campos = {}
+        if percent is not None:
+            campos["percent"] = round(percent, 1)
+        if rows is not None:
+            campos["rows"] = rows
+        if campos:
+            self._write(campos)
+
+    def _archive_args(self, status: str) -> tuple:
+        terminado = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        total = round(time.perf_counter() - self._inicio, 3)
+        return (
+            _ARCHIVE_LUA,
+            2,
+            redis_manager._meta_key(self.job_id),
+            _timings_key(self.name),
+            self.job_id,
+            status,
+            terminado,
+            total,
+            settings.JOB_TIMINGS_HISTORY,
+        )
+
+    def finish(self, status: str) -> None:
+        """Archiva los tiempos por etapa (versión síncrona, p.ej. Celery)."""
+        try:
+            redis_manager_sync.get_client_sync().eval(*self._archive_args(status))
+        except Exception as e:
+            logger.warning(
+                f"[job_progress] No se archivaron tiempos de {self.job_id}: {e}"
+            )
+
+    async def afinish(self, status: str) -> None:
+        """Archiva los tiempos por etapa tras las escrituras pendientes."""
+        if self._pendientes:
+            await asyncio.gather(*self._pendientes, return_exceptions=True)
+        try:
+            await redis_manager.get_client().eval(*self._archive_args(status))
+        except Exception as e:
+            logger.warning(
+                f"[job_progress] No se archivaron tiempos de {self.job_id}: {e}"
+            )
+
+    def _write(self, campos: dict[str, Any]) -> None:
+        self._ultima_escritura = time.monotonic()
+        meta_key = redis_manager._meta_key(self.job_id)
+        evento = orjson.dumps({"job_id": self.job_id, "progress": campos})
+
+        def encolar(pipe):
+            pipe.hset(meta_key, mapping=campos)
+            if self.ttl:
+                pipe.expire(meta_key, self.ttl)
+            pipe.publish(JOBS_CHANNEL, evento)
+
+        loop = None
+        if settings.PROCESS_TYPE != "celery":
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass  # hilo o proceso del pool: cliente síncrono
+
+        if loop is not None:
+            tarea = loop.create_task(self._write_async(encolar))
+            self._pendientes.add(tarea)
+            tarea.add_done_callback(self._pendientes.discard)
+            return
+        try:
+            with redis_manager_sync.get_client_sync().pipeline() as pipe:
+                encolar(pipe)
+                pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"[job_progress] No se guardó el progreso de {self.job_id}: {e}"
+            )
+
+    async def _write_async(self, encolar: Callable) -> None:
+        try:
+            async with redis_manager.get_client().pipeline() as pipe:
+                encolar(pipe)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"[job_progress] No se guardó el progreso de {self.job_id}: {e}"
+            )
+
+
+class _SinProgreso:
+    """Sustituto de JobProgress cuando el código corre fuera de un job."""
+
+    @contextmanager
+    def stage(self, nombre: str):
+        yield self
+
+    def update(self, percent: float | None = None, rows: int | None = None) -> None:
+        pass
+
+    def finish(self, status: str) -> None:
+        pass
+
+    async def afinish(self, status: str) -> None:
+        pass
+
+
+_progress: ContextVar[JobProgress | None] = ContextVar("job_progress", default=None)
+
+
+def job_progress() -> JobProgress | _SinProgreso:
+    """Progreso del job en curso (según current_job) o uno que no hace nada."""
+    job = current_job.get()
+    if job is None:
+        return _SinProgreso()
+    progreso = _progress.get()
+    if progreso is None or progreso.job_id != job[0]:
+        progreso = JobProgress(*job)
+        _progress.set(progreso)
+    return progreso
+
+
+async def track_job(fetch: Callable[[], Awaitable[Any]]) -> Any:
+    """Ejecuta el cuerpo de un job y archiva sus tiempos por etapa al terminar."""
+    progreso = job_progress()
+    try:
+        resultado = await fetch()
+    except BaseException:
+        await progreso.afinish("failed")
+        raise
+    await progreso.afinish("completed")
+    return resultado
+
+
+async def get_job_timings(name: str, limit: int = 20) -> list[dict]:
+    """Últimas ejecuciones de `name` con sus tiempos por etapa (más recientes primero)."""
+    entradas = await redis_manager.get_client().lrange(_timings_key(name), 0, limit - 1)
+    return [orjson.loads(e) for e in entradas]
@@ -0,0 +1,46 @@
+"""
+Barrido periódico de los jobs del proceso API (ver RedisClientManager.sweep_jobs).
+
+Cada JOB_SWEEP_INTERVAL segundos borra los artefactos volcados a disco ya
+expirados, aplica el presupuesto de artefactos en Redis y marca failed los
+jobs huérfanos. Así _job_wrapper termina cada job con un único MULTI/EXEC.
+Corre en el proceso de la API porque los volcados a disco viven en su /tmp.
+"""
+
+import asyncio
+
+from config.logger import logger
+from config.redis import redis_manager
+from config.settings import settings
+
+
+class JobSweeper:
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                resultado = await redis_manager.sweep_jobs()
+                if any(resultado.values()):
+                    logger.info(f"[job_sweeper] 🧹 {resultado}")
+            except Exception as e:
+                logger.error(f"[job_sweeper] Error en el barrido de jobs: {e}")
+
+
+job_sweeper = JobSweeper(settings.JOB_SWEEP_INTERVAL)
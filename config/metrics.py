@@ -0,0 +1,249 @@
+"""
+Métricas de Prometheus de la API, los workers de Celery y los cálculos.
+
+Se usa el modo multiproceso de prometheus_client: cada proceso (workers de
+gunicorn/uvicorn, hijos prefork de Celery) escribe sus valores en archivos
+mmap de PROMETHEUS_MULTIPROC_DIR y el proceso que atiende el scrape los suma.
+Por eso la variable de entorno se fija aquí, antes de importar
+prometheus_client, y este módulo debe importarse antes que cualquier otro que
+lo use.
+
+El directorio debe vaciarse una sola vez al arrancar, desde el proceso padre
+y antes de crear los workers (lifespan de la API, que corre en un solo
+proceso de uvicorn; worker_init en Celery): los archivos de un arranque
+anterior se sumarían a los nuevos.
+
+API y Celery corren en contenedores distintos, cada uno con su directorio:
+la API expone /metrics y el worker de Celery su propio servidor HTTP en
+CELERY_METRICS_PORT (celery-worker:9808 dentro de la red de docker-compose).
+"""
+
+import functools
+import inspect
+import os
+import shutil
+import time
+from typing import Any, Callable
+
+from config.settings import settings
+
+if settings.PROMETHEUS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.PROMETHEUS_MULTIPROC_DIR)
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import (  # noqa: E402
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily  # noqa: E402
+
+from config.logger import logger  # noqa: E402
+from config.redis import redis_manager, redis_manager_sync  # noqa: E402
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Tareas y cálculos van de milisegundos a decenas de minutos
+LONG_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+
+# === API ===
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta",
+    ["method", "route", "status"],
+)
+
+# === CELERY ===
+CELERY_TASK_DURATION = Histogram(
+    "celery_task_duration_seconds",
+    "Duración de las tareas de Celery",
+    ["task"],
+    buckets=LONG_BUCKETS,
+)
+CELERY_TASKS = Counter(
+    "celery_tasks_total",
+    "Tareas de Celery terminadas por resultado",
+    ["task", "outcome"],
+)
+
+# === CÁLCULOS Y CARGAS ===
+CALCULATOR_STAGE_DURATION = Histogram(
+    "calculator_stage_duration_seconds",
+    "Duración de cada etapa de los calculadores (métodos con Base.timeit)",
+    ["calculator", "stage"],
+    buckets=LONG_BUCKETS,
+)
+CALCULATOR_ROWS = Counter(
+    "calculator_rows_total",
+    "Filas devueltas por las etapas de los calculadores",
+    ["calculator", "stage"],
+)
+JOB_STAGE_DURATION = Histogram(
+    "job_stage_duration_seconds",
+    "Duración de las etapas de JobProgress por job o tarea",
+    ["job", "stage"],
+    buckets=LONG_BUCKETS,
+)
+TABLE_ROWS_LOADED = Counter(
+    "table_rows_loaded_total",
+    "Filas cargadas por reload_via_staging",
+    ["table"],
+)
+
+# === WEBSERVICES ===
+WEBSERVICE_DURATION = Histogram(
+    "webservice_request_duration_seconds",
+    "Latencia de cada llamada a webservices externos por obtenedor",
+    ["obtainer", "operation", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+
+# === POOLS DE CONEXIÓN (ver config/db_pool.py) ===
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Conexiones en uso por engine",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Conexiones entregadas por el pool", ["engine"]
+)
+DB_POOL_EVENTS = Counter(
+    "db_pool_events_total",
+    "Conexiones nuevas, recicladas, invalidadas y timeouts por engine",
+    ["engine", "event"],
+)
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Espera para obtener una conexión del pool",
+    ["engine"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def observe_rows(calculator: str, stage: str, result: Any) -> None:
+    """Suma las filas de `result` si es un DataFrame o una lista de registros."""
+    try:
+        filas = len(result) if hasattr(result, "__len__") else None
+    except TypeError:
+        filas = None
+    if filas is not None and not isinstance(result, (str, bytes, dict)):
+        CALCULATOR_ROWS.labels(calculator, stage).inc(filas)
+
+
+def track_webservice(func: Callable) -> Callable:
+    """
+    Decorador de los métodos de los obtenedores: mide cada llamada (cada
+    reintento cuenta aparte) con la clase del obtenedor y el método.
+    """
+
+    def observar(self, inicio: float, outcome: str) -> None:
+        WEBSERVICE_DURATION.labels(type(self).__name__, func.__name__, outcome).observe(
+            time.perf_counter() - inicio
+        )
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(self, *args, **kwargs):
+            inicio = time.perf_counter()
+            outcome = "error"
+            try:
+                result = await func(self, *args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                observar(self, inicio, outcome)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func(self, *args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            observar(self, inicio, outcome)
+
+    return wrapper
+
+
+class JobsCollector:
+    """
+    Jobs de create_job registrados en Redis por nombre y estado. Se calcula
+    en cada scrape desde jobs:index (un solo proceso, fuera del modo
+    multiproceso).
+    """
+
+    def collect(self):
+        familia = GaugeMetricFamily(
+            "jobs",
+            "Jobs registrados en Redis por nombre y estado",
+            labels=["name", "status"],
+        )
+        try:
+            client = redis_manager_sync.get_client_sync()
+            job_ids = client.zrange(redis_manager.JOBS_INDEX, 0, -1)
+            with client.pipeline(transaction=False) as pipe:
+                for job_id in job_ids:
+                    pipe.hmget(redis_manager._meta_key(job_id), "name", "status")
+                metas = pipe.execute()
+        except Exception as e:
+            logger.warning(f"[metrics] No se leyeron los jobs de Redis: {e}")
+            return
+        conteo: dict[tuple[str, str], int] = {}
+        for name, status in metas:
+            if status is None:
+                continue  # expiró y aún no se desindexa
+            clave = (name or "", status)
+            conteo[clave] = conteo.get(clave, 0) + 1
+        for (name, status), n in conteo.items():
+            familia.add_metric([name, status], n)
+        yield familia
+
+
+def scrape_registry() -> CollectorRegistry:
+    """Registro que suma las métricas de todos los procesos del directorio."""
+    if not MULTIPROCESS:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+_jobs_registry = CollectorRegistry()
+_jobs_registry.register(JobsCollector())
+
+
+def render_metrics() -> bytes:
+    """Cuerpo de /metrics de la API (formato de texto de Prometheus)."""
+    return generate_latest(scrape_registry()) + generate_latest(_jobs_registry)
+
+
+def reset_multiprocess_dir() -> None:
+    """Vacía PROMETHEUS_MULTIPROC_DIR (solo desde el proceso padre, al arrancar)."""
+    if not MULTIPROCESS:
+        return
+    directorio = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(directorio, ignore_errors=True)
+    os.makedirs(directorio, exist_ok=True)
+
+
+def mark_process_dead(pid: int) -> None:
+    """Descarta los gauges livesum de un proceso hijo que terminó."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(pid)
+
+
+def start_metrics_server(port: int) -> None:
+    """Servidor HTTP de /metrics para procesos sin API (worker de Celery)."""
+    start_http_server(port, registry=scrape_registry())
+    logger.info(f"📈 Métricas de Prometheus en el puerto {port}")
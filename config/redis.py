@@ -10,6 +10,14 @@ import uuid
 import pytz
 import datetime
 import orjson
+from config.artifact_store import Artifact, artifact_store
+from config.artifact_retention import artifact_retention
+from config.artifact_render import (
+    CANONICAL_FORMAT,
+    dataset_to_parquet,
+    is_dataset,
+)
+from config.job_executor import current_job, job_executor
 from config.logger import logger
 from config.settings import settings
 import traceback
@@ -17,6 +25,70 @@ from pydantic import BaseModel, Field
 from typing import Optional, Dict
 
 
+# Cambio de status condicionado (compare-and-set) sobre el hash del job.
+# KEYS[1] = job:{id}:meta, ARGV[1] = status esperado, ARGV[2..] = campo, valor...
+_TRANSITION_LUA = """
+if redis.call('HGET', KEYS[1], 'status') == ARGV[1] then
+    redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+    return 1
+end
+return 0
+"""
+
+
+# Canales pub/sub de cambios de estado (ver config/job_events.py):
+#   jobs:events -> {"job_id", "status"} de los jobs de create_job
+#   jobs:status -> {"key", "value"} de los status de cronjobs / tareas Celery
+JOBS_CHANNEL = "jobs:events"
+STATUS_CHANNEL = "jobs:status"
+
+
+def job_event(job_id: str, status: str) -> bytes:
+    return orjson.dumps({"job_id": job_id, "status": status})
+
+
+def status_event(key: str, value: Any) -> bytes:
+    return orjson.dumps({"key": key, "value": value})
+
+
+def progress_from_meta(meta: dict[str, str]) -> dict[str, Any] | None:
+    """
+    Progreso guardado en el hash del job por config/job_progress.py: etapa
+    actual, porcentaje, filas y segundos de cada etapa terminada (stage:<nombre>).
+    """
+    if not meta.get("stage"):
+        return None
+    return {
+        "stage": meta["stage"],
+        "percent": float(meta["percent"]) if meta.get("percent") else None,
+        "rows": int(meta["rows"]) if meta.get("rows") else None,
+        "stages": {
+            k.removeprefix("stage:"): float(v)
+            for k, v in meta.items()
+            if k.startswith("stage:")
+        },
+    }
+
+
+def apply_progress(
+    progress: dict[str, Any] | None, campos: dict[str, Any]
+) -> dict[str, Any] | None:
+    """
+    Progreso resultante de escribir `campos` (un evento de job_progress) en el
+    hash del job cuyo progreso actual es `progress`.
+    """
+    meta = {}
+    if progress:
+        meta = {
+            "stage": progress["stage"],
+            "percent": progress["percent"],
+            "rows": progress["rows"],
+            **{f"stage:{k}": v for k, v in progress["stages"].items()},
+        }
+    meta.update(campos)
+    return progress_from_meta({k: "" if v is None else str(v) for k, v in meta.items()})
+
+
 class Job(BaseModel):
     job_id: str
     name: str
@@ -27,6 +99,7 @@ class Job(BaseModel):
     download_link: Optional[str] = None
     params: Dict[str, Any] = Field(default_factory=dict)
     expires_in: Optional[int] = None  # TTL en segundos
+    progress: Optional[Dict[str, Any]] = None  # ver progress_from_meta
 
     # Campos de paginación
     total: int = 0
@@ -58,19 +131,20 @@ class RedisClientManager:
         client = self.get_client()
 
         try:
-            # Actualizar estado principal
-            await client.set(f"job:{job_id}:status", status)
-
-            # Si hay detalles adicionales, guardarlos
-            if details:
-                for key, value in details.items():
-                    if value is not None:
-                        if isinstance(value, (dict, list)):
-                            # Serializar objetos complejos
-                            await client.set(f"job:{job_id}:{key}", orjson.dumps(value))
-                        else:
-                            # Valores simples (string, int, bool)
-                            await client.set(f"job:{job_id}:{key}", str(value))
+            campos = {"status": status}
+            for key, value in (details or {}).items():
+                if value is None:
+                    continue
+                if isinstance(value, (dict, list)):
+                    # Serializar objetos complejos
+                    campos[key] = orjson.dumps(value)
+                else:
+                    # Valores simples (string, int, bool)
+                    campos[key] = str(value)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(self._meta_key(job_id), mapping=campos)
+                pipe.publish(JOBS_CHANNEL, job_event(job_id, status))
+                await pipe.execute()
 
             logger.debug(f"Updated job {job_id} status to {status}")
 
@@ -78,55 +152,59 @@ class RedisClientManager:
             logger.error(f"Error updating job status for {job_id}: {e}")
             raise
 
-    async def get_job_logs(self, job_id: str, limit: int = 50) -> list:
-        """
-        Obtiene los logs de un job desde Redis.
+    # —————————————————————————————————————————————————————————————
+    # Logs de jobs: un Redis Stream acotado por job (job:{id}:logs)
+    # —————————————————————————————————————————————————————————————
 
-        Args:
-            job_id: ID del job
-            limit: Número máximo de logs a obtener
+    @staticmethod
+    def _log_key(job_id: str) -> str:
+        return f"job:{job_id}:logs"
+
+    def _log_entry(self, entry_id: Any, fields: dict) -> dict:
+        log_entry = {self._decode(k): self._decode(v) for k, v in fields.items()}
+        log_entry["id"] = self._decode(entry_id)
+        return log_entry
 
-        Returns:
-            Lista de logs del job
+    async def get_job_logs(self, job_id: str, limit: int = 50) -> list:
+        """
+        Obtiene los últimos `limit` logs de un job (orden cronológico) con un
+        único XREVRANGE. Cada log incluye su "id" de stream para seguir leyendo
+        desde ahí con tail_job_logs.
         """
         client = self.get_client()
 
         try:
-            # Buscar logs por patrón
-            log_keys = await client.keys(f"job:{job_id}:log:*")
-
-            if not log_keys:
-                return []
-
-            # Ordenar por timestamp (los keys deberían tener timestamp)
-            log_keys.sort()
-
-            # Limitar cantidad
-            if len(log_keys) > limit:
-                log_keys = log_keys[-limit:]
-
-            # Obtener contenido de los logs
-            logs = []
-            for key in log_keys:
-                log_data = await client.get(key)
-                if log_data:
-                    try:
-                        # Intentar parsear como JSON
-                        log_entry = orjson.loads(log_data)
-                        logs.append(log_entry)
-                    except:
-                        # Si no es JSON, tratarlo como string
-                        logs.append({"message": log_data, "timestamp": ""})
-
-            return logs
+            entries = await client.xrevrange(self._log_key(job_id), count=limit)
+            return [self._log_entry(eid, fields) for eid, fields in reversed(entries)]
 
         except Exception as e:
             logger.error(f"Error getting logs for job {job_id}: {e}")
             return []
 
+    async def tail_job_logs(
+        self, cursors: dict[str, str], block_ms: int = 1000
+    ) -> dict[str, list[dict]]:
+        """
+        Espera (XREAD BLOCK) logs nuevos de varios jobs a la vez.
+        `cursors` mapea job_id -> último id leído ("0-0" para leer desde el inicio).
+        Devuelve solo los jobs con logs nuevos.
+        """
+        if not cursors:
+            return {}
+        respuesta = await self.get_client().xread(
+            {self._log_key(job_id): cursor for job_id, cursor in cursors.items()},
+            block=block_ms,
+        )
+        nuevos = {}
+        for stream, entries in respuesta or []:
+            job_id = self._decode(stream).split(":")[1]
+            nuevos[job_id] = [self._log_entry(eid, fields) for eid, fields in entries]
+        return nuevos
+
     async def add_job_log(self, job_id: str, message: str, level: str = "INFO"):
         """
-        Añade un log a un job específico.
+        Añade un log a un job específico (XADD con recorte aproximado a
+        JOB_LOG_MAXLEN entradas; el stream expira 1 hora después del último log).
 
         Args:
             job_id: ID del job
@@ -136,21 +214,21 @@ class RedisClientManager:
         client = self.get_client()
 
         try:
-            import time
-
-            timestamp = int(time.time() * 1000)  # timestamp en milisegundos
-
             log_entry = {
                 "message": message,
                 "level": level,
                 "timestamp": datetime.datetime.now().isoformat(),
                 "job_id": job_id,
             }
-
-            log_key = f"job:{job_id}:log:{timestamp}"
-            await client.set(
-                log_key, orjson.dumps(log_entry), ex=3600
-            )  # Expire en 1 hora
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.xadd(
+                    self._log_key(job_id),
+                    log_entry,
+                    maxlen=settings.JOB_LOG_MAXLEN,
+                    approximate=True,
+                )
+                pipe.expire(self._log_key(job_id), 3600)  # Expire en 1 hora
+                await pipe.execute()
 
         except Exception as e:
             logger.error(f"Error adding log for job {job_id}: {e}")
@@ -183,77 +261,133 @@ class RedisClientManager:
             raise Exception("Redis sync client is not initialized")
         return self.sync_client
 
+    # —————————————————————————————————————————————————————————————
+    # Registro de jobs: un hash por job + índices ordenados por created_at
+    #   job:{id}:meta           HASH  status, name, description, created_at, ...
+    #   jobs:index              ZSET  job_id -> created_at (epoch)
+    #   jobs:by_name:{name}     ZSET  idem, solo los jobs con ese nombre
+    #   jobs:names              HASH  name -> description (nombres conocidos)
+    # —————————————————————————————————————————————————————————————
+
+    JOBS_INDEX = "jobs:index"
+    JOBS_NAMES = "jobs:names"
+
+    @staticmethod
+    def _meta_key(job_id: str) -> str:
+        return f"job:{job_id}:meta"
+
+    @staticmethod
+    def _name_index_key(name: str) -> str:
+        return f"jobs:by_name:{name}"
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def get_job_meta(self, job_id: str) -> dict[str, str]:
+        """Devuelve el hash de metadata del job (vacío si no existe o expiró)."""
+        meta = await self.get_client().hgetall(self._meta_key(job_id))
+        return {self._decode(k): self._decode(v) for k, v in meta.items()}
+
+    async def _index_source(self, client: aioredis.Redis, search: str) -> str | None:
+        """
+        ZSET sobre el que paginar: el índice global, el de un nombre, o la
+        unión temporal de los nombres cuyo name/description contiene `search`.
+        """
+        if not search:
+            return self.JOBS_INDEX
+        termino = search.lower()
+        nombres = await client.hgetall(self.JOBS_NAMES)
+        coincidencias = [
+            self._decode(nombre)
+            for nombre, descripcion in nombres.items()
+            if termino in self._decode(nombre).lower()
+            or termino in self._decode(descripcion).lower()
+        ]
+        if not coincidencias:
+            return None
+        if len(coincidencias) == 1:
+            return self._name_index_key(coincidencias[0])
+        destino = f"jobs:search:{uuid.uuid5(uuid.NAMESPACE_OID, termino)}"
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zunionstore(destino, [self._name_index_key(n) for n in coincidencias])
+            pipe.expire(destino, 5)
+            await pipe.execute()
+        return destino
+
     async def get_all_jobs(
         self, search: str = "", page: int = 1, page_size: int = 10
     ) -> list[Job]:
+        """
+        Lista paginada de jobs, más recientes primero. Cuesta un ZREVRANGE y un
+        pipeline de HGETALL + TTL por job de la página, sin KEYS ni GET sueltos.
+        """
         client = self.get_client()
-        keys = await client.keys("job:*:status")
-        jobs = []
-
-        for key in keys:
-            job_id = key.decode("utf-8").split(":")[1]
-
-            # Obtener datos del Redis
-            status = await client.get(f"job:{job_id}:status")
-            name = await client.get(f"job:{job_id}:name") or b""
-            description = await client.get(f"job:{job_id}:description") or b""
-            created_at = await client.get(f"job:{job_id}:created_at") or b""
-            created_by = await client.get(f"job:{job_id}:created_by") or b""
-
-            # Link de descarga solo si está completado
-            download_link = (
-                f"/cronjob/download/{job_id}" if status == b"completed" else None
-            )
-
-            # Obtener parámetros
-            params_bytes = await client.get(f"job:{job_id}:params")
-            params = {}
-            if params_bytes:
-                try:
-                    params = orjson.loads(params_bytes)
-                except Exception:
-                    params = {}
-
-            # Crear objeto Job tipado
-            job_data = {
-                "job_id": job_id,
-                "name": name.decode("utf-8"),
-                "description": description.decode("utf-8"),
-                "status": status.decode("utf-8"),
-                "created_at": created_at.decode("utf-8"),
-                "created_by": (
-                    created_by.decode("utf-8")
-                    if isinstance(created_by, bytes)
-                    else created_by
-                ),
-                "download_link": download_link,
-                "params": params,
-            }
+        origen = await self._index_source(client, search)
+        if origen is None:
+            return []
 
-            job = Job(**job_data)
+        start = (page - 1) * page_size
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zcard(origen)
+            pipe.zrevrange(origen, start, start + page_size - 1)
+            total_jobs, job_ids = await pipe.execute()
+        job_ids = [self._decode(j) for j in job_ids]
+        if not job_ids:
+            return []
 
-            # Filtrar por búsqueda
-            if (
-                search.lower() in job.name.lower()
-                or search.lower() in job.description.lower()
-            ):
-                jobs.append(job)
+        async with client.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.hgetall(self._meta_key(job_id))
+                pipe.ttl(self._meta_key(job_id))
+            resultados = await pipe.execute()
 
-        # Paginación
-        total_jobs = len(jobs)
         total_pages = math.ceil(total_jobs / page_size)
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_jobs = jobs[start:end]
+        jobs, expirados = [], []
+        for job_id, meta, ttl in zip(job_ids, resultados[::2], resultados[1::2]):
+            meta = {self._decode(k): self._decode(v) for k, v in meta.items()}
+            if not meta:
+                # El hash expiró: limpiar el índice de forma perezosa
+                expirados.append(job_id)
+                continue
+            status = meta.get("status", "")
+            try:
+                params = orjson.loads(meta["params"]) if meta.get("params") else {}
+            except Exception:
+                params = {}
+            jobs.append(
+                Job(
+                    job_id=job_id,
+                    name=meta.get("name", ""),
+                    description=meta.get("description", ""),
+                    status=status,
+                    created_at=meta.get("created_at", ""),
+                    created_by=meta.get("created_by", ""),
+                    # Link de descarga solo si está completado
+                    download_link=(
+                        f"/cronjob/download/{job_id}" if status == "completed" else None
+                    ),
+                    params=params,
+                    expires_in=ttl if ttl > 0 else None,
+                    progress=progress_from_meta(meta),
+                    total=total_jobs,
+                    page=page,
+                    page_size=page_size,
+                    total_pages=total_pages,
+                )
+            )
 
-        # Añadir información de paginación a cada trabajo
-        for job in paginated_jobs:
-            job.total = total_jobs
-            job.page = page
-            job.page_size = page_size
-            job.total_pages = total_pages
+        if expirados:
+            await self._unindex_jobs(client, expirados)
+        return jobs
 
-        return paginated_jobs
+    async def _unindex_jobs(self, client: aioredis.Redis, job_ids: list[str]):
+        nombres = [self._decode(n) for n in await client.hkeys(self.JOBS_NAMES)]
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.zrem(self.JOBS_INDEX, *job_ids)
+            for nombre in nombres:
+                pipe.zrem(self._name_index_key(nombre), *job_ids)
+            await pipe.execute()
 
     async def create_job(
         self,
@@ -265,23 +399,46 @@ class RedisClientManager:
         save_as: str | None = None,
         params: Any = None,
         created_by: str | None = None,
+        cache_key: str | None = None,
     ) -> str:
         """
         Paso 1: Generar job_id y guardar metadata básica en Redis.
         Paso 2: Definir job_wrapper() que ejecuta fetch_func() y guarda resultados.
         Paso 3: Lanzar job_wrapper() como tarea de fondo y retornar job_id.
+
+        Con `cache_key`, si ya hay un job completado o en curso para esa clave
+        se devuelve su job_id en lugar de lanzar uno nuevo.
         """
         client = self.get_client()
         job_id = str(uuid.uuid4())
 
-        # 1) metadata inicial
-        await self._set_initial_metadata(
-            client, job_id, name, description, created_by, params, expire
-        )
+        if cache_key:
+            if existente := await self._cached_job(client, cache_key):
+                return existente
+
+        # admisión: HTTP 429 si ya hay demasiados jobs en curso o en cola
+        job_executor.admit(name)
+        try:
+            if cache_key:
+                # reclamar la clave; si otra petición la tomó primero, unirse a su job
+                if not await client.set(cache_key, job_id, ex=expire, nx=True):
+                    if existente := await self._cached_job(client, cache_key):
+                        job_executor.release(name)
+                        return existente
+                    await client.set(cache_key, job_id, ex=expire)
+                logger.debug(f"[create_job] {cache_key} -> nuevo job {job_id}")
+
+            # 1) metadata inicial
+            await self._set_initial_metadata(
+                client, job_id, name, description, created_by, params
+            )
+        except Exception:
+            job_executor.release(name)
+            raise
 
         # 2) definir y lanzar el wrapper
         asyncio.create_task(
-            self._job_wrapper(job_id, fetch_func, is_buffer, save_as, expire)
+            self._job_wrapper(job_id, name, fetch_func, is_buffer, save_as, expire)
         )
         return job_id
 
@@ -289,6 +446,25 @@ class RedisClientManager:
     # Métodos auxiliares públicos/privados para componer create_job
     # —————————————————————————————————————————————————————————————
 
+    async def _cached_job(self, client: aioredis.Redis, cache_key: str) -> str | None:
+        """
+        job_id memoizado bajo `cache_key` si sigue en curso o completado (y su
+        resultado no expiró); si falló o expiró, libera la clave.
+        """
+        job_id = self._decode(await client.get(cache_key))
+        if not job_id:
+            return None
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.hget(self._meta_key(job_id), "status")
+            pipe.exists(artifact_store.manifest_key(job_id), f"job:{job_id}")
+            status, resultados = await pipe.execute()
+        status = self._decode(status)
+        if status == "pending" or (status == "completed" and resultados):
+            logger.debug(f"[create_job] {cache_key} reutiliza job {job_id}")
+            return job_id
+        await client.delete(cache_key)
+        return None
+
     async def _set_initial_metadata(
         self,
         client: redis.Redis,
@@ -297,137 +473,221 @@ class RedisClientManager:
         description: str,
         created_by: str | None,
         params: Any,
-        expire: int,
     ):
-        """Guarda status, name, description, timestamps y created_by en Redis."""
-        await client.set(f"job:{job_id}:status", "pending", ex=expire)
-        await client.set(f"job:{job_id}:name", name, ex=expire)
-        await client.set(f"job:{job_id}:description", description, ex=expire)
-
+        """Crea el hash de metadata del job y lo registra en los índices."""
         now_utc = datetime.datetime.now(pytz.utc)
         lima_now = now_utc.astimezone(pytz.timezone("America/Lima"))
-        await client.set(f"job:{job_id}:created_at", lima_now.isoformat(), ex=expire)
-        await client.set(f"job:{job_id}:created_by", created_by or "", ex=expire)
-
+        meta = {
+            "status": "pending",
+            "name": name,
+            "description": description,
+            "created_at": lima_now.isoformat(),
+            "created_by": created_by or "",
+        }
         if params is not None:
-            await client.set(f"job:{job_id}:params", orjson.dumps(params), ex=expire)
+            meta["params"] = orjson.dumps(params)
+
+        score = now_utc.timestamp()
+        # Podar entradas antiguas de los índices (sus hashes ya expiraron)
+        limite = score - settings.JOB_INDEX_RETENTION
+
+        # Un único round trip (MULTI/EXEC): metadata e índices. El hash no
+        # tiene TTL mientras el job corre (Redis con volatile-lru no lo
+        # expulsa); lo recibe al terminar
+        async with client.pipeline(transaction=True) as pipe:
+            pipe.hset(self._meta_key(job_id), mapping=meta)
+            pipe.zadd(self.JOBS_INDEX, {job_id: score})
+            pipe.zadd(self._name_index_key(name), {job_id: score})
+            pipe.hset(self.JOBS_NAMES, name, description)
+            pipe.zremrangebyscore(self.JOBS_INDEX, "-inf", limite)
+            pipe.zremrangebyscore(self._name_index_key(name), "-inf", limite)
+            pipe.publish(JOBS_CHANNEL, job_event(job_id, "pending"))
+            await pipe.execute()
 
     async def _job_wrapper(
         self,
         job_id: str,
+        name: str,
         fetch_func: Callable[[], Any],
         is_buffer: bool,
         save_as: str | None,
         expire: int,
     ):
         """
-        Ejecuta la función fetch_func(), guarda el buffer u/orjson en Redis,
-        actualiza status y refresca TTL de las claves relevantes.
+        Ejecuta la función fetch_func(), comprime el artefacto fuera del event
+        loop y, en un único MULTI/EXEC, guarda el resultado (artefacto u orjson),
+        actualiza el status y refresca el TTL. La retención de artefactos y los
+        jobs huérfanos quedan para el barrido periódico (sweep_jobs).
         """
         client = self.get_client()
+        meta_key = self._meta_key(job_id)
+        # los tipos pineados (ver config/artifact_retention.py) duran más
+        expire = artifact_retention.expire_for(name, expire)
+        current_job.set((job_id, name))
         logger.debug(f"[job_wrapper] Iniciando job {job_id}")
+        terminado = False
         try:
-            data = await fetch_func()
-            # Guarda el resultado (buffer o serializado)
-            await self._save_result(client, job_id, data, is_buffer, save_as, expire)
+            # espera su turno según los límites de concurrencia global / por tipo
+            async with job_executor.slot(name):
+                data = await fetch_func()
+                artifact = await self._prepare_artifact(
+                    job_id, data, is_buffer, save_as
+                )
+                if artifact is not None:
+                    artifact.pinned = artifact_retention.is_pinned(name)
+            if artifact is not None:
+                # chunks en lotes, fuera del MULTI; el manifiesto va en él
+                await artifact_store.write_chunks(client, artifact, expire)
 
         except Exception:
             err = traceback.format_exc()
             logger.exception(f"[job_wrapper] Falló job {job_id}")
-            await client.set(f"job:{job_id}:error", err, ex=expire)
-            await client.set(f"job:{job_id}:status", "failed", ex=expire)
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(meta_key, mapping={"error": err, "status": "failed"})
+                pipe.expire(meta_key, expire)
+                pipe.publish(JOBS_CHANNEL, job_event(job_id, "failed"))
+                await pipe.execute()
+            terminado = True
 
         else:
-            # éxito: limpiar error previo y marcar completed
-            await client.set(f"job:{job_id}:error", "", ex=expire)
-            await client.set(f"job:{job_id}:status", "completed", ex=expire)
+            # éxito: resultado + limpiar error previo + completed + TTL
+            async with client.pipeline(transaction=True) as pipe:
+                self._save_result(pipe, job_id, data, artifact, expire)
+                pipe.hset(meta_key, mapping={"error": "", "status": "completed"})
+                pipe.expire(meta_key, expire)
+                pipe.publish(JOBS_CHANNEL, job_event(job_id, "completed"))
+                await pipe.execute()
+            terminado = True
             logger.debug(f"[job_wrapper] Job {job_id} completado")
 
-            # refrescar TTL de todas las claves del job
-            keys = self._gather_refresh_keys(job_id, is_buffer, save_as)
-            await self._refresh_keys(client, keys, expire)
-
         finally:
-            # si por algún motivo sigue pending, lo marcamos failed
-            status = await client.get(f"job:{job_id}:status")
-            if status == "pending":
-                await client.set(f"job:{job_id}:status", "failed", ex=expire)
+            # ninguno de los dos pipelines llegó a ejecutarse (p.ej. cancelación):
+            # si sigue pending, lo marcamos failed
+            if not terminado and await self._transition_status(
+                client, job_id, "pending", "failed"
+            ):
+                await client.expire(meta_key, expire)
 
-    async def _save_result(
+    async def sweep_jobs(self) -> dict[str, int]:
+        """
+        Mantenimiento periódico (config/job_sweeper.py): borra los volcados a
+        disco expirados, aplica el presupuesto de artefactos y marca failed los
+        jobs huérfanos. Fuera de _job_wrapper, que así termina con un único EXEC.
+        """
+        client = self.get_client()
+        return {
+            "spill_eliminados": await artifact_store.purge_spill(client),
+            "expulsados": await artifact_retention.enforce(client),
+            "huerfanos": await self._expire_orphan_jobs(client),
+        }
+
+    async def _expire_orphan_jobs(self, client: aioredis.Redis) -> int:
+        """
+        Jobs que siguen pending más de JOB_MAX_RUNTIME (el proceso que los
+        ejecutaba se cayó): se marcan failed y reciben TTL. Devuelve cuántos.
+        """
+        limite = datetime.datetime.now(pytz.utc).timestamp() - settings.JOB_MAX_RUNTIME
+        job_ids = [
+            self._decode(j)
+            for j in await client.zrangebyscore(self.JOBS_INDEX, "-inf", limite)
+        ]
+        if not job_ids:
+            return 0
+        async with client.pipeline(transaction=False) as pipe:
+            for job_id in job_ids:
+                pipe.ttl(self._meta_key(job_id))
+            ttls = await pipe.execute()
+        huerfanos = 0
+        for job_id, ttl in zip(job_ids, ttls):
+            # -1: hash sin TTL, es decir, nunca terminó
+            if ttl == -1 and await self._transition_status(
+                client, job_id, "pending", "failed", error="Job huérfano"
+            ):
+                await client.expire(self._meta_key(job_id), 60 * 10)
+                huerfanos += 1
+        return huerfanos
+
+    async def _transition_status(
         self,
-        client: redis.Redis,
+        client: aioredis.Redis,
         job_id: str,
-        data: Any,
-        is_buffer: bool,
-        save_as: str | None,
-        expire: int,
-    ):
+        esperado: str,
+        nuevo: str,
+        **campos: str,
+    ) -> bool:
+        """
+        Cambia el status de `esperado` a `nuevo` (y escribe `campos`) de forma
+        atómica con un script Lua. Devuelve False si el status ya era otro.
+        """
+        args = [esperado, "status", nuevo]
+        for campo, valor in campos.items():
+            args += [campo, valor]
+        cambiado = bool(
+            await client.eval(_TRANSITION_LUA, 1, self._meta_key(job_id), *args)
+        )
+        if cambiado:
+            await client.publish(JOBS_CHANNEL, job_event(job_id, nuevo))
+        return cambiado
+
+    async def _prepare_artifact(
+        self, job_id: str, data: Any, is_buffer: bool, save_as: str | None
+    ) -> Artifact | None:
         """
-        Guarda en Redis:
-          - si is_buffer y data es BytesIO, lo guarda bajo buffer_csv/_excel/_zip…
-          - si orjson, lo guarda como buffer_orjson
-          - si no buffer, serializa con orjson y guarda en job:{job_id}
+        Si el resultado es un archivo (buffer csv/excel/zip u orjson) lo
+        comprime en chunks (o lo vuelca a disco) vía artifact_store. Un
+        DataFrame se guarda como dataset canónico en Parquet y save_as queda
+        como formato de descarga por defecto (ver config/artifact_render.py).
         """
+        if is_buffer and is_dataset(data):
+            parquet = await asyncio.to_thread(dataset_to_parquet, data)
+            return await artifact_store.prepare(
+                job_id,
+                CANONICAL_FORMAT,
+                parquet,
+                default_format=save_as or CANONICAL_FORMAT,
+            )
         if is_buffer and isinstance(data, BytesIO):
             file_bytes = data.getvalue()
-            key = self._determine_buffer_key(job_id, save_as, file_bytes)
-            await client.set(key, file_bytes, ex=expire)
-        elif is_buffer and save_as == "orjson":
+            formato = self._determine_format(save_as, file_bytes)
+            return await artifact_store.prepare(job_id, formato, file_bytes)
+        if is_buffer and save_as == "orjson":
             # data ya es bytes JSON
-            await client.set(f"job:{job_id}:buffer_orjson", data, ex=expire)
-        else:
-            payload = orjson.dumps(data)
-            await client.set(f"job:{job_id}", payload, ex=expire)
+            return await artifact_store.prepare(job_id, "orjson", data)
+        return None
 
-    def _determine_buffer_key(
-        self, job_id: str, save_as: str | None, file_bytes: bytes
-    ) -> str:
+    def _save_result(
+        self,
+        pipe: aioredis.client.Pipeline,
+        job_id: str,
+        data: Any,
+        artifact: Artifact | None,
+        expire: int,
+    ):
         """
-        Elige la clave Redis para el buffer:
-         - si save_as es 'csv'|'excel'|'zip' usa ese
-         - si no, intenta decodificar a utf8 para csv, si falla, excel
+        Encola en el pipeline:
+          - si hay artefacto, su manifiesto (los chunks ya están escritos)
+          - si no, serializa con orjson y guarda en job:{job_id}
         """
-        if save_as in ("zip", "excel", "csv"):
-            suffix = "zip" if save_as == "zip" else save_as
+        if artifact is not None:
+            artifact_store.enqueue(pipe, artifact, expire)
+            artifact_retention.track(pipe, artifact)
         else:
-            try:
-                file_bytes.decode("utf-8")
-                suffix = "csv"
-            except Exception:
-                suffix = "excel"
-        pref = "buffer" if suffix != "zip" else ""
-        return f"job:{job_id}:{pref + '_' if pref else ''}{suffix}"
+            pipe.set(f"job:{job_id}", orjson.dumps(data), ex=expire)
 
-    def _gather_refresh_keys(
-        self, job_id: str, is_buffer: bool, save_as: str | None
-    ) -> list[str]:
+    @staticmethod
+    def _determine_format(save_as: str | None, file_bytes: bytes) -> str:
         """
-        Lista de claves cuya TTL debe refrescarse cuando el job completa con éxito.
+        Formato del buffer:
+         - si save_as es 'csv'|'excel'|'zip'|'parquet'|'arrow' usa ese
+         - si no, intenta decodificar a utf8 para csv, si falla, excel
         """
-        base = [
-            f"job:{job_id}:status",
-            f"job:{job_id}:name",
-            f"job:{job_id}:description",
-            f"job:{job_id}:created_at",
-            f"job:{job_id}:created_by",
-            f"job:{job_id}:params",
-        ]
-        if is_buffer:
-            buf_key = (
-                "buffer_orjson"
-                if save_as == "orjson"
-                else ("zip" if save_as == "zip" else f"buffer_{save_as or 'csv'}")
-            )
-            base.append(f"job:{job_id}:{buf_key}")
-        return base
-
-    async def _refresh_keys(self, client: redis.Redis, keys: list[str], ttl: int):
-        """Vuelve a fijar expire=ttl en cada clave de la lista."""
-        for key in keys:
-            try:
-                await client.expire(key, ttl)
-            except Exception as e:
-                logger.exception(f"Error refrescando TTL para {key}: {e}")
+        if save_as in ("zip", "excel", "csv", "parquet", "arrow"):
+            return save_as
+        try:
+            file_bytes.decode("utf-8")
+            return "csv"
+        except Exception:
+            return "excel"
 
 
 class RedisClientManagerSync:
@@ -436,6 +696,7 @@ class RedisClientManagerSync:
     def __init__(self, url: str):
         self.url = url
         self.sync_client = redis.Redis.from_url(url, decode_responses=True)
+        self.binary_client = redis.Redis.from_url(url)
 
     def get_client_sync(self) -> redis.Redis:
         """Obtiene el cliente síncrono para operaciones Redis"""
@@ -443,6 +704,22 @@ class RedisClientManagerSync:
             raise Exception("Redis sync client is not initialized")
         return self.sync_client
 
+    def get_binary_client_sync(self) -> redis.Redis:
+        """Cliente síncrono sin decode_responses, para datos binarios (artefactos)"""
+        if not self.binary_client:
+            raise Exception("Redis binary sync client is not initialized")
+        return self.binary_client
+
+    def set_status(self, key: str, value: str) -> None:
+        """Guarda el status (JSON) de un cronjob y lo publica en jobs:status."""
+        with self.get_client_sync().pipeline(transaction=True) as pipe:
+            pipe.set(key, value)
+            pipe.publish(STATUS_CHANNEL, status_event(key, orjson.loads(value)))
+            pipe.execute()
+
+    def publish_status(self, key: str, value: Any) -> None:
+        self.get_client_sync().publish(STATUS_CHANNEL, status_event(key, value))
+
 
 redis_manager = RedisClientManager(settings.REDIS_URL)
 
@@ -0,0 +1,182 @@
+"""
+Single-flight de las tareas de recarga (tablas_reportes, kpi_acumulado,
+tablas_cxc): una sola ejecución por tabla a la vez, venga del beat, del DAG o
+de /background/toolbox/*.
+
+lock:refresh:{nombre} guarda el task id de la ejecución en curso con TTL
+REFRESH_LOCK_TTL. Mientras la task trabaja, un hilo lo renueva cada
+REFRESH_LOCK_HEARTBEAT segundos; si el worker muere, el lock caduca solo.
+
+- Los processors lo reservan antes de encolar (reserve_refresh): si ya hay
+  una ejecución, devuelven su id en vez de encolar otra.
+- La task lo confirma al empezar (@single_flight): cubre el beat y el DAG,
+  que encolan sin pasar por los processors. Si lo tiene otra, no hace nada y
+  devuelve el id de la que corre.
+
+Renovar y liberar solo actúan si el lock sigue siendo del mismo task id.
+Las subtareas de un chord lo vuelven a tomar al empezar (hold): si esperaron
+en cola más que el TTL y otra ejecución lo tomó, abortan.
+"""
+
+import functools
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from celery.exceptions import Ignore
+
+from config.logger import logger
+from config.redis import redis_manager_sync
+from config.settings import settings
+
+# Toma el lock si está libre o ya es de ARGV[1]; devuelve el dueño resultante.
+# KEYS[1] = lock, ARGV = task_id, ttl (s)
+_ACQUIRE_LUA = """
+local dueno = redis.call('GET', KEYS[1])
+if not dueno or dueno == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return ARGV[1]
+end
+return dueno
+"""
+
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _key(nombre: str) -> str:
+    return f"lock:refresh:{nombre}"
+
+
+class RefreshLockLost(Exception):
+    """El lock de la recarga es de otra ejecución."""
+
+    def __init__(self, nombre: str, dueno: str):
+        super().__init__(f"El lock de {nombre} es de otra ejecución ({dueno})")
+        self.nombre = nombre
+        self.dueno = dueno
+
+
+class RefreshLock:
+    """Lock de la recarga `nombre` a nombre de `task_id`."""
+
+    def __init__(self, nombre: str, task_id: str):
+        self.nombre = nombre
+        self.task_id = task_id
+        self.key = _key(nombre)
+
+    def _eval(self, script: str) -> Any:
+        return redis_manager_sync.get_client_sync().eval(
+            script, 1, self.key, self.task_id, settings.REFRESH_LOCK_TTL
+        )
+
+    def acquire(self) -> str:
+        """Toma el lock; devuelve el task id dueño (el propio si se obtuvo)."""
+        return self._eval(_ACQUIRE_LUA)
+
+    def renew(self) -> bool:
+        return bool(self._eval(_RENEW_LUA))
+
+    def release(self) -> None:
+        try:
+            self._eval(_RELEASE_LUA)
+        except Exception as e:
+            logger.warning(f"[lock] No se liberó {self.key}: {e}")
+
+    @contextmanager
+    def heartbeat(self):
+        """Renueva el TTL en segundo plano mientras dura el bloque."""
+        detener = threading.Event()
+
+        def latir():
+            while not detener.wait(settings.REFRESH_LOCK_HEARTBEAT):
+                try:
+                    if not self.renew():
+                        logger.warning(f"[lock] {self.key} ya no es de {self.task_id}")
+                        return
+                except Exception as e:
+                    logger.warning(f"[lock] No se renovó {self.key}: {e}")
+
+        hilo = threading.Thread(target=latir, name=f"lock-{self.nombre}", daemon=True)
+        hilo.start()
+        try:
+            yield self
+        finally:
+            detener.set()
+            hilo.join()
+
+    @contextmanager
+    def hold(self):
+        """
+        Vuelve a tomar el lock (p.ej. una subtarea que esperó en cola y pudo
+        verlo caducar) y lo renueva mientras dura el bloque. Lanza
+        RefreshLockLost si ya es de otra ejecución.
+        """
+        dueno = self.acquire()
+        if dueno != self.task_id:
+            raise RefreshLockLost(self.nombre, dueno)
+        with self.heartbeat():
+            yield self
+
+
+def reserve_refresh(nombre: str) -> tuple[str, bool]:
+    """
+    Reserva la recarga `nombre` para un task id nuevo, antes de encolarla.
+    Devuelve (task_id, True) si se reservó o (id en curso, False).
+    """
+    task_id = str(uuid.uuid4())
+    dueno = RefreshLock(nombre, task_id).acquire()
+    return dueno, dueno == task_id
+
+
+def single_flight(nombre: str, release: bool = True) -> Callable:
+    """
+    Decorador de tasks de Celery con bind=True: corre el cuerpo con el lock
+    de `nombre` tomado y latiendo. release=False lo deja tomado si la task
+    termina o se reemplaza (lanzadoras de un chord: lo libera la subtarea
+    final); si falla, se libera igual.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs) -> Dict[str, Any]:
+            task_id = self.request.id
+            if task_id is None:  # llamada directa, fuera de Celery
+                return func(self, *args, **kwargs)
+            lock = RefreshLock(nombre, task_id)
+            dueno = lock.acquire()
+            if dueno != task_id:
+                logger.info(f"⏭️ {self.name} ya está en ejecución ({dueno}); se omite")
+                return {
+                    "status": "skipped",
+                    "message": f"Ya hay una ejecución de {nombre} en curso",
+                    "running_task_id": dueno,
+                }
+            terminado = False
+            try:
+                with lock.heartbeat():
+                    resultado = func(self, *args, **kwargs)
+                terminado = True
+                return resultado
+            except Ignore:
+                terminado = True  # replace(): la ejecución sigue en el canvas
+                raise
+            finally:
+                if release or not terminado:
+                    lock.release()
+
+        return wrapper
+
+    return decorator
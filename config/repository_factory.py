@@ -4,10 +4,15 @@ from contextlib import suppress
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
 from config.db_mysql import DatabaseSessionManager
+from config.db_pool import InstrumentedQueuePool, pool_metrics, pool_profile
 from config.settings import settings
+from config.worker_runtime import worker_session_manager
 from repositories.datamart.TipoCambioRepository import TipoCambioRepository
 from repositories.datamart.KPIAcumuladoRepository import KPIAcumuladoRepository
 from repositories.datamart.KPIRepository import KPIRepository
+from repositories.datamart.KPIRollupMensualRepository import (
+    KPIRollupMensualRepository,
+)
 from repositories.datamart.SaldosRepository import SaldosRepository
 from repositories.datamart.NuevosClientesNuevosPagadoresRepository import (
     NuevosClientesNuevosPagadoresRepository,
@@ -25,6 +30,23 @@ from config.logger import logger
 _active_factories = weakref.WeakSet()
 
 
+def celery_session_manager() -> DatabaseSessionManager:
+    """DatabaseSessionManager con el perfil de pool "celery"."""
+    # 🛡️ CONFIGURACIÓN OPTIMIZADA PARA CELERY + ASYNC (perfil "celery")
+    return DatabaseSessionManager(
+        host=str(settings.DATABASE_MYSQL_URL),
+        engine_kwargs=pool_profile(
+            "celery",
+            # Overflow para las conexiones paralelas de reload_via_staging
+            max_overflow=max(
+                settings.DB_MAX_OVERFLOW_CELERY, settings.BULK_INSERT_CONCURRENCY
+            ),
+            pool_reset_on_return="commit",  # Reset estado al devolver conexión
+        ),
+        nombre="datamart_celery",
+    )
+
+
 class RepositoryFactory:
     """
     Factory para crear repositories con sesiones aisladas
@@ -36,23 +58,11 @@ class RepositoryFactory:
         # Registrar para cleanup automático
         _active_factories.add(self)
 
-        # 🛡️ CONFIGURACIÓN OPTIMIZADA PARA CELERY + ASYNC
-        # Parámetros ajustados para evitar conexiones huérfanas
-        self.session_manager = DatabaseSessionManager(
-            host=str(settings.DATABASE_MYSQL_URL),
-            engine_kwargs={
-                "echo": False,  # Sin logging detallado en tasks
-                "future": True,
-                "pool_size": 3,
-                "max_overflow": 1,
-                "pool_recycle": 15,
-                "pool_reset_on_return": "commit",  # Reset estado al devolver conexión
-                "connect_args": {
-                    "connect_timeout": 8,  # REDUCIDO: Timeout más agresivo
-                    "charset": "utf8mb4",
-                },
-            },
-        )
+        # En un worker de Celery se reutiliza el engine del proceso (ya
+        # conectado, ver config/worker_runtime.py); si no, uno propio
+        compartido = worker_session_manager()
+        self.session_manager = compartido or celery_session_manager()
+        self._session_manager_propio = compartido is None
         self._session = None
         self._closed = False
         logger.info("🏭 RepositoryFactory creado con configuración Celery-optimizada")
@@ -97,6 +107,13 @@ class RepositoryFactory:
         db_session = await self.get_db_session()
         return KPIRepository(db=db_session)
 
+    async def create_kpi_rollup_mensual_repository(
+        self,
+    ) -> KPIRollupMensualRepository:
+        """Crear repository del rollup mensual de KPI"""
+        db_session = await self.get_db_session()
+        return KPIRollupMensualRepository(db=db_session)
+
     async def create_saldos_repository(self) -> SaldosRepository:
         """Crear repository de Saldos"""
         db_session = await self.get_db_session()
@@ -145,6 +162,7 @@ class RepositoryFactory:
         try:
             # 1. 🔒 Marcar como cerrado inmediatamente para evitar uso concurrente
             self._closed = True
+            logger.info(f"📊 Pool: {pool_metrics.get('datamart_celery')}")
 
             # 2. 🗂️ Cerrar sesión activa de forma segura
             if self._session is not None:
@@ -180,8 +198,12 @@ class RepositoryFactory:
                 finally:
                     self._session = None
 
-            # 3. 🏭 Cerrar session manager de forma segura
-            if hasattr(self, "session_manager") and self.session_manager:
+            # 3. 🏭 Cerrar session manager de forma segura (el del proceso sigue abierto)
+            if (
+                hasattr(self, "session_manager")
+                and self.session_manager
+                and self._session_manager_propio
+            ):
                 try:
                     # Verificar si hay un event loop activo
                     try:
@@ -254,20 +276,13 @@ class RepositoryFactorySync:
             "mysql+aiomysql://", "mysql+pymysql://"
         )
 
-        # Motor síncrono con configuración optimizada
+        # Motor síncrono con el perfil "celery"
         self._engine = create_engine(
             sync_url,
-            echo=False,
-            pool_size=3,
-            max_overflow=1,
-            pool_recycle=600,
-            pool_pre_ping=True,
-            pool_reset_on_return="commit",
-            connect_args={
-                "connect_timeout": 8,
-                "charset": "utf8mb4",
-            },
+            poolclass=InstrumentedQueuePool,
+            **pool_profile("celery", pool_reset_on_return="commit"),
         )
+        pool_metrics.register("datamart_celery_sync", self._engine)
 
         # Session maker síncrono
         self._sessionmaker = sessionmaker(
@@ -314,6 +329,11 @@ class RepositoryFactorySync:
         db_session = self.get_db_session()
         return KPIRepository(db=db_session)
 
+    def create_kpi_rollup_mensual_repository(self) -> KPIRollupMensualRepository:
+        """Crear repository del rollup mensual de KPI (síncrono)"""
+        db_session = self.get_db_session()
+        return KPIRollupMensualRepository(db=db_session)
+
     def create_saldos_repository(self) -> SaldosRepository:
         """Crear repository de Saldos (síncrono)"""
         db_session = self.get_db_session()
@@ -30,6 +30,75 @@ class Settings(BaseSettings):
     RESEND_API_KEY: str
     REDIS_HOST: str
     REDIS_URL: str
+    COUNT_CACHE_TTL: int = 30  # segundos que se cachean los totales de búsquedas
+    BULK_INSERT_CONCURRENCY: int = 4  # conexiones paralelas en cargas masivas
+    JOB_INDEX_RETENTION: int = 60 * 60 * 24  # segundos que un job sigue indexado
+    JOB_LOG_MAXLEN: int = 1000  # logs que conserva el stream de cada job
+    JOB_TIMINGS_HISTORY: int = 50  # ejecuciones con tiempos por etapa por job
+    # Artefactos de jobs (ver config/artifact_store.py)
+    ARTIFACT_CHUNK_SIZE: int = 1024 * 1024  # bytes sin comprimir por chunk
+    ARTIFACT_ZSTD_LEVEL: int = 3
+    ARTIFACT_WRITE_BATCH: int = 8  # chunks por pipeline al escribir un artefacto
+    ARTIFACT_SPILL_THRESHOLD: int = 0  # bytes; 0 = nunca se vuelca a disco
+    ARTIFACT_SPILL_DIR: str = "/tmp/job_artifacts"
+    # Retención (ver config/artifact_retention.py)
+    ARTIFACT_REDIS_BUDGET: int = 200 * 1024 * 1024  # bytes; 0 = sin límite
+    ARTIFACT_PINNED_RETENTION: dict[str, int] = {
+        "Calcular Comisiones": 60 * 60 * 24 * 7,
+    }
+    JOB_MAX_RUNTIME: int = 60 * 60 * 6  # luego un job pending se da por huérfano
+    JOB_SWEEP_INTERVAL: int = 60  # s; retención de artefactos y jobs huérfanos
+    # Exportaciones pre-generadas en cada recarga (ver config/export_snapshots.py)
+    EXPORT_PRERENDER: bool = True
+    EXPORT_PRERENDER_TTL: int = 60 * 60 * 26  # cubre el intervalo entre recargas
+    # Insumos compartidos del DAG de recarga (ver utils/refresh_intermediates.py)
+    REFRESH_INTERMEDIATE_TTL: int = 60 * 60 * 2  # más que una corrida completa
+    # Datos de referencia entre corridas y procesos (ver utils/reference_data.py)
+    REFERENCE_DATA_TTL: int = 60 * 60  # las versionadas caducan también al recargarse
+    # Single-flight de las recargas (ver config/refresh_lock.py)
+    REFRESH_LOCK_TTL: int = 60 * 5  # lo que sobrevive el lock a un worker caído
+    REFRESH_LOCK_HEARTBEAT: int = 60  # cada cuánto lo renueva la task en curso
+    # DataFrames que se pasan las subtareas de un chord (p.ej. tablas_cxc)
+    CHORD_HANDOFF_TTL: int = 60 * 60 * 2  # cubre los reintentos de la subtarea final
+    # Métricas de Prometheus (ver config/metrics.py); "" = modo de un solo proceso
+    PROMETHEUS_MULTIPROC_DIR: str = "/tmp/prometheus_multiproc"
+    CELERY_METRICS_PORT: int = 9808  # servidor /metrics del worker; 0 = sin servidor
+    # Arranque de los workers de Celery (ver config/worker_runtime.py)
+    CELERY_PRELOAD_MODULES: list[str] = [
+        "numpy",
+        "pandas",
+        "polars",
+        "pyarrow.parquet",
+        "rapidfuzz",
+        "googleapiclient.discovery",
+        "config.artifact_render",
+        "utils.adelantafactoring.obtener",
+        "utils.adelantafactoring.calculos",
+        "utils.adelantafactoring.calculos.diferido",
+    ]
+    # Ejecución de jobs de create_job (ver config/job_executor.py)
+    JOB_PROCESS_WORKERS: int = 2  # procesos para el cálculo pesado (pandas)
+    JOB_PROCESS_MAX_TASKS: int = 20  # tareas por proceso antes de reciclarlo
+    JOB_MAX_CONCURRENCY: int = 4  # jobs ejecutándose a la vez por proceso web
+    JOB_QUEUE_MAX_DEPTH: int = 20  # jobs admitidos (en curso + en cola); luego 429
+    JOB_TYPE_DEFAULT_CONCURRENCY: int = 2
+    JOB_TYPE_CONCURRENCY: dict[str, int] = {
+        "Calcular Diferido": 1,
+        "Calcular Retomas": 1,
+        "Calcular Comisiones": 1,
+    }
+    # Perfil de pool por tipo de proceso (ver config/db_pool.py)
+    PROCESS_TYPE: str = "web"  # "web" | "celery"
+    DB_ECHO: bool = False
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_SIZE_WEB: int = 8
+    DB_MAX_OVERFLOW_WEB: int = 4
+    DB_POOL_RECYCLE_WEB: int = 1800
+    DB_POOL_TIMEOUT_WEB: int = 30
+    DB_POOL_SIZE_CELERY: int = 3
+    DB_MAX_OVERFLOW_CELERY: int = 4  # >= BULK_INSERT_CONCURRENCY
+    DB_POOL_RECYCLE_CELERY: int = 300
+    DB_POOL_TIMEOUT_CELERY: int = 30
 
     class Config:
         env_file = ".env"
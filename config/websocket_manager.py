@@ -1,13 +1,19 @@
 from fastapi import WebSocket
 import logging
 import asyncio
+from contextvars import ContextVar
 from typing import Set
 from enum import Enum
 from dataclasses import dataclass
 from datetime import datetime
-from config.redis import redis_manager
+from config.redis import redis_manager, JOBS_CHANNEL
+from config.job_events import job_event_hub
 import json
 
+# True dentro de la tarea que escribe un log en el stream del job: los logs que
+# emita esa escritura (p.ej. si falla Redis) no vuelven a escribirse
+_escribiendo_log: ContextVar[bool] = ContextVar("escribiendo_log", default=False)
+
 
 class JobStatus(Enum):
     RUNNING = "running"
@@ -31,6 +37,10 @@ class WebSocketManager(logging.Handler):
         self.active_connections: dict[str, WebSocket] = {}
         self.active_jobs: Set[str] = set()
         self.job_statuses: dict[str, JobStatus] = {}  # Tracking local de estados
+        # Último id de stream enviado por job; lo consume _tail_logs
+        self.log_cursors: dict[str, str] = {}
+        self._tail_task: asyncio.Task | None = None
+        self._progress_task: asyncio.Task | None = None
 
         self.logger = logging.getLogger("uvicorn.error")
         formatter = logging.Formatter(
@@ -68,11 +78,16 @@ class WebSocketManager(logging.Handler):
             logging.error(f"Error accepting WebSocket connection for {job_id}: {e}")
 
     async def send_existing_logs(self, job_id: str):
-        """Enviar logs existentes desde Redis al conectarse"""
+        """
+        Envía el historial de logs (un único XREVRANGE) y registra el job en el
+        lector de streams para recibir los siguientes sin hacer polling.
+        """
+        cursor = "0-0"
         try:
             logs = await redis_manager.get_job_logs(job_id, limit=50)
 
             if logs:
+                cursor = logs[-1]["id"]
                 for log_entry in reversed(logs):
                     message = f"[HISTORIAL] {log_entry.get('message', '')}"
                     await self.send_structured_message("log", message, job_id)
@@ -80,20 +95,71 @@ class WebSocketManager(logging.Handler):
         except Exception as e:
             logging.error(f"Error sending existing logs for {job_id}: {e}")
 
+        self.log_cursors[job_id] = cursor
+        if self._tail_task is None or self._tail_task.done():
+            self._tail_task = asyncio.create_task(self._tail_logs())
+        if self._progress_task is None or self._progress_task.done():
+            self._progress_task = asyncio.create_task(self._forward_progress())
+
+    async def _tail_logs(self):
+        """
+        Un solo XREAD BLOCK por proceso sobre los streams de todos los jobs
+        conectados; reenvía cada log nuevo a su WebSocket. Termina cuando no
+        quedan conexiones.
+        """
+        while self.log_cursors:
+            try:
+                nuevos = await redis_manager.tail_job_logs(
+                    dict(self.log_cursors), block_ms=1000
+                )
+            except Exception as e:
+                logging.error(f"Error reading job log streams: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            for job_id, entries in nuevos.items():
+                if job_id not in self.log_cursors:
+                    continue  # se desconectó mientras esperábamos
+                self.log_cursors[job_id] = entries[-1]["id"]
+                for log_entry in entries:
+                    await self.send_message(log_entry.get("message", ""), job_id)
+
+    async def _forward_progress(self):
+        """
+        Reenvía como mensajes "progress" los eventos de progreso (jobs:events)
+        de los jobs con WebSocket conectado. Termina cuando no quedan conexiones.
+        """
+        async with job_event_hub.subscribe(JOBS_CHANNEL) as queue:
+            while self.active_connections:
+                try:
+                    evento = await asyncio.wait_for(queue.get(), timeout=1)
+                except asyncio.TimeoutError:
+                    continue
+                job_id = evento.get("job_id")
+                if "progress" in evento and job_id in self.active_connections:
+                    await self.send_structured_message(
+                        "progress", evento["progress"], job_id
+                    )
+
     def disconnect(self, job_id: str):
         self.active_connections.pop(job_id, None)
         self.active_jobs.discard(job_id)
         self.job_statuses.pop(job_id, None)
+        self.log_cursors.pop(job_id, None)
 
     async def send_structured_message(
-        self, message_type: str, message: str, job_id: str, close_after: bool = False
+        self,
+        message_type: str,
+        message: str | dict,
+        job_id: str,
+        close_after: bool = False,
     ):
         """
         Envía un mensaje estructurado al WebSocket.
 
         Args:
-            message_type: Tipo de mensaje ('log', 'success', 'error', 'connection')
-            message: El mensaje a enviar
+            message_type: Tipo de mensaje ('log', 'success', 'error', 'connection', 'progress')
+            message: El mensaje a enviar (dict en los mensajes 'progress')
             job_id: ID del job
             close_after: Si debe cerrar la conexión después de enviar
         """
@@ -197,12 +263,27 @@ class WebSocketManager(logging.Handler):
     def emit(self, record):
         self.logger.handle(record)
 
+        # Evitar recursión si falla la propia escritura del log en Redis
+        if _escribiendo_log.get():
+            return
+
         current_job_id = getattr(self, "job_id", None)
-        if current_job_id and current_job_id in self.active_jobs:
+        if current_job_id:
+            # El log va al stream del job; _tail_logs lo entrega a los WebSockets
+            # conectados (en este u otro proceso) y queda para el historial.
             log_entry = self.format(record)
-            websocket = self.active_connections.get(current_job_id)
-            if websocket:
-                asyncio.create_task(self.safe_send_message(log_entry, current_job_id))
+            # la tarea copia el contexto al crearse: hereda la marca
+            marca = _escribiendo_log.set(True)
+            try:
+                asyncio.get_running_loop().create_task(
+                    redis_manager.add_job_log(
+                        current_job_id, log_entry, record.levelname
+                    )
+                )
+            except RuntimeError:
+                pass  # log emitido fuera del event loop (p.ej. desde un hilo)
+            finally:
+                _escribiendo_log.reset(marca)
 
 
 websocket_manager = WebSocketManager()
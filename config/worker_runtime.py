@@ -0,0 +1,101 @@
+"""
+Recursos por proceso de los workers de Celery.
+
+El worker corre con --max-tasks-per-child=5: los hijos del pool prefork se
+reciclan seguido y cada uno arrancaba en frío. Para que la primera task de un
+hijo empiece igual de rápido que la quinta:
+
+- preload_modules() (worker_init, proceso principal): importa los módulos
+  pesados antes del fork; los hijos los heredan ya cargados.
+- warm_process() (worker_process_init, cada hijo): crea el event loop del
+  proceso y su engine de BD con una conexión abierta, la sesión HTTP de los
+  obtenedores, y trae a memoria los datos de referencia que ya estén en Redis.
+
+Las tasks ejecutan su lógica con run_async() en ese loop. Con asyncio.run()
+cada task tenía un loop nuevo y las conexiones del pool, ligadas al loop en
+que se abrieron, no podían reutilizarse entre tasks.
+"""
+
+import asyncio
+import importlib
+from typing import Any, Coroutine, TypeVar
+
+import sqlalchemy as sa
+
+from config.logger import logger
+from config.settings import settings
+
+T = TypeVar("T")
+
+_loop: asyncio.AbstractEventLoop | None = None
+_session_manager = None  # DatabaseSessionManager del proceso
+
+
+def preload_modules() -> None:
+    for modulo in settings.CELERY_PRELOAD_MODULES:
+        try:
+            importlib.import_module(modulo)
+        except Exception as e:
+            logger.warning(f"[worker] No se precargó {modulo}: {e}")
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Ejecuta `coro` en el loop del proceso (o con asyncio.run si no hay uno)."""
+    if _loop is None or _loop.is_closed():
+        return asyncio.run(coro)
+    return _loop.run_until_complete(coro)
+
+
+def worker_session_manager():
+    """
+    Session manager del proceso, solo si se llama desde su loop (run_async);
+    None en cualquier otro caso (API, asyncio.run, hilos).
+    """
+    if _session_manager is None:
+        return None
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    return _session_manager if loop is _loop else None
+
+
+async def _abrir_conexion() -> None:
+    async with _session_manager.connect() as connection:
+        await connection.execute(sa.text("SELECT 1"))
+
+
+def warm_process() -> None:
+    """Prepara el proceso hijo; cada paso que falla se registra y se omite."""
+    global _loop, _session_manager
+    # diferidos: estos módulos importan (directa o indirectamente) este
+    from config.repository_factory import celery_session_manager
+    from utils.adelantafactoring.obtener.BaseObtener import http_session
+    from utils.reference_data import prefetch_reference_data
+
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+    try:
+        _session_manager = celery_session_manager()
+        run_async(_abrir_conexion())
+    except Exception as e:
+        logger.warning(f"[worker] No se abrió la conexión inicial a la BD: {e}")
+    http_session()
+    referencias = prefetch_reference_data()
+    logger.info(f"🔥 Proceso listo; referencias en memoria: {referencias or 'ninguna'}")
+
+
+def shutdown_process() -> None:
+    """Cierra el engine y el loop del proceso (worker_process_shutdown)."""
+    global _loop, _session_manager
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        if _session_manager is not None:
+            _loop.run_until_complete(_session_manager.close())
+    except Exception as e:
+        logger.warning(f"[worker] Error cerrando el engine del proceso: {e}")
+    finally:
+        _session_manager = None
+        _loop.close()
+        _loop = None
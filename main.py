@@ -1,4 +1,5 @@
-from fastapi import FastAPI, Request
+from config import metrics  # primero: fija PROMETHEUS_MULTIPROC_DIR
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import time
@@ -11,6 +12,7 @@ from routers.datamart import (
     ReferidosRouter,
     KPIRouter,
     KPIAcumuladoRouter,
+    KPIRollupRouter,
     RetomasRouter,
     NuevosClientesNuevosPagadoresRouter,
 )  # DATAMART
@@ -40,8 +42,12 @@ from routers.administrativo import (
 from routers.sunat import SunatRouter
 from routers.master import TablaMaestraDetalleRouter, TablaMaestraRouter  # MASTER
 from routers.crm import SolicitudLeadRouter  # CRM
+from routers.monitoring import MonitoringRouter  # MONITORING
 from config.container import container
+from config.job_executor import job_executor
+from config.job_sweeper import job_sweeper
 from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 
 
 peru_tz = pytz.timezone("America/Lima")
@@ -50,6 +56,8 @@ peru_tz = pytz.timezone("America/Lima")
 @asynccontextmanager
 async def app_lifespan(app: FastAPI):
     logger.info(f"Iniciando el servidor {app.title}")
+    # uvicorn corre un solo proceso: descarta las métricas de arranques anteriores
+    metrics.reset_multiprocess_dir()
 
     container.init_resources()
 
@@ -58,10 +66,15 @@ async def app_lifespan(app: FastAPI):
     # BaseCronjob.register_all_cronjobs()
     # await cronjob_manager.start()
 
+    # 🧹 retención de artefactos y jobs huérfanos, fuera de cada job
+    job_sweeper.start()
+
     logger.info("🎮 Servidor iniciado con control remoto de tasks via API")
     yield
 
     # await cronjob_manager.shutdown()
+    await job_sweeper.stop()
+    job_executor.shutdown()
     logger.info("Servidor detenido")
 
     if sessionmanager._engine is not None:
@@ -100,6 +113,11 @@ app.include_router(
     prefix="/datamart/kpi-acumulado",
     tags=["Datamart", "KPI Acumulado"],
 )
+app.include_router(
+    KPIRollupRouter.router,
+    prefix="/datamart/kpi-rollup",
+    tags=["Datamart", "KPI Rollup"],
+)
 app.include_router(
     RetomasRouter.router,
     prefix="/datamart/retomas",
@@ -197,18 +215,34 @@ app.include_router(
     SolicitudLeadRouter.router, prefix="/crm" + "/solicitudLead", tags=["CRM"]
 )
 
+# MONITORING
+app.include_router(MonitoringRouter.router, prefix="/monitoring", tags=["Monitoring"])
+
 
 @app.get("/")
 def read_root():
     return "Server is running"
 
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    # métricas de todos los workers de la API (config/metrics.py)
+    return Response(metrics.render_metrics(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     start_time = time.perf_counter()
     response = await call_next(request)
     process_time = time.perf_counter() - start_time
     response.headers["X-Process-Time"] = str(process_time)
+    # plantilla de la ruta (/datamart/kpi/{id}), no la URL: cardinalidad acotada
+    route = request.scope.get("route")
+    metrics.HTTP_REQUEST_DURATION.labels(
+        request.method,
+        getattr(route, "path", "unmatched"),
+        response.status_code,
+    ).observe(process_time)
     return response
 
 
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Float, Integer, DateTime
+from sqlalchemy import String, Float, Integer, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from config.db_mysql import Base
@@ -6,6 +6,21 @@ from config.db_mysql import Base
 
 class KPIModel(Base):
     __tablename__ = "kpi"
+    # Índices de los filtros de /query (ver KPIQuerySchema)
+    __table_args__ = (
+        Index("ix_kpi_FechaOperacion", "FechaOperacion"),
+        Index("ix_kpi_Ejecutivo_FechaOperacion", "Ejecutivo", "FechaOperacion"),
+        Index("ix_kpi_Mes_Ejecutivo", "Mes", "Ejecutivo"),
+        Index("ix_kpi_RUCPagador_FechaOperacion", "RUCPagador", "FechaOperacion"),
+        Index("ix_kpi_RUCCliente_FechaOperacion", "RUCCliente", "FechaOperacion"),
+        Index("ix_kpi_CodigoLiquidacion", "CodigoLiquidacion"),
+        Index(
+            "ix_kpi_Moneda_TipoOperacion_FechaOperacion",
+            "Moneda",
+            "TipoOperacion",
+            "FechaOperacion",
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     CodigoLiquidacion: Mapped[str] = mapped_column(String(255))
     CodigoSolicitud: Mapped[str | None] = mapped_column(String(255), nullable=True)
@@ -0,0 +1,23 @@
+from sqlalchemy import String, Float, Integer, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from config.db_mysql import Base
+
+
+class KPIRollupMensualModel(Base):
+    """Totales de kpi por Mes/Ejecutivo/Sector/TipoOperacion/Moneda."""
+
+    __tablename__ = "kpi_rollup_mensual"
+    __table_args__ = (Index("ix_kpi_rollup_mensual_Mes_Ejecutivo", "Mes", "Ejecutivo"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    Mes: Mapped[str] = mapped_column(String(7), nullable=False)
+    Ejecutivo: Mapped[str] = mapped_column(String(255), nullable=False)
+    Sector: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    TipoOperacion: Mapped[str] = mapped_column(String(255), nullable=False)
+    Moneda: Mapped[str] = mapped_column(String(255), nullable=False)
+    ColocacionSoles: Mapped[float] = mapped_column(Float, nullable=False)
+    IngresosSoles: Mapped[float] = mapped_column(Float, nullable=False)
+    Utilidad: Mapped[float] = mapped_column(Float, nullable=False)
+    CostosFondoSoles: Mapped[float] = mapped_column(Float, nullable=False)
+    Operaciones: Mapped[int] = mapped_column(Integer, nullable=False)
+    Documentos: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -1,5 +1,6 @@
 from .KPIModel import KPIModel
 from .KPIAcumuladoModel import KPIAcumuladoModel
+from .KPIRollupMensualModel import KPIRollupMensualModel
 from .NuevosClientesNuevosPagadoresModel import NuevosClientesNuevosPagadoresModel
 from .RetomasModel import RetomasModel
 from .TipoCambioModel import TipoCambioModel
@@ -14,6 +15,7 @@ from .CXCPagosFactModel import CXCPagosFactModel
 __all__ = [
     "KPIAcumuladoModel",
     "KPIModel",
+    "KPIRollupMensualModel",
     "NuevosClientesNuevosPagadoresModel",
     "RetomasModel",
     "TipoCambioModel",
@@ -7,18 +7,70 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, OperationalError
 from fastapi import HTTPException
-from typing import TypeVar, Generic, List, Union, Type, Dict, Any
+from typing import (
+    TypeVar,
+    Generic,
+    List,
+    Union,
+    Type,
+    Dict,
+    Any,
+    AsyncIterator,
+    TYPE_CHECKING,
+)
 from config.logger import logger
+from config import metrics
+from utils.pagination import count_cache
+from utils.export_profiles import ExportProfile
 import sqlalchemy as sa
+import asyncio
+
+if TYPE_CHECKING:
+    from config.db_mysql import DatabaseSessionManager
 
 T = TypeVar("T")  # Tipo para los modelos
 
 
+class BulkInsertError(Exception):
+    """
+    Error de una inserción paralela. `errores` lista (chunk, fila_inicio,
+    fila_fin, mensaje) ordenada por número de chunk.
+    """
+
+    def __init__(self, tabla: str, errores: list[tuple[int, int, int, str]]):
+        self.tabla = tabla
+        self.errores = errores
+        detalle = "; ".join(
+            f"chunk {idx} (filas {ini}-{fin}): {msg}" for idx, ini, fin, msg in errores
+        )
+        super().__init__(f"Falló la inserción en {tabla}: {detalle}")
+
+
 class BaseRepository(Generic[T]):
+    # Si es True, los totales de get_all_and_search se cachean en Redis
+    # y cualquier escritura sobre la tabla los invalida.
+    cache_counts: bool = False
+
     def __init__(self, entity_class: Type[T], db: Union[AsyncSession, Session]) -> None:
         self.entity_class = entity_class
         self.db = db
 
+    async def count_cached(self, total_query, filtros: dict) -> int:
+        """
+        Ejecuta el COUNT de una búsqueda, reutilizando el resultado cacheado
+        para la misma combinación de filtros mientras la tabla no cambie.
+        """
+        if not self.cache_counts:
+            return (await self.db.execute(total_query)).scalar() or 0
+        return await count_cache.get_or_count(
+            self.db, self.entity_class.__tablename__, filtros, total_query
+        )
+
+    async def invalidate_counts(self) -> None:
+        """Invalida los totales cacheados de la tabla tras una escritura."""
+        if self.cache_counts:
+            await count_cache.invalidate(self.entity_class.__tablename__)
+
     async def create(self, entity_data, autocommit: bool = True) -> T:
         entity = self.entity_class(**entity_data)
         self.db.add(entity)
@@ -27,6 +79,7 @@ class BaseRepository(Generic[T]):
             await self.db.refresh(entity)
             if autocommit:
                 await self.db.commit()
+                await self.invalidate_counts()
             return entity
         except IntegrityError as e:
             if autocommit:
@@ -52,6 +105,7 @@ class BaseRepository(Generic[T]):
             await self.db.execute(self.entity_class.__table__.insert(), input)
             if autocommit:
                 await self.db.commit()
+                await self.invalidate_counts()
         except Exception as e:
             if autocommit:
                 await self.db.rollback()
@@ -66,6 +120,7 @@ class BaseRepository(Generic[T]):
             await self.db.delete(entity)
             if autocommit:
                 await self.db.commit()
+                await self.invalidate_counts()
         except Exception as e:
             if autocommit:
                 await self.db.rollback()
@@ -115,20 +170,26 @@ class BaseRepository(Generic[T]):
                 detail=f"Error inesperado: {str(e)}",
             )
 
-    async def get_all_dicts(self, exclude_pk: bool = True) -> list[dict]:
+    async def get_all_dicts(
+        self, exclude_pk: bool = True, perfil: ExportProfile | None = None
+    ) -> list[dict]:
         """
         Devuelve todos los registros como lista de dicts,
         respetando el orden de columnas en el modelo.
         Si exclude_pk=True, omite las columnas que son primary_key.
+        Con un perfil de exportación trae solo sus columnas (ver profile_select).
         """
-        # Extraemos nombres de columnas según el modelo
-        cols = [
-            col.name
-            for col in self.entity_class.__table__.columns
-            if not (exclude_pk and col.primary_key)
-        ]
-        # Construimos el SELECT genérico
-        stmt = sa.select(*[getattr(self.entity_class, c) for c in cols])
+        if perfil is not None:
+            stmt = self.profile_select(perfil)
+        else:
+            # Extraemos nombres de columnas según el modelo
+            cols = [
+                col.name
+                for col in self.entity_class.__table__.columns
+                if not (exclude_pk and col.primary_key)
+            ]
+            # Construimos el SELECT genérico
+            stmt = sa.select(*[getattr(self.entity_class, c) for c in cols])
         result = await self.db.execute(stmt)
         # Cada row._mapping es un dict {col: valor}
         return [dict(row._mapping) for row in result]
@@ -153,6 +214,7 @@ class BaseRepository(Generic[T]):
                 raise NoResultFound(f"{self.entity_class.__name__} no encontrado.")
             if autocommit:
                 await self.db.commit()
+                await self.invalidate_counts()
             return await self.get_by_id(entity_id, id_column)
         except Exception as e:
             if autocommit:
@@ -172,6 +234,7 @@ class BaseRepository(Generic[T]):
         """
         await self.db.execute(self.entity_class.__table__.insert(), input)
         await self.db.commit()
+        await self.invalidate_counts()
 
         # Obtener los valores únicos de la columna de búsqueda
         search_values = [item[column_search] for item in input]
@@ -194,6 +257,7 @@ class BaseRepository(Generic[T]):
                 raise NoResultFound(f"{self.entity_class.__name__} no encontrado.")
             if autocommit:
                 await self.db.commit()
+                await self.invalidate_counts()
         except Exception as e:
             if autocommit:
                 await self.db.rollback()
@@ -209,6 +273,7 @@ class BaseRepository(Generic[T]):
             await self.db.execute(statement)
             if autocommit:
                 await self.db.commit()
+                await self.invalidate_counts()
         except Exception as e:
             if autocommit:
                 await self.db.rollback()
@@ -243,6 +308,8 @@ class BaseRepository(Generic[T]):
             await self.db.execute(stmt)
             if autocommit:
                 await self.db.commit()
+        if autocommit:
+            await self.invalidate_counts()
 
     async def delete_and_bulk_insert_chunked(
         self,
@@ -262,6 +329,190 @@ class BaseRepository(Generic[T]):
             autocommit=autocommit,
         )
 
+    async def bulk_insert_parallel(
+        self,
+        records: List[Dict[str, Any]],
+        session_manager: "DatabaseSessionManager",
+        chunk_size: int = 5000,
+        max_concurrency: int = 4,
+        table: sa.Table | None = None,
+    ) -> None:
+        """
+        Inserta en chunks repartidos entre varias conexiones del pool de
+        session_manager, con como máximo max_concurrency chunks a la vez.
+        Cada chunk se confirma en su propia transacción; ante el primer fallo
+        no se lanzan más chunks y se levanta BulkInsertError con los errores
+        ordenados por chunk. Para semántica todo-o-nada usar reload_via_staging.
+        """
+        table = table if table is not None else self.entity_class.__table__
+        total = len(records)
+        logger.warning(
+            f"Total de registros a insertar en paralelo ({max_concurrency} conexiones): {total}"
+        )
+
+        semaforo = asyncio.Semaphore(max_concurrency)
+        fallo = asyncio.Event()
+        errores: list[tuple[int, int, int, str]] = []
+
+        async def insertar_chunk(idx: int, start: int) -> None:
+            async with semaforo:
+                if fallo.is_set():
+                    return
+                chunk = records[start : start + chunk_size]
+                try:
+                    async with session_manager.connect() as connection:
+                        await connection.execute(table.insert(), chunk)
+                except Exception as e:
+                    fallo.set()
+                    errores.append((idx, start, start + len(chunk) - 1, str(e)))
+
+        await asyncio.gather(
+            *[
+                insertar_chunk(idx, start)
+                for idx, start in enumerate(range(0, total, chunk_size))
+            ]
+        )
+
+        if errores:
+            raise BulkInsertError(table.name, sorted(errores))
+
+    async def reload_via_staging(
+        self,
+        records: List[Dict[str, Any]],
+        session_manager: "DatabaseSessionManager",
+        chunk_size: int = 5000,
+        max_concurrency: int = 4,
+    ) -> None:
+        """
+        Reemplaza todo el contenido de la tabla de forma atómica (todo-o-nada):
+        carga los registros en paralelo sobre una tabla staging con la misma
+        estructura y luego intercambia ambas con un único RENAME TABLE.
+        Si algún chunk falla, la tabla original queda intacta.
+        """
+        nombre = self.entity_class.__tablename__
+        staging = f"{nombre}__staging"
+        old = f"{nombre}__old"
+        staging_table = self.entity_class.__table__.to_metadata(
+            sa.MetaData(), name=staging
+        )
+
+        async with session_manager.connect() as connection:
+            await connection.execute(sa.text(f"DROP TABLE IF EXISTS `{staging}`"))
+            await connection.execute(
+                sa.text(f"CREATE TABLE `{staging}` LIKE `{nombre}`")
+            )
+
+        try:
+            await self.bulk_insert_parallel(
+                records,
+                session_manager,
+                chunk_size=chunk_size,
+                max_concurrency=max_concurrency,
+                table=staging_table,
+            )
+        except Exception:
+            async with session_manager.connect() as connection:
+                await connection.execute(sa.text(f"DROP TABLE IF EXISTS `{staging}`"))
+            raise
+
+        async with session_manager.connect() as connection:
+            await connection.execute(sa.text(f"DROP TABLE IF EXISTS `{old}`"))
+            await connection.execute(
+                sa.text(
+                    f"RENAME TABLE `{nombre}` TO `{old}`, `{staging}` TO `{nombre}`"
+                )
+            )
+            await connection.execute(sa.text(f"DROP TABLE `{old}`"))
+
+        await self.invalidate_counts()
+        metrics.TABLE_ROWS_LOADED.labels(nombre).inc(len(records))
+        logger.info(f"Tabla {nombre} recargada vía staging ({len(records)} registros)")
+
+    def _columna(self, nombre: str):
+        """Devuelve la columna del modelo o HTTPException 400 si no existe."""
+        try:
+            return self.entity_class.__table__.columns[nombre]
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Columna inválida: {nombre}")
+
+    def filtered_select(
+        self,
+        filtros: Dict[str, Any] | None = None,
+        rangos: Dict[str, tuple[Any, Any]] | None = None,
+        columnas: List[str] | None = None,
+        orden: List[str] | None = None,
+        limit: int | None = None,
+    ):
+        """
+        Construye (y valida) un SELECT con filtros, proyección y orden.
+        - filtros: {columna: valor | [valores]} → igualdad o IN
+        - rangos: {columna: (desde, hasta)} → extremos inclusivos, None = abierto
+        - columnas: proyección; por defecto todas salvo la primary key
+        - orden: nombres de columna, prefijo "-" para descendente
+        Las columnas se validan aquí para poder responder 400 antes de empezar
+        a transmitir la respuesta.
+        """
+        tabla = self.entity_class.__table__
+        if columnas:
+            seleccion = [self._columna(c) for c in columnas]
+        else:
+            seleccion = [c for c in tabla.columns if not c.primary_key]
+
+        stmt = sa.select(*seleccion)
+        for nombre, valor in (filtros or {}).items():
+            col = self._columna(nombre)
+            if isinstance(valor, (list, tuple, set)):
+                stmt = stmt.where(col.in_(valor))
+            else:
+                stmt = stmt.where(col == valor)
+        for nombre, (desde, hasta) in (rangos or {}).items():
+            col = self._columna(nombre)
+            if desde is not None:
+                stmt = stmt.where(col >= desde)
+            if hasta is not None:
+                stmt = stmt.where(col <= hasta)
+        for nombre in orden or []:
+            col = self._columna(nombre.lstrip("-"))
+            stmt = stmt.order_by(col.desc() if nombre.startswith("-") else col.asc())
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    def profile_select(self, perfil: ExportProfile):
+        """
+        SELECT con las columnas del perfil, en su orden y con sus encabezados.
+        Las columnas que la tabla no tiene salen como NULL AS <encabezado>.
+        """
+        tabla = self.entity_class.__table__
+        seleccion = []
+        for nombre, encabezado in zip(perfil.columnas, perfil.encabezados):
+            col = tabla.columns.get(nombre)
+            seleccion.append((sa.null() if col is None else col).label(encabezado))
+        stmt = sa.select(*seleccion)
+        for nombre in perfil.orden:
+            col = self._columna(nombre.lstrip("-"))
+            stmt = stmt.order_by(col.desc() if nombre.startswith("-") else col.asc())
+        return stmt
+
+    async def stream_select(
+        self,
+        stmt,
+        session_manager: "DatabaseSessionManager",
+        batch_size: int = 1000,
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Ejecuta el SELECT con un cursor del lado del servidor y entrega las filas
+        en lotes de dicts, sin materializar el resultado completo en memoria.
+        Usa su propia conexión: la sesión de la request ya está cerrada cuando
+        se consume una StreamingResponse.
+        """
+        async with session_manager.connect() as connection:
+            result = await connection.stream(
+                stmt.execution_options(yield_per=batch_size)
+            )
+            async for lote in result.mappings().partitions(batch_size):
+                yield [dict(row) for row in lote]
+
     # 🔧 MÉTODOS SÍNCRONOS - Réplicas de los métodos async
 
     def get_all_dicts_sync(self, exclude_pk: bool = True) -> list[dict]:
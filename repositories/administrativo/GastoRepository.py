@@ -8,9 +8,17 @@ from models.auth.UsuarioModel import UsuarioModel
 from models.master.TablaMaestraModel import TablaMaestraModel
 from models.master.TablaMaestraDetalleModel import TablaMaestraDetalleModel
 from uuid import UUID
+from utils.pagination import (
+    keyset_order_by,
+    keyset_condition,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class GastoRepository(BaseRepository):
+    cache_counts = True
+
     def __init__(self, db: DB_ADMINISTRATIVO) -> None:
         super().__init__(GastoModel, db)
 
@@ -21,10 +29,17 @@ class GastoRepository(BaseRepository):
         nombre_gasto: str = None,
         pago_fecha: str = None,
         gasto_id: str = None,
+        cursor: str = None,
     ):
         # Calcular el offset basado en la página (empezando desde 1)
         offset = (page - 1) * limit
 
+        # Orden estable para la paginación por keyset (cursor)
+        orden = [
+            (self.entity_class.fecha_emision, True),
+            (self.entity_class.gasto_id, True),
+        ]
+
         # Construir la consulta con filtros y joins
         query = (
             select(self.entity_class, UsuarioModel, ProveedorModel)
@@ -36,7 +51,7 @@ class GastoRepository(BaseRepository):
                 ProveedorModel,
                 self.entity_class.proveedor_id == ProveedorModel.proveedor_id,
             )
-            .offset(offset)
+            .order_by(*keyset_order_by(orden))
             .limit(limit)
         )
 
@@ -62,12 +77,24 @@ class GastoRepository(BaseRepository):
         if filters:
             query = query.where(and_(*filters))
 
+        # Con cursor se continúa desde la última fila (sin OFFSET)
+        if cursor:
+            query = query.where(keyset_condition(orden, decode_cursor(cursor, orden)))
+        else:
+            query = query.offset(offset)
+
         # Obtener el número total de registros que coinciden con los filtros
         total_query = select(func.count()).select_from(self.entity_class)
         if filters:
             total_query = total_query.where(and_(*filters))
-        total_result = await self.db.execute(total_query)
-        total_records = total_result.scalar()
+        total_records = await self.count_cached(
+            total_query,
+            {
+                "nombre_gasto": nombre_gasto,
+                "pago_fecha": pago_fecha,
+                "gasto_id": gasto_id,
+            },
+        )
 
         # Calcular el número total de páginas
         total_pages = (total_records + limit - 1) // limit
@@ -113,11 +140,18 @@ class GastoRepository(BaseRepository):
         result = await self.db.execute(query)
         records = result.all()
 
+        # Token para pedir la página siguiente (None si ya no hay más)
+        next_cursor = None
+        if len(records) == limit:
+            ultimo = records[-1][0]
+            next_cursor = encode_cursor([ultimo.fecha_emision, ultimo.gasto_id])
+
         # Añadir total_pages y username a cada instancia
         result_list = []
         for record, usuario, proveedor, estado_valor, gasto_estado_valor in records:
             record_data = record.__dict__
             record_data["total_pages"] = total_pages
+            record_data["next_cursor"] = next_cursor
             record_data["created_by"] = usuario.username
             record_data["estado"] = estado_valor
             record_data["gasto_estado"] = gasto_estado_valor
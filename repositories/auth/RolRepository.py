@@ -10,9 +10,17 @@ from sqlalchemy.orm import joinedload
 from fastapi import HTTPException, Depends
 from config.logger import logger
 from models.auth.PermisoModel import PermisoModel
+from utils.pagination import (
+    keyset_order_by,
+    keyset_condition,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class RolRepository(BaseRepository):
+    cache_counts = True
+
     def __init__(
         self,
         db: DB_ADMINISTRATIVO,
@@ -26,12 +34,19 @@ class RolRepository(BaseRepository):
         limit: int = 10,
         page: int = 1,
         nombre: str = None,
+        cursor: str = None,
     ):
         # Calcular el offset basado en la página (empezando desde 1)
         offset = (page - 1) * limit
 
+        # Orden estable para la paginación por keyset (cursor)
+        orden = [
+            (self.entity_class.nombre, False),
+            (self.entity_class.rol_id, False),
+        ]
+
         # Construir la consulta con filtros
-        query = select(self.entity_class).offset(offset).limit(limit)
+        query = select(self.entity_class).order_by(*keyset_order_by(orden)).limit(limit)
 
         filters = []
         if nombre:
@@ -41,12 +56,17 @@ class RolRepository(BaseRepository):
         if filters:
             query = query.where(and_(*filters))
 
+        # Con cursor se continúa desde la última fila (sin OFFSET)
+        if cursor:
+            query = query.where(keyset_condition(orden, decode_cursor(cursor, orden)))
+        else:
+            query = query.offset(offset)
+
         # Obtener el número total de registros que coinciden con los filtros
         total_query = select(func.count()).select_from(self.entity_class)
         if filters:
             total_query = total_query.where(and_(*filters))
-        total_result = await self.db.execute(total_query)
-        total_records = total_result.scalar()
+        total_records = await self.count_cached(total_query, {"nombre": nombre})
 
         # Calcular el número total de páginas
         total_pages = (total_records + limit - 1) // limit
@@ -55,10 +75,16 @@ class RolRepository(BaseRepository):
         result = await self.db.execute(query)
         records = result.scalars().all()
 
+        # Token para pedir la página siguiente (None si ya no hay más)
+        next_cursor = None
+        if len(records) == limit:
+            next_cursor = encode_cursor([records[-1].nombre, records[-1].rol_id])
+
         # Añadir total_pages a cada instancia
 
         for record in records:
             record.total_pages = total_pages
+            record.next_cursor = next_cursor
 
         return records
 
@@ -187,8 +213,9 @@ class RolRepository(BaseRepository):
                 # 2. Luego eliminamos el rol sin autocommit
                 await self.delete_by_id(rol_id, "rol_id", autocommit=False)
 
-                # 3. Si todo fue exitoso, commit
+                # 3. Si todo fue exitoso, commit (y recién ahí cambian los totales)
                 await self.db.commit()
+                await self.invalidate_counts()
 
                 return {
                     "mensaje": f"Rol '{rol.nombre}' eliminado correctamente",
@@ -14,9 +14,17 @@ from sqlalchemy.orm import joinedload
 from models.auth.RolModel import RolModel
 from models.auth.RolPermisoModel import RolPermisoModel
 from models.auth.PermisoModel import PermisoModel
+from utils.pagination import (
+    keyset_order_by,
+    keyset_condition,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class UsuarioRepository(BaseRepository[UsuarioModel]):
+    cache_counts = True
+
     def __init__(
         self, db: DB_ADMINISTRATIVO, rol_repository: RolRepository = Depends()
     ) -> None:
@@ -116,10 +124,19 @@ class UsuarioRepository(BaseRepository[UsuarioModel]):
         page: int = 1,
         username: str = None,
         email: str = None,
+        cursor: str = None,
     ) -> list[dict]:
         # 1) Offset
         offset = (page - 1) * limit
 
+        # Orden estable para la paginación por keyset (cursor):
+        # estado descendente (1 primero, luego 0) y luego username
+        orden = [
+            (self.entity_class.estado, True),
+            (self.entity_class.username, False),
+            (self.entity_class.usuario_id, False),
+        ]
+
         # 2) Condiciones
         conditions = []
         if username:
@@ -131,7 +148,9 @@ class UsuarioRepository(BaseRepository[UsuarioModel]):
         base_query = select(func.count()).select_from(self.entity_class)
         if conditions:
             base_query = base_query.where(and_(*conditions))
-        total_records = (await self.db.execute(base_query)).scalar() or 0
+        total_records = await self.count_cached(
+            base_query, {"username": username, "email": email}
+        )
         total_pages = (total_records + limit - 1) // limit
 
         # 4) Subconsulta para obtener el valor del estado
@@ -157,17 +176,26 @@ class UsuarioRepository(BaseRepository[UsuarioModel]):
         ).options(joinedload(self.entity_class.rol))
         if conditions:
             main_query = main_query.where(and_(*conditions))
-        main_query = main_query.offset(offset).limit(limit)
-
-        # Ordenar por estado de forma descendente (1 primero, luego 0)
-        # y luego por username para un orden consistente
-        main_query = main_query.order_by(
-            self.entity_class.estado.desc(), self.entity_class.username.asc()
-        )
+        # Con cursor se continúa desde la última fila (sin OFFSET)
+        if cursor:
+            main_query = main_query.where(
+                keyset_condition(orden, decode_cursor(cursor, orden))
+            )
+        else:
+            main_query = main_query.offset(offset)
+        main_query = main_query.limit(limit).order_by(*keyset_order_by(orden))
 
         result = await self.db.execute(main_query)
         records = result.unique().all()  # Usar unique() para evitar duplicados
 
+        # Token para pedir la página siguiente (None si ya no hay más)
+        next_cursor = None
+        if len(records) == limit:
+            ultimo = records[-1][0]
+            next_cursor = encode_cursor(
+                [ultimo.estado, ultimo.username, ultimo.usuario_id]
+            )
+
         # 6) Armar salida
         output = []
         for usuario, estado_valor in records:
@@ -178,6 +206,7 @@ class UsuarioRepository(BaseRepository[UsuarioModel]):
 
             data["estado"] = estado_valor
             data["total_pages"] = total_pages
+            data["next_cursor"] = next_cursor
 
             # 7) Agregar información del rol y sus submódulos si existe
             if usuario.rol:
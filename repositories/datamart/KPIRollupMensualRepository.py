@@ -0,0 +1,103 @@
+from models.datamart.KPIModel import KPIModel
+from models.datamart.KPIRollupMensualModel import KPIRollupMensualModel
+from repositories.BaseRepository import BaseRepository
+from config.db_mysql import DB
+import sqlalchemy as sa
+
+DIMENSIONES = ["Mes", "Ejecutivo", "Sector", "TipoOperacion", "Moneda"]
+# Métricas que se pueden re-sumar al agrupar por menos dimensiones
+METRICAS = [
+    "ColocacionSoles",
+    "IngresosSoles",
+    "Utilidad",
+    "CostosFondoSoles",
+    "Documentos",
+]
+
+
+class KPIRollupMensualRepository(BaseRepository):
+    def __init__(self, db: DB) -> None:
+        super().__init__(KPIRollupMensualModel, db)
+
+    async def get_totales(
+        self,
+        dimensiones: list[str],
+        filtros: dict[str, list[str]],
+        mes_desde: str | None = None,
+        mes_hasta: str | None = None,
+    ) -> list[dict]:
+        """
+        Totales del rollup agrupados por `dimensiones` (subconjunto de
+        DIMENSIONES). Agrupar por menos dimensiones re-suma el rollup, que
+        tiene unos pocos miles de filas, sin tocar la tabla kpi.
+
+        Operaciones no se re-suma (una liquidación repartida en varios grupos
+        se contaría varias veces): al grano completo se lee del rollup y a un
+        grano menor se cuenta con COUNT(DISTINCT) sobre kpi.
+        """
+        columnas = [self._columna(d) for d in dimensiones]
+        metricas = [sa.func.sum(self._columna(m)).label(m) for m in METRICAS]
+        if dimensiones == DIMENSIONES:
+            # cada grupo es una única fila del rollup
+            metricas.append(
+                sa.func.max(self._columna("Operaciones")).label("Operaciones")
+            )
+        stmt = self._filtrar(
+            sa.select(*columnas, *metricas),
+            KPIRollupMensualModel.__table__,
+            filtros,
+            mes_desde,
+            mes_hasta,
+        )
+        stmt = stmt.group_by(*columnas).order_by(*columnas)
+        totales = [dict(row._mapping) for row in await self.db.execute(stmt)]
+        if dimensiones == DIMENSIONES:
+            return totales
+
+        operaciones = await self._operaciones_distintas(
+            dimensiones, filtros, mes_desde, mes_hasta
+        )
+        for fila in totales:
+            fila["Operaciones"] = operaciones.get(
+                tuple(fila[d] for d in dimensiones), 0
+            )
+        return totales
+
+    async def _operaciones_distintas(
+        self,
+        dimensiones: list[str],
+        filtros: dict[str, list[str]],
+        mes_desde: str | None,
+        mes_hasta: str | None,
+    ) -> dict[tuple, int]:
+        """Liquidaciones distintas de kpi por grupo de `dimensiones`."""
+        kpi = KPIModel.__table__
+        columnas = [kpi.columns[d] for d in dimensiones]
+        stmt = self._filtrar(
+            sa.select(
+                *columnas,
+                sa.func.count(sa.distinct(kpi.c.CodigoLiquidacion)).label("n"),
+            ),
+            kpi,
+            filtros,
+            mes_desde,
+            mes_hasta,
+        ).group_by(*columnas)
+        result = await self.db.execute(stmt)
+        return {tuple(row[: len(dimensiones)]): row.n for row in result}
+
+    @staticmethod
+    def _filtrar(
+        stmt,
+        tabla: sa.Table,
+        filtros: dict[str, list[str]],
+        mes_desde: str | None,
+        mes_hasta: str | None,
+    ):
+        for nombre, valores in filtros.items():
+            stmt = stmt.where(tabla.columns[nombre].in_(valores))
+        if mes_desde:
+            stmt = stmt.where(tabla.c.Mes >= mes_desde)
+        if mes_hasta:
+            stmt = stmt.where(tabla.c.Mes <= mes_hasta)
+        return stmt
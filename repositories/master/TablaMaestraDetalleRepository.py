@@ -6,9 +6,17 @@ from sqlalchemy.future import select
 from sqlalchemy import and_, func, or_
 from models.auth.UsuarioModel import UsuarioModel
 from sqlalchemy.orm import aliased
+from utils.pagination import (
+    keyset_order_by,
+    keyset_condition,
+    encode_cursor,
+    decode_cursor,
+)
 
 
 class TablaMaestraDetalleRepository(BaseRepository):
+    cache_counts = True
+
     def __init__(self, db: DB_ADMINISTRATIVO) -> None:
         super().__init__(TablaMaestraDetalleModel, db)
 
@@ -22,12 +30,19 @@ class TablaMaestraDetalleRepository(BaseRepository):
         tabla_maestra_id: str = None,
         tabla_nombre: str = None,
         tipo: str = None,
+        cursor: str = None,
     ):
         # Calcular el offset basado en la página (empezando desde 1)
         offset = (page - 1) * limit
 
+        # Orden estable para la paginación por keyset (cursor)
+        orden = [
+            (self.entity_class.codigo, False),
+            (self.entity_class.tabla_maestra_detalle_id, False),
+        ]
+
         # Construir la consulta con filtros
-        query = select(self.entity_class).offset(offset).limit(limit)
+        query = select(self.entity_class).order_by(*keyset_order_by(orden)).limit(limit)
 
         filters = []
         if codigo:
@@ -42,6 +57,12 @@ class TablaMaestraDetalleRepository(BaseRepository):
         if filters:
             query = query.where(and_(*filters))
 
+        # Con cursor se continúa desde la última fila (sin OFFSET)
+        if cursor:
+            query = query.where(keyset_condition(orden, decode_cursor(cursor, orden)))
+        else:
+            query = query.offset(offset)
+
         # Ajustar la consulta para incluir la tabla maestra si se proporciona tabla_nombre y tipo
         if tabla_nombre and tipo:
             tabla_maestra_alias = aliased(TablaMaestraModel)
@@ -59,8 +80,15 @@ class TablaMaestraDetalleRepository(BaseRepository):
         total_query = select(func.count()).select_from(self.entity_class)
         if filters:
             total_query = total_query.where(and_(*filters))
-        total_result = await self.db.execute(total_query)
-        total_records = total_result.scalar()
+        total_records = await self.count_cached(
+            total_query,
+            {
+                "codigo": codigo,
+                "valor": valor,
+                "descripcion": descripcion,
+                "tabla_maestra_id": tabla_maestra_id,
+            },
+        )
 
         # Calcular el número total de páginas
         total_pages = (total_records + limit - 1) // limit
@@ -76,10 +104,19 @@ class TablaMaestraDetalleRepository(BaseRepository):
         result = await self.db.execute(query)
         records = result.all()
 
+        # Token para pedir la página siguiente (None si ya no hay más)
+        next_cursor = None
+        if len(records) == limit:
+            ultimo = records[-1][0]
+            next_cursor = encode_cursor(
+                [ultimo.codigo, ultimo.tabla_maestra_detalle_id]
+            )
+
         # Añadir total_pages y username a cada instancia
         result_list = []
         for record, username in records:
             record.total_pages = total_pages
+            record.next_cursor = next_cursor
             record.created_by = username
             result_list.append(record)
 
@@ -28,11 +28,12 @@ async def get_all_and_search(
     nombre_gasto: str = None,
     fecha_emision: str = None,
     gasto_id: str = None,
+    cursor: str = None,
     service: GastoService = Depends(),
 ):
     try:
         return await service.get_all_and_search(
-            limit, offset, nombre_gasto, fecha_emision, gasto_id
+            limit, offset, nombre_gasto, fecha_emision, gasto_id, cursor
         )
     except HTTPException as e:
         return ORJSONResponse(
@@ -44,10 +44,11 @@ async def get_all_and_search(
     limit: int = 10,
     offset: int = 1,
     nombre: str = None,
+    cursor: str = None,
     service: RolService = Depends(),
 ):
     try:
-        return await service.get_all_and_search(limit, offset, nombre)
+        return await service.get_all_and_search(limit, offset, nombre, cursor)
     except HTTPException as e:
         return ORJSONResponse(
             status_code=e.status_code,
@@ -23,6 +23,7 @@ async def get_all_and_search(
     offset: int = 1,
     username: str = None,
     email: str = None,
+    cursor: str = None,
     service: UsuarioService = Depends(),
 ):
     try:
@@ -31,6 +32,7 @@ async def get_all_and_search(
             offset,
             username,
             email,
+            cursor,
         )
     except HTTPException as e:
         return ORJSONResponse(
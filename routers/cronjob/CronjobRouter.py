@@ -17,11 +17,20 @@ import asyncio
 from config.redis import (
     redis_manager,
     Job,
+    JOBS_CHANNEL,
+    STATUS_CHANNEL,
+    apply_progress,
 )
+from config.artifact_store import artifact_store
+from config.artifact_render import artifact_renderer
+from config.export_snapshots import find_export
+from config.job_events import job_event_hub
 import orjson
 
 router = APIRouter()
 
+REPORTES_STATUS_KEY = "ActualizarTablasReportesCronjob_status"
+
 
 @router.get("/jobs/registered")
 async def list_registered_jobs():
@@ -273,127 +282,87 @@ async def force_check_scheduler(cronjob: CRONJOB):
 @router.websocket("/jobs/status/actualizacion_reportes")
 async def websocket_actualizacion_reportes_status(websocket: WebSocket):
     """
-    Envía de forma persistente (por websocket) el estado actual del cronjob de Actualización de Reportes
-    obtenido desde Redis. Se envían actualizaciones cada 3 segundos. Si no hay datos, se envía None.
+    Envía de forma persistente (por websocket) el estado actual del cronjob de
+    Actualización de Reportes: el valor guardado en Redis al conectar y luego
+    cada cambio publicado en jobs:status (sin polling).
     """
     await websocket.accept()
+    desconexion = asyncio.create_task(_esperar_desconexion(websocket))
     try:
-        while True:
-            try:
-                # Verificar si el websocket sigue conectado antes de cada operación
-                if websocket.client_state == WebSocketState.DISCONNECTED:
-                    logger.info("Cliente WebSocket desconectado, terminando bucle")
-                    break
-
-                status_key = "ActualizarTablasReportesCronjob_status"
-                client = redis_manager.get_client()
-                status_bytes = await client.get(status_key)
-                status_value_str = (
-                    status_bytes.decode("utf-8") if status_bytes is not None else None
-                )
-
-                if status_value_str is None or status_value_str == "":
-                    # Enviar un objeto vacío en lugar de None
-                    data = {"status": "Sin datos", "timestamp": "-"}
-                else:
-                    data = orjson.loads(status_value_str)
-
-                # Verificar nuevamente antes de enviar
-                if websocket.client_state == WebSocketState.DISCONNECTED:
-                    logger.info("Cliente desconectado antes de enviar datos")
-                    break
-
-                await websocket.send_json(data)
-            except WebSocketDisconnect:
-                logger.info("WebSocket desconectado durante el envío")
-                break
-            except RuntimeError as runtime_err:
-                if "Cannot call" in str(
-                    runtime_err
-                ) and "close message has been sent" in str(runtime_err):
-                    logger.info("WebSocket ya cerrado: %s", runtime_err)
-                    break
-                else:
-                    logger.error("Error de runtime: %s", runtime_err)
-                    break
-            except Exception as inner_e:
-                logger.error("Error obteniendo status: %s", inner_e)
-                try:
-                    # Verificar antes de enviar mensaje de error
-                    if websocket.client_state != WebSocketState.DISCONNECTED:
-                        await websocket.send_json(None)
-                except Exception:
-                    # Si falla al enviar, probablemente el socket ya está cerrado
-                    logger.info(
-                        "No se pudo enviar mensaje de error, posiblemente el socket ya está cerrado"
-                    )
-                    break
-
-            await asyncio.sleep(3)
+        # suscribirse antes de leer el valor inicial para no perder cambios
+        async with job_event_hub.subscribe(STATUS_CHANNEL) as queue:
+            await websocket.send_json(await _reportes_status())
+            while (evento := await _esperar_evento(queue, desconexion)) is not None:
+                if evento.get("key") == REPORTES_STATUS_KEY:
+                    await websocket.send_json(evento["value"])
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
+    except RuntimeError as runtime_err:
+        logger.info("WebSocket ya cerrado: %s", runtime_err)
     except Exception as e:
         logger.error("Error en websocket_actualizacion_reportes_status: %s", e)
     finally:
-        # Intentar cerrar limpiamente, pero solo si aún no está cerrado
-        if websocket.client_state != WebSocketState.DISCONNECTED:
-            try:
-                await websocket.close()
-            except RuntimeError:
-                pass  # Ignorar silenciosamente si ya está cerrado
+        desconexion.cancel()
+        await _cleanup_websocket(websocket)
+
+
+async def _reportes_status() -> dict:
+    status_bytes = await redis_manager.get_client().get(REPORTES_STATUS_KEY)
+    if not status_bytes:
+        # Enviar un objeto vacío en lugar de None
+        return {"status": "Sin datos", "timestamp": "-"}
+    return orjson.loads(status_bytes)
 
 
 @router.get("/download/{job_id}", response_class=StreamingResponse)
-async def download_job_result(job_id: str):
+async def download_job_result(
+    job_id: str,
+    format: str | None = Query(
+        None,
+        description="excel|xlsx, csv, orjson|json, parquet o arrow (por defecto el del job)",
+    ),
+):
     client = redis_manager.get_client()
     try:
-        # ZIP
-        if data := await client.get(f"job:{job_id}:zip"):
-            return StreamingResponse(
-                iter([data]),
-                media_type="application/x-zip-compressed",
-                headers={
-                    "Content-Disposition": f"attachment; filename=job_{job_id}.zip"
-                },
-            )
-
-        # EXCEL
-        if data := await client.get(f"job:{job_id}:buffer_excel"):
-            return StreamingResponse(
-                iter([data]),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={
-                    "Content-Disposition": f"attachment; filename=job_{job_id}.xlsx"
-                },
-            )
-
-        # CSV
-        if data := await client.get(f"job:{job_id}:buffer_csv"):
-            return StreamingResponse(
-                iter([data]),
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": f"attachment; filename=job_{job_id}.csv"
-                },
-            )
-
-        # ORJSON
-        if data := await client.get(f"job:{job_id}:buffer_orjson"):
-            return StreamingResponse(
-                iter([data]),
-                media_type="application/json",
-                headers={
-                    "Content-Disposition": f"attachment; filename=job_{job_id}.json"
-                },
-            )
-
-        raise HTTPException(404, "Job result not found or not completed yet")
+        manifest = await artifact_store.get_manifest(client, job_id)
+        if manifest is None:
+            meta = await redis_manager.get_job_meta(job_id)
+            if meta.get("artifact_evicted"):
+                # expulsado por el presupuesto de config/artifact_retention.py
+                raise HTTPException(410, "Job result was evicted, run the job again")
+            raise HTTPException(404, "Job result not found or not completed yet")
+        try:
+            # los datasets en Parquet se renderizan al formato pedido (con caché)
+            manifest = await artifact_renderer.resolve(client, job_id, manifest, format)
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
+        # Se envía chunk a chunk: el archivo nunca se carga completo en memoria
+        return StreamingResponse(
+            artifact_store.iter_chunks(client, job_id, manifest),
+            media_type=manifest["media_type"],
+            headers={
+                "Content-Disposition": f"attachment; filename={manifest['filename']}",
+                "Content-Length": str(manifest["size"]),
+            },
+        )
 
+    except HTTPException:
+        raise
     except Exception:
         logger.error("Error in download_job_result:\n%s", traceback.format_exc())
         raise HTTPException(500, "Internal server error")
 
 
+@router.get("/exports/{tabla}/{perfil}/{formato}", response_class=StreamingResponse)
+async def download_export(tabla: str, perfil: str, formato: str):
+    """Exportación pre-generada en la última recarga de `tabla` (kpi, cxc_pagos_fact...)."""
+    job_id = await find_export(tabla, perfil, formato, verificar_version=False)
+    if job_id is None:
+        raise HTTPException(404, "No hay una exportación pre-generada vigente")
+    return await download_job_result(job_id, format=None)
+
+
 @router.websocket("/jobs/utilidades")
 async def websocket_utilidades(
     websocket: WebSocket,
@@ -402,72 +371,125 @@ async def websocket_utilidades(
     search: str = Query(""),
     update_interval: int = Query(3, ge=1, le=30),
 ):
+    """
+    Envía la página de jobs al conectar y de nuevo solo cuando un evento de
+    jobs:events la cambia. Los eventos de los jobs de la página (status,
+    progreso) se aplican sobre la copia del cliente; la página se vuelve a
+    consultar solo si un job puede entrar (uno nuevo) o salir (caduca el TTL
+    de alguno). `update_interval` es el mínimo de segundos entre envíos: una
+    ráfaga de eventos se agrupa en un único envío.
+    """
     await websocket.accept()
     logger.info("WebSocket client connected")
+    desconexion = asyncio.create_task(_esperar_desconexion(websocket))
 
-    try:
-        while True:
-            # Verificar estado de conexión antes de procesar
-            if websocket.client_state == WebSocketState.DISCONNECTED:
-                logger.info("Client disconnected, exiting loop")
-                break
-            elif websocket.client_state == WebSocketState.CONNECTING:
-                logger.info("Client still connecting, waiting...")
-                await asyncio.sleep(1)
-                continue
-
-            # Solo procesar si está conectado
-            if websocket.client_state == WebSocketState.CONNECTED:
-                try:
-                    # Obtener trabajos tipados
-                    jobs: list[Job] = await redis_manager.get_all_jobs(
-                        search=search, page=page, page_size=page_size
-                    )
-
-                    # Añadir TTL a cada trabajo
-                    for job in jobs:
-                        ttl = await redis_manager.get_client().ttl(
-                            f"job:{job.job_id}:status"
-                        )
-                        job.expires_in = ttl if ttl > 0 else None
-
-                    # Convertir a dict para envío JSON
-                    jobs_dict = [job.model_dump() for job in jobs]
-
-                    # Verificar estado nuevamente antes de enviar
-                    if websocket.client_state == WebSocketState.CONNECTED:
-                        await websocket.send_json(jobs_dict)
-                    else:
-                        logger.info("Client disconnected before sending data")
-                        break
-
-                except Exception as e:
-                    logger.error("Error processing jobs: %s", e)
-                    await asyncio.sleep(1)
-                    # Solo enviar error si aún está conectado
-                    if websocket.client_state == WebSocketState.CONNECTED:
-                        try:
-                            await websocket.send_json([])
-                        except Exception as send_err:
-                            logger.error("Failed to send error response: %s", send_err)
-                            break
-            else:
-                # Estado no manejado explícitamente
-                logger.warning("Unexpected WebSocket state: %s", websocket.client_state)
-                break
+    async def consultar_pagina() -> list[dict]:
+        try:
+            # Obtener trabajos tipados (incluye el TTL en expires_in)
+            jobs: list[Job] = await redis_manager.get_all_jobs(
+                search=search, page=page, page_size=page_size
+            )
+            return [job.model_dump() for job in jobs]
+        except Exception as e:
+            logger.error("Error processing jobs: %s", e)
+            return []
 
-            # Esperar antes de la siguiente iteración
-            await asyncio.sleep(update_interval)
+    try:
+        async with job_event_hub.subscribe(JOBS_CHANNEL) as queue:
+            jobs_dict = await consultar_pagina()
+            consultada = asyncio.get_running_loop().time()
+            ultimo_envio = None
+            while True:
+                # Solo enviar si cambió algo más que el TTL
+                firma = [
+                    {k: v for k, v in job.items() if k != "expires_in"}
+                    for job in jobs_dict
+                ]
+                if firma != ultimo_envio:
+                    await websocket.send_json(jobs_dict)
+                    ultimo_envio = firma
+                enviado = asyncio.get_running_loop().time()
+
+                # el primer job de la página que caduca la cambia aunque no
+                # haya eventos
+                ttls = [j["expires_in"] for j in jobs_dict if j["expires_in"]]
+                caduca = None
+                if ttls:
+                    ahora = asyncio.get_running_loop().time()
+                    caduca = max(consultada + min(ttls) - ahora, 0)
+                evento = await _esperar_evento(queue, desconexion, timeout=caduca)
+                if evento is None:
+                    break
+                espera = update_interval - (asyncio.get_running_loop().time() - enviado)
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                eventos = [evento]
+                while not queue.empty():
+                    eventos.append(queue.get_nowait())
+
+                # sin payload = caducó un TTL de la página
+                reconsultar = False
+                for evento in eventos:
+                    reconsultar |= not evento or _aplicar_evento(jobs_dict, evento)
+                if reconsultar:
+                    jobs_dict = await consultar_pagina()
+                    consultada = asyncio.get_running_loop().time()
 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected gracefully")
     except Exception as e:
         logger.error("Unexpected WebSocket error: %s", e)
     finally:
+        desconexion.cancel()
         # Limpieza: cerrar solo si no está ya desconectado
         await _cleanup_websocket(websocket)
 
 
+async def _esperar_desconexion(websocket: WebSocket):
+    """Termina cuando el cliente cierra el websocket (descarta lo que envíe)."""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+async def _esperar_evento(
+    queue: asyncio.Queue, desconexion: asyncio.Task, timeout: float | None = None
+) -> dict | None:
+    """
+    Siguiente evento de la cola, o None si el cliente se desconectó antes.
+    Con `timeout`, un dict vacío si pasan esos segundos sin eventos.
+    """
+    if desconexion.done():
+        return None
+    siguiente = asyncio.create_task(queue.get())
+    await asyncio.wait(
+        {siguiente, desconexion},
+        timeout=timeout,
+        return_when=asyncio.FIRST_COMPLETED,
+    )
+    if not siguiente.done():
+        siguiente.cancel()
+        return None if desconexion.done() else {}
+    return siguiente.result()
+
+
+def _aplicar_evento(jobs: list[dict], evento: dict) -> bool:
+    """
+    Aplica un evento de jobs:events a la página `jobs`. Devuelve True si hay
+    que volver a consultarla: un job nuevo (pending) puede entrar en ella.
+    """
+    job = next((j for j in jobs if j["job_id"] == evento.get("job_id")), None)
+    if job is None:
+        return evento.get("status") == "pending"
+    if "progress" in evento:
+        job["progress"] = apply_progress(job["progress"], evento["progress"])
+    if status := evento.get("status"):
+        job["status"] = status
+        job["download_link"] = (
+            f"/cronjob/download/{job['job_id']}" if status == "completed" else None
+        )
+    return False
+
+
 async def _cleanup_websocket(websocket: WebSocket):
     """
     Función auxiliar para limpiar la conexión WebSocket de manera segura.
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from services.datamart.KPIRollupMensualService import KPIRollupMensualService
+from schemas.datamart.KPIRollupSchema import KPIRollupQuerySchema, KPIRollupSchema
+from fastapi.responses import ORJSONResponse
+from typing import Annotated
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[KPIRollupSchema], response_class=ORJSONResponse)
+async def get_totales(
+    params: Annotated[KPIRollupQuerySchema, Query()],
+    service: KPIRollupMensualService = Depends(),
+):
+    """
+    Totales de ColocacionSoles, IngresosSoles, Utilidad y CostosFondoSoles desde
+    kpi_rollup_mensual, re-agregados a las `dimensiones` pedidas.
+    """
+    try:
+        return await service.get_totales(params)
+    except HTTPException as e:
+        return ORJSONResponse(
+            status_code=e.status_code,
+            content={"detail": e.detail},
+        )
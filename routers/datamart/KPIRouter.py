@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from services.datamart.KPIService import KPIService
 from schemas.datamart.KPISchema import (
     KPISchema,
 )
-from fastapi.responses import ORJSONResponse
-from typing import Literal
+from schemas.datamart.KPISchema import KPIQuerySchema
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Annotated, Literal
+from utils.streaming import EXPORT_MEDIA_TYPES
 
 router = APIRouter()
 
@@ -20,10 +22,54 @@ async def get_all(limit: int = 10, offset: int = 0, service: KPIService = Depend
 @router.get("/file/{tipo}", response_class=ORJSONResponse)
 async def get_all_to_file(
     service: KPIService = Depends(),
-    tipo: Literal["excel", "csv"] = "excel",
+    tipo: Literal["excel", "csv", "parquet", "arrow"] = "excel",
     informe: str | None = None,
 ):
     try:
         return await service.get_all_to_file(tipo=tipo, informe=informe)
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         return {"message": str(e), "success": False}
+
+
+@router.get("/query", response_class=StreamingResponse)
+async def query(
+    params: Annotated[KPIQuerySchema, Query()],
+    service: KPIService = Depends(),
+):
+    """
+    Filtros por FechaOperacionDesde/Hasta, Mes, Ejecutivo, RUCPagador, RUCCliente,
+    CodigoLiquidacion, Moneda y TipoOperacion; proyección con `columnas` y orden
+    con `orden` (prefijo "-" = descendente). La respuesta se transmite en lotes.
+    """
+    try:
+        return StreamingResponse(service.query(params), media_type="application/json")
+    except HTTPException as e:
+        return ORJSONResponse(
+            status_code=e.status_code,
+            content={"detail": e.detail},
+        )
+
+
+@router.get("/export/{formato}", response_class=StreamingResponse)
+async def export(
+    formato: Literal["csv", "ndjson", "xlsx"],
+    params: Annotated[KPIQuerySchema, Query()],
+    service: KPIService = Depends(),
+):
+    """
+    Mismos filtros que /query; el archivo se transmite directo desde el cursor
+    de la base de datos (sin job ni Redis).
+    """
+    try:
+        return StreamingResponse(
+            service.export(params, formato),
+            media_type=EXPORT_MEDIA_TYPES[formato],
+            headers={"Content-Disposition": f"attachment; filename=kpi.{formato}"},
+        )
+    except HTTPException as e:
+        return ORJSONResponse(
+            status_code=e.status_code,
+            content={"detail": e.detail},
+        )
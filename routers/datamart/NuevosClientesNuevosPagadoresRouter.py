@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from services.datamart.NuevosClientesNuevosPagadoresService import (
     NuevosClientesNuevosPagadoresService,
 )
 
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from utils.streaming import EXPORT_MEDIA_TYPES
 from typing import Literal
 
 
@@ -13,9 +14,29 @@ router = APIRouter()
 @router.get("/file/{tipo}", response_class=ORJSONResponse)
 async def get_all_to_file(
     service: NuevosClientesNuevosPagadoresService = Depends(),
-    tipo: Literal["excel", "csv"] = "excel",
+    tipo: Literal["excel", "csv", "parquet", "arrow"] = "excel",
 ):
     try:
         return await service.get_all_to_file(tipo=tipo)
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         return {"message": str(e), "success": False}
+
+
+@router.get("/export/{formato}", response_class=StreamingResponse)
+async def export(
+    formato: Literal["csv", "ndjson", "xlsx"],
+    service: NuevosClientesNuevosPagadoresService = Depends(),
+):
+    """Tabla completa transmitida directo desde el cursor de la base de datos."""
+    try:
+        return StreamingResponse(
+            service.export(formato),
+            media_type=EXPORT_MEDIA_TYPES[formato],
+            headers={
+                "Content-Disposition": f"attachment; filename=nuevos_clientes_nuevos_pagadores.{formato}"
+            },
+        )
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
@@ -58,6 +58,8 @@ async def calcular_comisiones(
         #     media_type="application/x-zip-compressed",
         #     headers={"Content-Disposition": f"attachment; filename={zip_filename}"},
         # )
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         error_trace = traceback.format_exc()
         print(error_trace)
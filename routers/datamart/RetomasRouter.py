@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import ORJSONResponse
 from services.datamart.RetomasService import RetomasService
 import traceback
@@ -35,6 +35,8 @@ async def calcular_retomas(
                 else None
             )
         )
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         error_trace = traceback.format_exc()
         logger.warning(error_trace)
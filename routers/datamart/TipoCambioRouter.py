@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, UploadFile, File
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from services.datamart.TipoCambioService import TipoCambioService
 from schemas.datamart.TipoCambioSchema import (
     TipoCambioPostRequestSchema,
     TipoCambioSchema,
 )
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from typing import Literal
+from utils.streaming import EXPORT_MEDIA_TYPES
 
 router = APIRouter()
 
@@ -26,10 +28,30 @@ async def obtener_todos_con_filtro_fecha(
 async def get_all_to_csv(service: TipoCambioService = Depends()):
     try:
         return await service.get_all_to_csv()
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         return {"message": str(e), "success": False}
 
 
+@router.get("/export/{formato}", response_class=StreamingResponse)
+async def export(
+    formato: Literal["csv", "ndjson", "xlsx"],
+    service: TipoCambioService = Depends(),
+):
+    """Tabla completa transmitida directo desde el cursor de la base de datos."""
+    try:
+        return StreamingResponse(
+            service.export(formato),
+            media_type=EXPORT_MEDIA_TYPES[formato],
+            headers={
+                "Content-Disposition": f"attachment; filename=tipo_cambio.{formato}"
+            },
+        )
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
+
+
 @router.post("")
 async def create_many_tipo_cambios(
     input: list[TipoCambioPostRequestSchema], service: TipoCambioService = Depends()
@@ -22,6 +22,7 @@ async def get_all_and_search(
     tabla_maestra_id: str = None,
     tabla_nombre: str = None,
     tipo: str = None,
+    cursor: str = None,
     service: TablaMaestraDetalleService = Depends(),
 ):
     try:
@@ -34,6 +35,7 @@ async def get_all_and_search(
             tabla_maestra_id,
             tabla_nombre,
             tipo,
+            cursor,
         )
     except HTTPException as e:
         return ORJSONResponse(
@@ -48,6 +50,7 @@ async def get_all_and_search(
             content={"detail": str(e), "traceback": error_trace},
         )
 
+
 @router.get(
     "/{tabla_maestra_detalle_id}", response_model=TablaMaestraDetalleOutputSchema
 )
@@ -69,6 +72,7 @@ async def get_by_id(
             content={"detail": str(e), "traceback": error_trace},
         )
 
+
 @router.post("", response_model=TablaMaestraDetalleOutputSchema)
 async def create(
     input: TablaMaestraDetalleCreateSchema,
@@ -104,4 +108,4 @@ async def update_tabla_maestra_detalle(
         return ORJSONResponse(
             status_code=500,
             content={"detail": str(e), "traceback": error_trace},
-        )
\ No newline at end of file
+        )
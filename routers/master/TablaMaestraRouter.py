@@ -18,10 +18,13 @@ async def get_all_and_search(
     offset: int = 1,
     tabla_nombre: str = None,
     tipo: str = None,
+    cursor: str = None,
     service: TablaMaestraService = Depends(),
 ):
     try:
-        return await service.get_all_and_search(limit, offset, tabla_nombre, tipo)
+        return await service.get_all_and_search(
+            limit, offset, tabla_nombre, tipo, cursor
+        )
     except HTTPException as e:
         return ORJSONResponse(
             status_code=e.status_code,
@@ -35,6 +38,7 @@ async def get_all_and_search(
             content={"detail": str(e), "traceback": error_trace},
         )
 
+
 @router.get("/{tabla_maestra_id}", response_model=TablaMaestraOutputSchema)
 async def get_by_id(tabla_maestra_id: str, service: TablaMaestraService = Depends()):
     try:
@@ -52,6 +56,7 @@ async def get_by_id(tabla_maestra_id: str, service: TablaMaestraService = Depend
             content={"detail": str(e), "traceback": error_trace},
         )
 
+
 @router.post("", response_model=TablaMaestraOutputSchema)
 async def create(
     input: TablaMaestraCreateSchema, service: TablaMaestraService = Depends()
@@ -84,4 +89,4 @@ async def update_tabla_maestra(
         return ORJSONResponse(
             status_code=500,
             content={"detail": str(e), "traceback": error_trace},
-        )
\ No newline at end of file
+        )
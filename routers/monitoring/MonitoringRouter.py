@@ -0,0 +1,49 @@
+import os
+from fastapi import APIRouter, Query
+from fastapi.responses import ORJSONResponse
+from config.db_pool import pool_metrics, pool_profile
+from config.artifact_retention import artifact_retention
+from config.job_executor import job_executor
+from config.job_progress import get_job_timings
+from config.redis import redis_manager
+from config.settings import settings
+
+router = APIRouter()
+
+
+@router.get("/pools", response_class=ORJSONResponse)
+async def get_pool_metrics():
+    """
+    Métricas de los pools de conexión de este proceso (cada worker de uvicorn
+    tiene los suyos; `pid` identifica cuál respondió). Los tiempos de espera
+    son acumulados desde el arranque, en histograma acumulativo (ms).
+    """
+    perfil = pool_profile()
+    perfil.pop("connect_args", None)
+    return {
+        "pid": os.getpid(),
+        "process_type": settings.PROCESS_TYPE,
+        "perfil": perfil,
+        "engines": pool_metrics.snapshot(),
+    }
+
+
+@router.get("/jobs", response_class=ORJSONResponse)
+async def get_job_executor_metrics():
+    """Jobs de create_job admitidos (en curso + en cola) en este proceso, por tipo."""
+    return {"pid": os.getpid(), **job_executor.snapshot()}
+
+
+@router.get("/artifacts", response_class=ORJSONResponse)
+async def get_artifact_usage():
+    """Bytes de artefactos de jobs en Redis frente al presupuesto de retención."""
+    return await artifact_retention.usage(redis_manager.get_client())
+
+
+@router.get("/jobs/timings", response_class=ORJSONResponse)
+async def get_job_stage_timings(
+    name: str = Query(..., description="Nombre del job o de la tarea de Celery"),
+    limit: int = Query(20, ge=1, le=50),
+):
+    """Tiempos por etapa (s) de las últimas ejecuciones, más recientes primero."""
+    return await get_job_timings(name, limit)
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from services.toolbox.DiferidoService import DiferidoService
 from fastapi.responses import ORJSONResponse
 import traceback
@@ -23,6 +23,8 @@ async def calcular_diferido(
             file=archivos, hasta=diferido.hasta
         )
         return response_diferido
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         error_trace = traceback.format_exc()
         print(error_trace)
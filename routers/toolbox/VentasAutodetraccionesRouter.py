@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
 from services.toolbox.VentasAutodetraccionesService import VentasAutodetraccionesService
 from fastapi.responses import ORJSONResponse, StreamingResponse
 import traceback
@@ -29,6 +29,8 @@ async def calcular_ventas_autodetracciones(
         )
         # Devuelve el archivo Excel como respuesta de streaming
         return response_ventas_autodetracciones
+    except HTTPException as e:
+        return ORJSONResponse(status_code=e.status_code, content={"detail": e.detail})
     except Exception as e:
         error_trace = traceback.format_exc()
         logger.error(error_trace)
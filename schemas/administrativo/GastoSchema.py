@@ -129,6 +129,7 @@ class GastoOutputSchema(BaseOutputSchema):
 class GastoSearchOutputSchema(GastoOutputSchema):
     proveedor: ProveedorOutputSchema | None = None
     total_pages: int
+    next_cursor: str | None = None
 
 
 class GastoUpdateOtrosSchema(BaseUpdateSchema):
@@ -14,6 +14,7 @@ class RolOutputSchema(BaseOutputSchema):
 
 class RolSearchOutputSchema(RolOutputSchema):
     total_pages: int
+    next_cursor: str | None = None
 
 
 class RolUpdateSchema(BaseUpdateSchema):
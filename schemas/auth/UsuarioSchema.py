@@ -27,6 +27,7 @@ class UsuarioOutputSearchSchema(BaseOutputSchema):
     email: EmailStr
     hashed_password: str = Field(min_length=8, max_length=255)
     total_pages: int | None = None
+    next_cursor: str | None = None
     rol: RolSubmodulosOutputSchema | None = None
 
 
@@ -0,0 +1,43 @@
+from pydantic import BaseModel
+from typing import Literal
+
+KPIRollupDimension = Literal["Mes", "Ejecutivo", "Sector", "TipoOperacion", "Moneda"]
+
+
+class KPIRollupQuerySchema(BaseModel):
+    """
+    Parámetros de /datamart/kpi-rollup. `dimensiones` define el grano de la
+    respuesta; por defecto el grano completo del rollup.
+    """
+
+    dimensiones: list[KPIRollupDimension] = [
+        "Mes",
+        "Ejecutivo",
+        "Sector",
+        "TipoOperacion",
+        "Moneda",
+    ]
+    MesDesde: str | None = None
+    MesHasta: str | None = None
+    Ejecutivo: list[str] | None = None
+    Sector: list[str] | None = None
+    TipoOperacion: list[str] | None = None
+    Moneda: list[str] | None = None
+
+    def filtros(self) -> dict[str, list[str]]:
+        campos = ("Ejecutivo", "Sector", "TipoOperacion", "Moneda")
+        return {c: getattr(self, c) for c in campos if getattr(self, c)}
+
+
+class KPIRollupSchema(BaseModel):
+    Mes: str | None = None
+    Ejecutivo: str | None = None
+    Sector: str | None = None
+    TipoOperacion: str | None = None
+    Moneda: str | None = None
+    ColocacionSoles: float
+    IngresosSoles: float
+    Utilidad: float
+    CostosFondoSoles: float
+    Operaciones: int
+    Documentos: int
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
 import pandas as pd
 
@@ -126,3 +126,41 @@ class KPISchema(BaseModel):
             return 0
 
         return value
+
+
+class KPIQuerySchema(BaseModel):
+    """
+    Parámetros de /query para kpi y kpi_acumulado. Los filtros de igualdad
+    aceptan varios valores (?Ejecutivo=A&Ejecutivo=B → IN) y están cubiertos
+    por los índices compuestos de ambas tablas.
+    """
+
+    FechaOperacionDesde: datetime | None = None
+    FechaOperacionHasta: datetime | None = None
+    Mes: list[str] | None = None
+    Ejecutivo: list[str] | None = None
+    RUCPagador: list[str] | None = None
+    RUCCliente: list[str] | None = None
+    CodigoLiquidacion: list[str] | None = None
+    Moneda: list[str] | None = None
+    TipoOperacion: list[str] | None = None
+    columnas: list[str] | None = None
+    orden: list[str] = ["-FechaOperacion"]
+    limit: int | None = Field(default=None, ge=1)
+
+    def filtros(self) -> dict[str, list[str]]:
+        campos = (
+            "Mes",
+            "Ejecutivo",
+            "RUCPagador",
+            "RUCCliente",
+            "CodigoLiquidacion",
+            "Moneda",
+            "TipoOperacion",
+        )
+        return {c: getattr(self, c) for c in campos if getattr(self, c)}
+
+    def rangos(self) -> dict[str, tuple]:
+        if self.FechaOperacionDesde is None and self.FechaOperacionHasta is None:
+            return {}
+        return {"FechaOperacion": (self.FechaOperacionDesde, self.FechaOperacionHasta)}
@@ -25,3 +25,4 @@ class TablaMaestraDetalleUpdateSchema(BaseUpdateSchema):
 
 class TablaMaestraDetalleSearchOutputSchema(TablaMaestraDetalleOutputSchema):
     total_pages: int
+    next_cursor: str | None = None
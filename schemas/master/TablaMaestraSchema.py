@@ -20,3 +20,4 @@ class TablaMaestraUpdateSchema(BaseUpdateSchema):
 
 class TablaMaestraSearchOutputSchema(TablaMaestraOutputSchema):
     total_pages: int
+    next_cursor: str | None = None
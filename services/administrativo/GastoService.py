@@ -65,9 +65,10 @@ class GastoService:
         nombre_gasto: str = None,
         fecha_emision: str = None,
         gasto_id: str = None,
+        cursor: str = None,
     ) -> list[GastoModel]:
         return await self.gasto_repository.get_all_and_search(
-            limit, offset, nombre_gasto, fecha_emision, gasto_id
+            limit, offset, nombre_gasto, fecha_emision, gasto_id, cursor
         )
 
     async def create_gasto_con_archivos(
@@ -39,8 +39,9 @@ class RolService:
         limit: int = 10,
         offset: int = 1,
         nombre: str = None,
+        cursor: str = None,
     ) -> list[RolModel]:
-        return await self.service.get_all_and_search(limit, offset, nombre)
+        return await self.service.get_all_and_search(limit, offset, nombre, cursor)
 
     async def obtener_roles_con_permisos(
         self,
@@ -120,9 +120,10 @@ class UsuarioService:
         offset: int = 1,
         username: str = None,
         email: str = None,
+        cursor: str = None,
     ) -> list[dict]:
         return await self.usuario_repository.get_all_and_search(
-            limit, offset, username, email
+            limit, offset, username, email, cursor
         )
 
     async def asignar_rol(
@@ -0,0 +1,25 @@
+from repositories.datamart.KPIRollupMensualRepository import (
+    KPIRollupMensualRepository,
+    DIMENSIONES,
+)
+from models.datamart.KPIRollupMensualModel import KPIRollupMensualModel
+from schemas.datamart.KPIRollupSchema import KPIRollupQuerySchema
+from fastapi import Depends
+from services.BaseService import BaseService
+
+
+class KPIRollupMensualService(BaseService[KPIRollupMensualModel]):
+    def __init__(
+        self, kpi_rollup_mensual_repository: KPIRollupMensualRepository = Depends()
+    ):
+        self.kpi_rollup_mensual_repository = kpi_rollup_mensual_repository
+
+    async def get_totales(self, params: KPIRollupQuerySchema) -> list[dict]:
+        # Orden canónico y sin duplicados, venga como venga en la query
+        dimensiones = [d for d in DIMENSIONES if d in params.dimensiones]
+        return await self.kpi_rollup_mensual_repository.get_totales(
+            dimensiones=dimensiones,
+            filtros=params.filtros(),
+            mes_desde=params.MesDesde,
+            mes_hasta=params.MesHasta,
+        )
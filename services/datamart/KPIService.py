@@ -1,13 +1,17 @@
 from repositories.datamart.KPIRepository import KPIRepository
 from models.datamart.KPIModel import KPIModel
 from fastapi import Depends
-import pandas as pd 
+import pandas as pd
 from typing import Literal
 from utils.decorators import create_job
-from io import BytesIO
 import asyncio
 from services.BaseService import BaseService
+from schemas.datamart.KPISchema import KPIQuerySchema
+from config.db_mysql import sessionmanager
+from utils.streaming import export_stream, orjson_array_stream
 from config.logger import logger
+from config.export_snapshots import find_export
+from utils.export_profiles import get_export_profile
 
 
 class KPIService(BaseService[KPIModel]):
@@ -17,137 +21,90 @@ class KPIService(BaseService[KPIModel]):
     async def get_all(self, limit: int = 10, offset: int = 0) -> list[KPIModel]:
         return await self.kpi_repository.get_all(limit, offset)
 
+    def _select(self, params: KPIQuerySchema):
+        """SELECT filtrado y proyectado (HTTPException 400 ante columnas inválidas)."""
+        return self.kpi_repository.filtered_select(
+            filtros=params.filtros(),
+            rangos=params.rangos(),
+            columnas=params.columnas,
+            orden=params.orden,
+            limit=params.limit,
+        )
+
+    def query(self, params: KPIQuerySchema, batch_size: int = 1000):
+        """
+        Consulta filtrada y proyectada; devuelve un iterador de bytes con el
+        array JSON para StreamingResponse. Los parámetros se validan antes de
+        empezar a transmitir (HTTPException 400 ante columnas inválidas).
+        """
+        stmt = self._select(params)
+        return orjson_array_stream(
+            self.kpi_repository.stream_select(stmt, sessionmanager, batch_size)
+        )
+
+    def export(self, params: KPIQuerySchema, formato: str, batch_size: int = 5000):
+        """
+        Igual que query pero en CSV, NDJSON o xlsx: los lotes del cursor se codifican
+        y envían a medida que llegan, sin pasar por DataFrame ni Redis.
+        """
+        stmt = self._select(params)
+        return export_stream(
+            self.kpi_repository.stream_select(stmt, sessionmanager, batch_size),
+            formato,
+            [c.name for c in stmt.selected_columns],
+        )
+
     async def create_many(self, input: list[dict]):
         await self.kpi_repository.create_many(input)
 
     async def delete_all(self):
         await self.kpi_repository.delete_all()
 
+    async def get_all_to_file(
+        self,
+        tipo: Literal["excel", "csv", "parquet", "arrow"] = "excel",
+        informe: str | None = None,
+    ) -> dict:
+        # exportación pre-generada en la última recarga, si la tabla no cambió
+        perfil = "informe" if informe else "completo"
+        if job_id := await find_export("kpi", perfil, tipo):
+            return {
+                "job_id": job_id,
+                "success": "Conforme a lo esperado",
+                "format": tipo,
+            }
+        return await self._generar_archivo(tipo=tipo, informe=informe)
+
     @create_job(
         name="Calcular KPI",
         description="Generar un excel con los KPI calculados",
         expire=60 * 10 * 1,
         is_buffer=True,
-        save_as=["excel", "csv"],
+        save_as=["excel", "csv", "parquet", "arrow"],
         capture_params=True,
+        cache_tables=["kpi"],
     )
-    async def get_all_to_file(
+    async def _generar_archivo(
         self,
-        tipo: Literal["excel", "csv"] = "excel",
+        tipo: Literal["excel", "csv", "parquet", "arrow"] = "excel",
         informe: str | None = None,
-    ) -> BytesIO:
+    ) -> pd.DataFrame:
         # 1) Traer todos los registros
         # records: list[KPIModel] = await self.kpi_repository.get_all(
         #     limit=None, offset=0
         # )
-        # 1) Traer todos los registros como lista de dicts (sin pk)
-        rows = await self.kpi_repository.get_all_dicts(exclude_pk=True)
+        # 1) Traer los registros como lista de dicts (sin pk); el informe
+        #    proyecta en el SELECT solo sus columnas, ya en orden
+        perfil = get_export_profile("kpi", "informe") if informe else None
+        rows = await self.kpi_repository.get_all_dicts(exclude_pk=True, perfil=perfil)
 
         # 2) Construir el DataFrame en un hilo
         def _build_df():
             # df = pd.DataFrame([r.to_dict() for r in records])
-            df = pd.DataFrame(rows) if rows else pd.DataFrame()
-            if informe:
-                columnas_esperadas = [
-                    "CodigoLiquidacion",
-                    "CodigoSolicitud",
-                    "RUCCliente",
-                    "RazonSocialCliente",
-                    "RUCPagador",
-                    "RazonSocialPagador",
-                    "Moneda",
-                    "DeudaAnterior",
-                    "ObservacionLiquidacion",
-                    "ObservacionSolicitud",
-                    "FlagPagoInteresConfirming",
-                    "FechaInteresConfirming",
-                    "TipoOperacion",
-                    "Estado",
-                    "NroDocumento",
-                    "TasaNominalMensualPorc",
-                    "FinanciamientoPorc",
-                    "FechaConfirmado",
-                    "FechaOperacion",
-                    "DiasEfectivo",
-                    "NetoConfirmado",
-                    "FondoResguardo",
-                    "MontoComisionEstructuracion",
-                    "ComisionEstructuracionIGV",
-                    "ComisionEstructuracionConIGV",
-                    "MontoCobrar",
-                    "Interes",
-                    "InteresConIGV",
-                    "GastosContrato",
-                    "GastoVigenciaPoder",
-                    "ServicioCobranza",
-                    "ServicioCustodia",
-                    "GastosDiversosIGV",
-                    "GastosDiversosConIGV",
-                    "MontoTotalFacturado",
-                    "MontoDesembolso",
-                    "FacturasGeneradas",
-                    "Ejecutivo",
-                    "FechaPago",
-                    "DiasMora",
-                    "MontoCobrarPago",
-                    "MontoPago",
-                    "InteresPago",
-                    "GastosPago",
-                    "TipoPago",
-                    "SaldoDeuda",
-                    "ExcesoPago",
-                    "ObservacionPago",
-                    "FechaDesembolso",
-                    "MontoDevolucion",
-                    "DescuentoDevolucion",
-                    "EstadoDevolucion",
-                    "ObservacionDevolucion",
-                    "Anticipo",
-                    "TramoAnticipo",
-                    "FueraSistema",
-                    "GastosDiversosSinIGV",
-                    "Total factura Mora",
-                    "Mes",
-                    "Año",
-                    "MesAño",
-                    "Sector",
-                    "GrupoEco",
-                    "Referencia",
-                    "TipoCambioFecha",
-                    "TipoCambioCompra",
-                    "TipoCambioVenta",
-                    "ColocacionSoles",
-                    "MontoDesembolsoSoles",
-                    "Ingresos",
-                    "IngresosSoles",
-                    "MesSemana",
-                    "CostosFondo",
-                    "TotalIngresos",
-                    "CostosFondoSoles",
-                    "TotalIngresosSoles",
-                    "MontoPagoSoles",
-                    "Utilidad",
-                ]
-
-                for col in columnas_esperadas:
-                    if col not in df.columns:
-                        df[col] = None
-                df = df[columnas_esperadas]
-            return df
-
-        df = await asyncio.to_thread(_build_df)
-
-        # 3) Escribir el buffer en un hilo
-        def _write_buffer() -> BytesIO:
-            buf = BytesIO()
-            if tipo.lower() == "csv":
-                csv_text = df.to_csv(index=False)
-                buf.write(csv_text.encode("utf-8"))
-            else:
-                with pd.ExcelWriter(buf, engine="xlsxwriter") as writer:
-                    df.to_excel(writer, index=False, sheet_name="Sheet1")
-            buf.seek(0)
-            return buf
+            if not rows:
+                return pd.DataFrame(columns=perfil.encabezados if perfil else None)
+            return pd.DataFrame(rows)
 
-        buffer = await asyncio.to_thread(_write_buffer)
-        return buffer
+        # 3) Se guarda el dataset; el archivo (tipo u otro formato) se genera
+        #    al descargarlo, ver config/artifact_render.py
+        return await asyncio.to_thread(_build_df)
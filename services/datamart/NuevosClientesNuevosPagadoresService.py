@@ -6,11 +6,11 @@ from models.datamart.NuevosClientesNuevosPagadoresModel import (
 )
 from fastapi import Depends
 from utils.decorators import create_job
-from io import BytesIO
 from typing import Literal
-import asyncio
 import polars as pl
 from services.BaseService import BaseService
+from config.db_mysql import sessionmanager
+from utils.streaming import export_stream
 
 
 class NuevosClientesNuevosPagadoresService(
@@ -24,38 +24,33 @@ class NuevosClientesNuevosPagadoresService(
             nuevos_clientes_nuevos_pagadores_repository
         )
 
+    def export(self, formato: str, batch_size: int = 5000):
+        """Tabla completa en CSV, NDJSON o xlsx, transmitida lote a lote desde el cursor."""
+        repo = self.nuevos_clientes_nuevos_pagadores_repository
+        stmt = repo.filtered_select()
+        return export_stream(
+            repo.stream_select(stmt, sessionmanager, batch_size),
+            formato,
+            [c.name for c in stmt.selected_columns],
+        )
+
     @create_job(
         name="Calcular Nuevos Clientes Nuevos Pagadores",
         description="Generar un excel con los Nuevos Clientes Nuevos Pagadores calculados",
         expire=60 * 10 * 1,
         is_buffer=True,
-        save_as=["excel", "csv"],
+        save_as=["excel", "csv", "parquet", "arrow"],
         capture_params=True,
+        cache_tables=["nuevos_clientes_nuevos_pagadores"],
     )
-    async def get_all_to_file(self, tipo: Literal["excel", "csv"] = "excel") -> BytesIO:
+    async def get_all_to_file(
+        self, tipo: Literal["excel", "csv", "parquet", "arrow"] = "excel"
+    ) -> pl.DataFrame:
         # Obtener datos de la base de datos
         data_dicts = (
             await self.nuevos_clientes_nuevos_pagadores_repository.get_all_dicts()
         )
 
-        # Crear DataFrame con polars para mejor performance
-        df = pl.DataFrame(data_dicts)
-
-        def _write_buffer() -> BytesIO:
-            """Función para escribir el buffer usando polars"""
-            buf = BytesIO()
-
-            if tipo.lower() == "csv":
-                # Escribir CSV con polars
-                csv_content = df.write_csv()
-                buf.write(csv_content.encode("utf-8"))
-            else:
-
-                df.write_excel(workbook=buf)
-
-            buf.seek(0)
-            return buf
-
-        # Ejecutar en thread separado para operaciones I/O
-        buffer = await asyncio.to_thread(_write_buffer)
-        return buffer
+        # Se guarda el dataset; el archivo en `tipo` (u otro formato) se genera
+        # al descargarlo
+        return pl.DataFrame(data_dicts)
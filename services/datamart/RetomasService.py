@@ -6,7 +6,26 @@ from repositories.datamart.KPIAcumuladoRepository import KPIAcumuladoRepository
 import pandas as pd
 from utils.decorators import create_job
 from io import BytesIO
-import asyncio
+from config.job_executor import job_executor
+from config.job_progress import job_progress
+
+
+def _retomas_excel(kpi_acumulado_rows: list[dict], fecha_corte: datetime) -> BytesIO:
+    """Cálculo y Excel de retomas; corre en el pool de procesos de job_executor."""
+    progreso = job_progress()
+    with progreso.stage("Calculo"):
+        # Crear la instancia de RetomasCalcular pasando el DataFrame
+        retomas_calcular = RetomasCalcular(pd.DataFrame(kpi_acumulado_rows))
+        resultado_retomas_calcular_df = pd.DataFrame(
+            retomas_calcular.calcular_retomas(fecha_corte)
+        )
+    with progreso.stage("Excel"):
+        excel_buffer = BytesIO()
+        resultado_retomas_calcular_df.to_excel(
+            excel_buffer, engine="xlsxwriter", index=False
+        )
+    excel_buffer.seek(0)
+    return excel_buffer
 
 
 class RetomasService:
@@ -38,22 +57,16 @@ class RetomasService:
         capture_params=True,
     )
     async def calcular_retomas(self, fecha_corte: datetime):
-        kpi_acumulado_df = pd.DataFrame(
-            await self.kpi_acumulado_repository.get_all_dicts(exclude_pk=True)
-        )
+        progreso = job_progress()
+        with progreso.stage("Lectura"):
+            kpi_acumulado_rows = await self.kpi_acumulado_repository.get_all_dicts(
+                exclude_pk=True
+            )
 
-        # Crear la instancia de RetomasCalcular pasando el DataFrame
-        retomas_calcular = RetomasCalcular(kpi_acumulado_df)
-        resultado_retomas_calcular_df = (
-            await retomas_calcular.calcular_retomas_async(fecha_corte, to_df=True)
-        )
-        excel_buffer = BytesIO()
-        await self.actualizar_tabla_retoma_cronjob.run(fecha_corte=fecha_corte)
-        await asyncio.to_thread(
-            resultado_retomas_calcular_df.to_excel,
-            excel_buffer,
-            engine="xlsxwriter",
-            index=False,
+        # El cálculo (pandas) y el Excel corren fuera del event loop
+        excel_buffer = await job_executor.run_cpu(
+            _retomas_excel, kpi_acumulado_rows, fecha_corte
         )
-        excel_buffer.seek(0)
+        with progreso.stage("Guardado"):
+            await self.actualizar_tabla_retoma_cronjob.run(fecha_corte=fecha_corte)
         return excel_buffer
@@ -7,6 +7,9 @@ from models.datamart.TipoCambioModel import TipoCambioModel
 import pandas as pd
 
 from utils.decorators import create_job
+from utils.data_version import bump_data_version
+from utils.streaming import export_stream
+from config.db_mysql import sessionmanager
 from typing import Literal
 from io import BytesIO
 import asyncio
@@ -26,9 +29,11 @@ class TipoCambioService:
 
     async def create_many(self, input: list[TipoCambioPostRequestSchema]):
         await self.tipo_cambio_repository.create_many([i.model_dump() for i in input])
+        await bump_data_version("tipo_cambio")
 
     async def delete_all(self):
         await self.tipo_cambio_repository.delete_all()
+        await bump_data_version("tipo_cambio")
 
     async def create_many_from_csv(self, file: UploadFile):
         df = pd.read_csv(file.file)
@@ -40,6 +45,16 @@ class TipoCambioService:
         ]
 
         await self.tipo_cambio_repository.create_many(validated_records)
+        await bump_data_version("tipo_cambio")
+
+    def export(self, formato: str, batch_size: int = 5000):
+        """Tabla completa en CSV, NDJSON o xlsx, transmitida lote a lote desde el cursor."""
+        stmt = self.tipo_cambio_repository.filtered_select(orden=["TipoCambioFecha"])
+        return export_stream(
+            self.tipo_cambio_repository.stream_select(stmt, sessionmanager, batch_size),
+            formato,
+            [c.name for c in stmt.selected_columns],
+        )
 
     @create_job(
         name="Generar CSV de Tipo Cambio",
@@ -48,6 +63,7 @@ class TipoCambioService:
         is_buffer=True,
         save_as=Literal["csv"],
         capture_params=True,
+        cache_tables=["tipo_cambio"],
     )
     async def get_all_to_csv(self) -> BytesIO:
         # 1) Obtener registros
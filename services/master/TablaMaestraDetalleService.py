@@ -60,7 +60,16 @@ class TablaMaestraDetalleService:
         tabla_maestra_id: str = None,
         tabla_nombre: str = None,
         tipo: str = None,
+        cursor: str = None,
     ) -> list[TablaMaestraDetalleModel]:
         return await self.service.get_all_and_search(
-            limit, offset, codigo, valor, descripcion
+            limit,
+            offset,
+            codigo,
+            valor,
+            descripcion,
+            tabla_maestra_id,
+            tabla_nombre,
+            tipo,
+            cursor,
         )
@@ -46,6 +46,8 @@ class TablaMaestraService:
         offset: int = 1,
         tabla_nombre: str = None,
         tipo: str = None,
-        
+        cursor: str = None,
     ) -> list[TablaMaestraModel]:
-        return await self.service.get_all_and_search(limit, offset, tabla_nombre, tipo)
+        return await self.service.get_all_and_search(
+            limit, offset, tabla_nombre, tipo, cursor
+        )
@@ -8,7 +8,23 @@ from utils.adelantafactoring.calculos.diferido.DiferidoCalcular import DiferidoC
 from utils.decorators import create_job
 from io import BytesIO
 from config.logger import logger
-import asyncio
+from config.job_executor import job_executor
+from config.job_progress import job_progress
+
+
+def _diferido_excel(file_bytes: bytes, kpi_rows: list[dict], hasta: str) -> BytesIO:
+    """Cálculo y Excel del diferido; corre en el pool de procesos de job_executor."""
+    progreso = job_progress()
+    with progreso.stage("Calculo"):
+        kpi_df = pd.DataFrame(kpi_rows)
+        logger.debug(f"DataFrame interno: {kpi_df.head()}")
+        diferido_calcular = DiferidoCalcular(BytesIO(file_bytes), kpi_df)
+        resultado = diferido_calcular.calcular_diferido(hasta)
+    with progreso.stage("Excel"):
+        excel_buffer = BytesIO()
+        resultado.to_excel(excel_buffer, engine="xlsxwriter")
+    excel_buffer.seek(0)
+    return excel_buffer
 
 
 class DiferidoService:
@@ -40,25 +56,13 @@ class DiferidoService:
             hasta, persistente_file, archivo_nombre: str
         ) -> BytesIO:
 
-            kpi_df = pd.DataFrame(
-                await self.kpi_repository.get_all_dicts(exclude_pk=True)
-            )
-            logger.debug(f"DataFrame interno: {kpi_df.head()}")
-
-            # Instanciar DiferidoCalcular V2 (compatibilidad total con V1)
-            diferido_calcular = DiferidoCalcular(
-                file_buffer=persistente_file, df_interno=kpi_df
-            )
-            resultado = await diferido_calcular.calcular_diferido_async(hasta)
-            # Convertir el DataFrame resultante a Excel de forma asíncrona
-
-            excel_buffer = BytesIO()
+            with job_progress().stage("Lectura"):
+                kpi_rows = await self.kpi_repository.get_all_dicts(exclude_pk=True)
 
-            await asyncio.to_thread(
-                resultado.to_excel, excel_buffer, engine="xlsxwriter"
+            # El cálculo (pandas) y el Excel corren fuera del event loop
+            return await job_executor.run_cpu(
+                _diferido_excel, persistente_file.getvalue(), kpi_rows, hasta
             )
-            excel_buffer.seek(0)
-            return excel_buffer
 
         # Se pasa además el nombre del archivo original como keyword argument
         return await obtener_diferido(
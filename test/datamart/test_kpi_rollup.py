@@ -0,0 +1,107 @@
+"""🧪 Tests del rollup mensual del KPI: Operaciones no se infla al re-agrupar"""
+
+import datetime
+
+import pandas as pd
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from models.datamart.KPIModel import KPIModel
+from models.datamart.KPIRollupMensualModel import KPIRollupMensualModel
+from repositories.datamart.KPIRollupMensualRepository import (
+    KPIRollupMensualRepository,
+)
+from utils.adelantafactoring.calculos.KPIRollupCalcular import KPIRollupCalcular
+
+pytest.importorskip("aiosqlite")
+
+# Una liquidación con documentos de dos sectores (dos grupos del rollup) y otra
+# con un único documento.
+DOCUMENTOS = [
+    {"CodigoLiquidacion": "LIQ-1", "Sector": "Retail", "ColocacionSoles": 100.0},
+    {"CodigoLiquidacion": "LIQ-1", "Sector": "Mineria", "ColocacionSoles": 50.0},
+    {"CodigoLiquidacion": "LIQ-2", "Sector": "Retail", "ColocacionSoles": 10.0},
+]
+
+
+def _fila_kpi(documento: dict) -> dict:
+    """Fila de kpi con valores neutros en las columnas que el test no usa."""
+    fila = {}
+    for columna in KPIModel.__table__.columns:
+        if columna.primary_key:
+            continue
+        if isinstance(columna.type, sa.Float):
+            fila[columna.name] = 0.0
+        elif isinstance(columna.type, sa.Integer):
+            fila[columna.name] = 0
+        elif isinstance(columna.type, sa.DateTime):
+            fila[columna.name] = datetime.datetime(2024, 1, 15)
+        else:
+            fila[columna.name] = ""
+    fila.update(
+        Mes="2024-01",
+        Ejecutivo="Ana",
+        TipoOperacion="Factoring",
+        Moneda="PEN",
+        **documento,
+    )
+    return fila
+
+
+@pytest.fixture
+async def repo():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    tablas = [KPIModel.__table__, KPIRollupMensualModel.__table__]
+    filas = [_fila_kpi(d) for d in DOCUMENTOS]
+    rollup = KPIRollupCalcular(pd.DataFrame(filas)).calcular()
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda c: KPIModel.metadata.create_all(c, tablas))
+        await conn.execute(sa.insert(KPIModel.__table__), filas)
+        await conn.execute(sa.insert(KPIRollupMensualModel.__table__), rollup)
+    async with AsyncSession(engine) as session:
+        yield KPIRollupMensualRepository(session)
+    await engine.dispose()
+
+
+def test_calcular_cuenta_operaciones_y_documentos_por_grupo():
+    rollup = KPIRollupCalcular(pd.DataFrame([_fila_kpi(d) for d in DOCUMENTOS]))
+    por_sector = {fila["Sector"]: fila for fila in rollup.calcular()}
+
+    assert por_sector["Retail"]["Operaciones"] == 2
+    assert por_sector["Retail"]["Documentos"] == 2
+    assert por_sector["Mineria"]["Operaciones"] == 1
+    assert por_sector["Mineria"]["Documentos"] == 1
+
+
+async def test_totales_a_grano_menor_no_suman_operaciones(repo):
+    # LIQ-1 está en los dos sectores: sumar el rollup daría 3 operaciones
+    totales = await repo.get_totales(["Mes", "Ejecutivo"], {})
+
+    assert totales == [
+        {
+            "Mes": "2024-01",
+            "Ejecutivo": "Ana",
+            "ColocacionSoles": 160.0,
+            "IngresosSoles": 0.0,
+            "Utilidad": 0.0,
+            "CostosFondoSoles": 0.0,
+            "Documentos": 3,
+            "Operaciones": 2,
+        }
+    ]
+
+
+async def test_totales_a_grano_menor_respetan_filtros(repo):
+    totales = await repo.get_totales(["Ejecutivo"], {"Sector": ["Mineria"]})
+
+    assert [(t["Operaciones"], t["Documentos"]) for t in totales] == [(1, 1)]
+
+
+async def test_totales_al_grano_completo_leen_el_rollup(repo):
+    totales = await repo.get_totales(KPIRollupCalcular.DIMENSIONES, {})
+
+    por_sector = {t["Sector"]: t for t in totales}
+    assert por_sector["Retail"]["Operaciones"] == 2
+    assert por_sector["Mineria"]["Operaciones"] == 1
+    assert sum(t["Documentos"] for t in totales) == 3
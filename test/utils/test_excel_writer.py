@@ -0,0 +1,81 @@
+"""🧪 Tests de XlsxBatchWriter: reparto de filas en varias hojas"""
+
+import datetime
+import io
+
+import openpyxl
+import pyarrow as pa
+import pytest
+
+from utils.excel_writer import XlsxBatchWriter
+
+COLUMNAS = ["id", "nombre", "fecha"]
+
+
+def _filas(n: int) -> list[dict]:
+    return [
+        {
+            "id": i,
+            "nombre": f"fila {i}",
+            "fecha": datetime.date(2024, 1, 1) + datetime.timedelta(days=i),
+        }
+        for i in range(n)
+    ]
+
+
+def _como_dicts(lote: list[dict]) -> list[dict]:
+    return lote
+
+
+def _como_record_batch(lote: list[dict]) -> pa.RecordBatch:
+    return pa.RecordBatch.from_pylist(lote)
+
+
+def _escribir(lotes, max_rows: int) -> tuple[XlsxBatchWriter, openpyxl.Workbook]:
+    buf = io.BytesIO()
+    writer = XlsxBatchWriter(buf, COLUMNAS, max_rows=max_rows)
+    for lote in lotes:
+        writer.write_batch(lote)
+    writer.close()
+    buf.seek(0)
+    return writer, openpyxl.load_workbook(buf, read_only=True)
+
+
+@pytest.mark.parametrize("convertir", [_como_dicts, _como_record_batch])
+def test_reparte_filas_en_hojas_con_encabezado(convertir):
+    filas = _filas(10)
+    # lotes que cruzan el límite de hoja (3 filas de datos por hoja)
+    lotes = [convertir(filas[:4]), convertir(filas[4:5]), convertir(filas[5:])]
+
+    writer, libro = _escribir(lotes, max_rows=4)
+
+    assert writer.hojas == 4
+    assert writer.filas == 10
+    assert libro.sheetnames == ["Sheet1", "Sheet2", "Sheet3", "Sheet4"]
+
+    leidas = []
+    for hoja in libro.worksheets:
+        encabezado, *datos = hoja.iter_rows(values_only=True)
+        assert list(encabezado) == COLUMNAS
+        assert 1 <= len(datos) <= 3
+        leidas.extend(datos)
+
+    assert [fila[0] for fila in leidas] == list(range(10))
+    assert [fila[1] for fila in leidas] == [f["nombre"] for f in filas]
+    assert [fila[2].date() for fila in leidas] == [f["fecha"] for f in filas]
+
+
+@pytest.mark.parametrize("convertir", [_como_dicts, _como_record_batch])
+def test_limite_exacto_no_crea_hoja_vacia(convertir):
+    writer, libro = _escribir([convertir(_filas(6))], max_rows=4)
+
+    assert writer.hojas == 2
+    assert [hoja.max_row for hoja in libro.worksheets] == [4, 4]
+
+
+def test_sin_filas_deja_una_hoja_con_encabezado():
+    writer, libro = _escribir([], max_rows=4)
+
+    assert writer.hojas == 1
+    filas = list(libro.worksheets[0].iter_rows(values_only=True))
+    assert filas == [tuple(COLUMNAS)]
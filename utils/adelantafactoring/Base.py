@@ -1,6 +1,7 @@
 import functools
 import time
 from config.logger import logger
+from config import metrics
 
 
 class Base:
@@ -17,6 +18,11 @@ class Base:
             logger.warning(
                 f"Function {func.__name__} executed in {t1 - t0:.4f} seconds"
             )
+            calculador = type(args[0]).__name__ if args else func.__qualname__
+            metrics.CALCULATOR_STAGE_DURATION.labels(calculador, func.__name__).observe(
+                t1 - t0
+            )
+            metrics.observe_rows(calculador, func.__name__, result)
             return result
 
         return wrapper
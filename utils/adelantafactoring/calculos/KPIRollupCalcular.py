@@ -0,0 +1,38 @@
+from .BaseCalcular import BaseCalcular
+import pandas as pd
+
+
+class KPIRollupCalcular(BaseCalcular):
+    """
+    Agrega el KPI al grano mes × ejecutivo × sector × producto (TipoOperacion)
+    × moneda. Es la base de kpi_rollup_mensual, que los dashboards leen en
+    lugar de recorrer la tabla kpi completa.
+
+    Operaciones (liquidaciones distintas) solo vale al grano completo: una
+    liquidación puede caer en varios grupos. Documentos (filas de kpi) sí se
+    puede sumar al agrupar por menos dimensiones.
+    """
+
+    DIMENSIONES = ["Mes", "Ejecutivo", "Sector", "TipoOperacion", "Moneda"]
+    METRICAS = ["ColocacionSoles", "IngresosSoles", "Utilidad", "CostosFondoSoles"]
+
+    def __init__(self, kpi_df: pd.DataFrame) -> None:
+        super().__init__()
+        self.kpi_df = kpi_df
+
+    def calcular(self) -> list[dict]:
+        if self.kpi_df.empty:
+            return []
+        df = self.kpi_df[self.DIMENSIONES + self.METRICAS + ["CodigoLiquidacion"]]
+        # Un único groupby; dropna=False para no perder las operaciones sin Sector
+        rollup = (
+            df.groupby(self.DIMENSIONES, dropna=False, sort=False)
+            .agg(
+                **{m: (m, "sum") for m in self.METRICAS},
+                Operaciones=("CodigoLiquidacion", "nunique"),
+                Documentos=("CodigoLiquidacion", "size"),
+            )
+            .reset_index()
+        )
+        rollup = rollup.astype(object).where(rollup.notna(), None)
+        return rollup.to_dict(orient="records")
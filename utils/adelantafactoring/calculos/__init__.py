@@ -6,6 +6,7 @@ from .SaldosCalcular import SaldosCalcular
 from .SectorPagadoresCalcular import SectorPagadoresCalcular
 from .BaseCalcular import BaseCalcular
 from .ReferidosCalcular import ReferidosCalcular
+from .KPIRollupCalcular import KPIRollupCalcular
 
 # from .DiferidoExternoCalcular import DiferidoExternoCalcular
 # from .DiferidoInternoCalcular import DiferidoInternoCalcular
@@ -20,6 +21,7 @@ __all__ = [
     "SectorPagadoresCalcular",
     "BaseCalcular",
     "ReferidosCalcular",
+    "KPIRollupCalcular",
     # "DiferidoExternoCalcular",
     # "DiferidoInternoCalcular",
     # "DiferidoCalcular",
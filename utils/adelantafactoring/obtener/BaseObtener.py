@@ -1,3 +1,4 @@
+import os
 import requests
 import httpx
 
@@ -5,10 +6,24 @@ import httpx
 from utils.timing_decorator import timing_decorator
 from tenacity import retry, stop_after_attempt, wait_exponential
 from config.logger import logger
+from config.metrics import track_webservice
 from httpx import HTTPStatusError
 from ..Base import Base
+from utils.refresh_intermediates import shared_by_key
 from typing import Dict, Any, Optional
 
+# Sesión HTTP por proceso: reutiliza las conexiones (keep-alive) entre llamadas.
+# Una por pid, para que los hijos de un fork no compartan sockets.
+_http_sessions: Dict[int, requests.Session] = {}
+
+
+def http_session() -> requests.Session:
+    pid = os.getpid()
+    if pid not in _http_sessions:
+        _http_sessions.clear()
+        _http_sessions[pid] = requests.Session()
+    return _http_sessions[pid]
+
 
 class BaseObtener(Base):
     """
@@ -23,11 +38,14 @@ class BaseObtener(Base):
 
     # === MÉTODOS SÍNCRONOS (Para Google Sheets y APIs simples) ===
 
+    # En una corrida del DAG de recarga cada URL se descarga una sola vez
+    @shared_by_key(lambda self, url, *args, **kwargs: url)
     @retry(
         stop=stop_after_attempt(3), 
         wait=wait_exponential(multiplier=1, min=2, max=10),
         reraise=True
     )
+    @track_webservice
     def obtener_data(self, url: str, timeout: int = None, headers: dict = None) -> dict:
         """
         Obtiene datos de una URL de forma síncrona con reintentos automáticos.
@@ -69,7 +87,7 @@ class BaseObtener(Base):
             logger.debug(f"Timeout configurado: {request_timeout}s")
             
             # Realizar la petición HTTP
-            response = requests.get(
+            response = http_session().get(
                 url,
                 timeout=request_timeout,
                 headers=request_headers,
@@ -148,6 +166,7 @@ class BaseObtener(Base):
     @retry(
         stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10)
     )
+    @track_webservice
     async def obtener_data_async_simple(self, url: str) -> Dict[Any, Any]:
         """
         Método asíncrono para obtener datos sin autenticación.
@@ -182,6 +201,7 @@ class BaseObtener(Base):
             raise
 
     @timing_decorator
+    @track_webservice
     async def obtener_token(self, token_url: str, credentials: Dict[str, str]) -> None:
         """
         Obtiene token de autenticación de manera asíncrona.
@@ -221,6 +241,7 @@ class BaseObtener(Base):
     @retry(
         stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10)
     )
+    @track_webservice
     async def obtener_data_async(
         self, client: httpx.AsyncClient, url: str, params: Dict[str, Any]
     ) -> Dict[Any, Any]:
@@ -274,6 +295,9 @@ class BaseObtener(Base):
         self.token = None
         logger.debug("Token limpiado")
 
+    @shared_by_key(
+        lambda self, url, params, *args, **kwargs: f"{url}?{sorted(params.items())}"
+    )
     async def obtener_data_con_autenticacion(
         self,
         url: str,
@@ -1,4 +1,5 @@
 from .BaseObtener import BaseObtener
+from utils.refresh_intermediates import shared_intermediate
 
 
 class SectorPagadoresObtener(BaseObtener):
@@ -8,4 +9,7 @@ class SectorPagadoresObtener(BaseObtener):
         super().__init__()
 
     def obtener_sector_pagadores(self) -> dict:
-        return self.obtener_data(self.SECTOR_PAGADORES_URL)
+        # dato de referencia: cacheado entre corridas y procesos
+        return shared_intermediate(
+            "sector_pagadores", lambda: self.obtener_data(self.SECTOR_PAGADORES_URL)
+        )
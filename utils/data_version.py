@@ -0,0 +1,44 @@
+"""
+Versión de datos por tabla (data:{tabla}:version).
+
+Las tareas que recargan una tabla incrementan su versión al terminar; quien
+cachea algo derivado de esa tabla (p.ej. los archivos de create_job) incluye
+la versión en su clave, así una recarga invalida la caché sin borrar nada.
+"""
+
+from typing import Sequence
+
+from config.redis import redis_manager, redis_manager_sync
+
+
+def _version_key(tabla: str) -> str:
+    return f"data:{tabla}:version"
+
+
+async def get_data_version(tablas: Sequence[str]) -> str:
+    """Token con la versión actual de cada tabla, p.ej. "kpi=3,tipo_cambio=1"."""
+    valores = await redis_manager.get_client().mget([_version_key(t) for t in tablas])
+    return ",".join(
+        f"{t}={(v.decode() if isinstance(v, bytes) else v) or 0}"
+        for t, v in zip(tablas, valores)
+    )
+
+
+def get_data_version_sync(tabla: str) -> str:
+    """Versión actual de una tabla ("0" si nunca se recargó), versión síncrona."""
+    return redis_manager_sync.get_client_sync().get(_version_key(tabla)) or "0"
+
+
+async def bump_data_version(*tablas: str) -> None:
+    async with redis_manager.get_client().pipeline(transaction=False) as pipe:
+        for tabla in tablas:
+            pipe.incr(_version_key(tabla))
+        await pipe.execute()
+
+
+def bump_data_version_sync(*tablas: str) -> None:
+    """Versión síncrona para las tareas de Celery."""
+    with redis_manager_sync.get_client_sync().pipeline(transaction=False) as pipe:
+        for tabla in tablas:
+            pipe.incr(_version_key(tabla))
+        pipe.execute()
@@ -3,9 +3,13 @@ from config.redis import redis_manager
 from config.logger import logger
 from typing import Callable, Any, Literal, Sequence, Union
 from io import BytesIO
+import hashlib
+import orjson
+from utils.data_version import get_data_version
+from config.job_progress import track_job
 
 # alias de formatos permitidos
-FormatType = Literal["zip", "excel", "csv", "orjson"]
+FormatType = Literal["zip", "excel", "csv", "orjson", "parquet", "arrow"]
 SaveAsArg = Union[FormatType, Sequence[FormatType]]  # uno o varios
 
 
@@ -17,7 +21,26 @@ def create_job(
     save_as: SaveAsArg | None = None,
     capture_params: bool = False,
     created_by: str | None = None,
+    cache_tables: Sequence[str] | None = None,
 ):
+    """
+    Lanza la función decorada como job en segundo plano (ver
+    RedisClientManager.create_job).
+
+    Con is_buffer, si la función devuelve un DataFrame se guarda una sola vez
+    como Parquet y save_as es solo el formato de descarga por defecto; los
+    demás se generan al descargar (ver config/artifact_render.py).
+
+    cache_tables: opt-in de memoización. Si se indican las tablas de las que
+    depende el resultado, peticiones con la misma función, parámetros y versión
+    de datos de esas tablas (ver utils.data_version) reutilizan el job
+    completado o en curso en lugar de recalcular. El formato (`tipo`) no entra
+    en la clave: el dataset se guarda una vez y cada cliente elige el archivo
+    con /download/{job_id}?format= (la respuesta trae el formato pedido).
+    Por eso, con cache_tables y varios save_as la función debe devolver un
+    DataFrame.
+    """
+
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
@@ -32,10 +55,12 @@ def create_job(
 
                 # determinar dinámicamente el formato a usar
                 effective_save_as: str | None = None
+                tipo_posicional = False
                 if is_buffer:
                     tipo = kwargs.get("tipo")
                     if not tipo and len(args) > 1 and isinstance(args[1], str):
                         tipo = args[1]
+                        tipo_posicional = True
                     if tipo in valid_formats:
                         effective_save_as = tipo
                     elif valid_formats:
@@ -47,46 +72,35 @@ def create_job(
                     cb = args[-1]
                 else:
                     cb = created_by or ""
-                if capture_params:
-                    # Procesar argumentos posicionales, ignorando BytesIO
-                    actual_args = []
-                    for arg in (
-                        args[1:] if args and hasattr(args[0], "__class__") else args
-                    ):
-                        if isinstance(arg, BytesIO):
-                            continue
-                        elif hasattr(arg, "filename"):
-                            actual_args.append(arg.filename)
-                        else:
-                            actual_args.append(arg)
-                    # Procesar kwargs, ignorando valores BytesIO
-                    params = {"args": actual_args, "kwargs": {}}
-                    for k, v in kwargs.items():
-                        if isinstance(v, BytesIO):
-                            continue
-                        if hasattr(v, "filename"):
-                            try:
-                                params["kwargs"][k] = str(v.filename)
-                            except Exception:
-                                params["kwargs"][k] = "UnknownFilename"
-                        else:
-                            params["kwargs"][k] = v
+                if capture_params or cache_tables:
+                    params = _capture_params(args, kwargs)
                     logger.debug(f"Parámetros capturados: {params}")
                 else:
                     params = None
 
+                cache_key = None
+                if cache_tables:
+                    cache_key = await _cache_key(
+                        func, params, tipo_posicional, cache_tables
+                    )
+
                 job_id = await redis_manager.create_job(
                     name,
                     description,
                     expire,
-                    lambda: func(*args, **kwargs),
+                    lambda: track_job(lambda: func(*args, **kwargs)),
                     is_buffer,
                     effective_save_as,
-                    params,
+                    params if capture_params else None,
                     cb,
+                    cache_key,
                 )
 
-                return {"job_id": job_id, "success": "Conforme a lo esperado"}
+                respuesta = {"job_id": job_id, "success": "Conforme a lo esperado"}
+                if effective_save_as:
+                    # con caché el job pudo crearlo otra petición con otro formato
+                    respuesta["format"] = effective_save_as
+                return respuesta
             except Exception as e:
                 logger.exception("Error en create_job decorator:")
                 raise e
@@ -94,3 +108,49 @@ def create_job(
         return wrapper
 
     return decorator
+
+
+def _capture_params(args: tuple, kwargs: dict) -> dict:
+    """Argumentos de la llamada serializables (sin self, BytesIO ni archivos)."""
+    # Procesar argumentos posicionales, ignorando BytesIO
+    actual_args = []
+    for arg in args[1:] if args and hasattr(args[0], "__class__") else args:
+        if isinstance(arg, BytesIO):
+            continue
+        elif hasattr(arg, "filename"):
+            actual_args.append(arg.filename)
+        else:
+            actual_args.append(arg)
+    # Procesar kwargs, ignorando valores BytesIO
+    params = {"args": actual_args, "kwargs": {}}
+    for k, v in kwargs.items():
+        if isinstance(v, BytesIO):
+            continue
+        if hasattr(v, "filename"):
+            try:
+                params["kwargs"][k] = str(v.filename)
+            except Exception:
+                params["kwargs"][k] = "UnknownFilename"
+        else:
+            params["kwargs"][k] = v
+    return params
+
+
+async def _cache_key(
+    func: Callable, params: dict, tipo_posicional: bool, tablas: Sequence[str]
+) -> str:
+    """
+    Clave de memoización: función + parámetros + versión de datos. Sin el
+    formato de salida (`tipo`, posicional o por nombre) ni created_by.
+    """
+    firma = {
+        "args": params["args"][1:] if tipo_posicional else params["args"],
+        "kwargs": {
+            k: v for k, v in params["kwargs"].items() if k not in ("created_by", "tipo")
+        },
+        "version": await get_data_version(tablas),
+    }
+    digest = hashlib.sha1(
+        orjson.dumps(firma, default=str, option=orjson.OPT_SORT_KEYS)
+    ).hexdigest()
+    return f"jobcache:{func.__module__}.{func.__qualname__}:{digest}"
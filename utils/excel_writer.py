@@ -0,0 +1,105 @@
+"""
+Escritura de Excel por lotes con memoria acotada.
+
+XlsxBatchWriter usa xlsxwriter en modo constant_memory: cada fila se escribe
+a disco al pasar a la siguiente, así exportar todo kpi_acumulado no mantiene
+las celdas en memoria. Recibe lotes de dicts (cursor de la base de datos) o
+RecordBatch de Arrow, y al llegar al límite de filas de Excel continúa en una
+hoja nueva (Sheet1, Sheet2, ...). Los formatos de columna (fechas) se definen
+una vez por hoja, no por celda.
+"""
+
+import datetime
+from typing import IO, Sequence
+
+import pyarrow as pa
+import xlsxwriter
+
+# filas por hoja de Excel, incluido el encabezado
+EXCEL_MAX_ROWS = 1_048_576
+
+FORMATO_FECHA_HORA = "yyyy-mm-dd hh:mm:ss"
+FORMATO_FECHA = "yyyy-mm-dd"
+
+
+class XlsxBatchWriter:
+    def __init__(
+        self,
+        output: str | IO[bytes],
+        columnas: Sequence[str],
+        max_rows: int = EXCEL_MAX_ROWS,
+    ):
+        self.workbook = xlsxwriter.Workbook(
+            output,
+            {
+                "constant_memory": True,
+                "strings_to_formulas": False,
+                "strings_to_urls": False,
+                "remove_timezone": True,
+                "nan_inf_to_errors": True,
+            },
+        )
+        self.columnas = list(columnas)
+        self.max_rows = max_rows
+        self.hojas = 0
+        self.filas = 0  # filas de datos escritas en total
+        self._encabezado = self.workbook.add_format({"bold": True})
+        self._formatos: dict[int, str] | None = None  # se infieren del primer lote
+        self._estilos: dict[str, xlsxwriter.format.Format] = {}
+        self._hoja = None
+        self._fila = 0
+
+    def write_batch(self, lote: list[dict] | pa.RecordBatch) -> None:
+        if isinstance(lote, pa.RecordBatch):
+            if self._formatos is None:
+                self._formatos = self._formatos_arrow(lote.schema)
+            valores = [lote.column(c).to_pylist() for c in self.columnas]
+            filas = zip(*valores)
+        else:
+            if self._formatos is None:
+                self._formatos = self._formatos_dicts(lote)
+            filas = ([fila.get(c) for c in self.columnas] for fila in lote)
+
+        for fila in filas:
+            if self._hoja is None or self._fila >= self.max_rows:
+                self._nueva_hoja()
+            self._hoja.write_row(self._fila, 0, fila)
+            self._fila += 1
+            self.filas += 1
+
+    def close(self) -> None:
+        if self._hoja is None:
+            self._nueva_hoja()  # sin filas: una hoja solo con encabezado
+        self.workbook.close()
+
+    def _nueva_hoja(self) -> None:
+        self.hojas += 1
+        self._hoja = self.workbook.add_worksheet(f"Sheet{self.hojas}")
+        for i, num_format in (self._formatos or {}).items():
+            if num_format not in self._estilos:
+                self._estilos[num_format] = self.workbook.add_format(
+                    {"num_format": num_format}
+                )
+            self._hoja.set_column(i, i, None, self._estilos[num_format])
+        self._hoja.write_row(0, 0, self.columnas, self._encabezado)
+        self._fila = 1
+
+    def _formatos_arrow(self, schema: pa.Schema) -> dict[int, str]:
+        formatos = {}
+        for i, nombre in enumerate(self.columnas):
+            tipo = schema.field(nombre).type
+            if pa.types.is_timestamp(tipo):
+                formatos[i] = FORMATO_FECHA_HORA
+            elif pa.types.is_date(tipo):
+                formatos[i] = FORMATO_FECHA
+        return formatos
+
+    def _formatos_dicts(self, lote: list[dict]) -> dict[int, str]:
+        formatos = {}
+        for i, nombre in enumerate(self.columnas):
+            valor = next((f[nombre] for f in lote if f.get(nombre) is not None), None)
+            if isinstance(valor, datetime.datetime):
+                formatos[i] = FORMATO_FECHA_HORA
+            elif isinstance(valor, datetime.date):
+                formatos[i] = FORMATO_FECHA
+        return formatos
@@ -0,0 +1,239 @@
+"""
+Perfiles de exportación: qué columnas salen en un archivo, en qué orden y con
+qué encabezados.
+
+Un perfil se registra por tabla y el repositorio lo compila en un SELECT que
+trae solo esas columnas (BaseRepository.get_all_dicts(perfil=...)); las que
+la tabla no tiene salen como NULL desde la base de datos. Así el DataFrame
+llega ya con la forma del archivo, sin reordenar ni rellenar en pandas.
+Si ya se tiene la tabla completa en memoria (p.ej. al publicar las
+exportaciones de una recarga), proyectar() da lo mismo sin otra consulta.
+"""
+
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class ExportProfile:
+    nombre: str
+    columnas: tuple[str, ...]
+    # columna del modelo -> encabezado en el archivo
+    renombres: dict[str, str] = field(default_factory=dict)
+    # nombres de columna, prefijo "-" para descendente
+    orden: tuple[str, ...] = ()
+
+    @property
+    def encabezados(self) -> list[str]:
+        return [self.renombres.get(c, c) for c in self.columnas]
+
+    def proyectar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """El equivalente en pandas de profile_select sobre un DataFrame completo."""
+        if self.orden:
+            df = df.sort_values(
+                [c.lstrip("-") for c in self.orden],
+                ascending=[not c.startswith("-") for c in self.orden],
+                kind="stable",
+            )
+        proyectado = df.reindex(columns=list(self.columnas))
+        proyectado.columns = self.encabezados
+        return proyectado.reset_index(drop=True)
+
+
+_PERFILES: dict[tuple[str, str], ExportProfile] = {}
+
+
+def register_export_profile(tabla: str, perfil: ExportProfile) -> ExportProfile:
+    _PERFILES[(tabla, perfil.nombre)] = perfil
+    return perfil
+
+
+def get_export_profile(tabla: str, nombre: str) -> ExportProfile:
+    """Perfil `nombre` de `tabla`; KeyError si no está registrado."""
+    return _PERFILES[(tabla, nombre)]
+
+
+def export_profiles(tabla: str) -> list[ExportProfile]:
+    return [p for (t, _), p in _PERFILES.items() if t == tabla]
+
+
+# Informe de KPI (/datamart/kpi/file/{tipo}?informe=...)
+register_export_profile(
+    "kpi",
+    ExportProfile(
+        nombre="informe",
+        columnas=(
+            "CodigoLiquidacion",
+            "CodigoSolicitud",
+            "RUCCliente",
+            "RazonSocialCliente",
+            "RUCPagador",
+            "RazonSocialPagador",
+            "Moneda",
+            "DeudaAnterior",
+            "ObservacionLiquidacion",
+            "ObservacionSolicitud",
+            "FlagPagoInteresConfirming",
+            "FechaInteresConfirming",
+            "TipoOperacion",
+            "Estado",
+            "NroDocumento",
+            "TasaNominalMensualPorc",
+            "FinanciamientoPorc",
+            "FechaConfirmado",
+            "FechaOperacion",
+            "DiasEfectivo",
+            "NetoConfirmado",
+            "FondoResguardo",
+            "MontoComisionEstructuracion",
+            "ComisionEstructuracionIGV",
+            "ComisionEstructuracionConIGV",
+            "MontoCobrar",
+            "Interes",
+            "InteresConIGV",
+            "GastosContrato",
+            "GastoVigenciaPoder",
+            "ServicioCobranza",
+            "ServicioCustodia",
+            "GastosDiversosIGV",
+            "GastosDiversosConIGV",
+            "MontoTotalFacturado",
+            "MontoDesembolso",
+            "FacturasGeneradas",
+            "Ejecutivo",
+            "FechaPago",
+            "DiasMora",
+            "MontoCobrarPago",
+            "MontoPago",
+            "InteresPago",
+            "GastosPago",
+            "TipoPago",
+            "SaldoDeuda",
+            "ExcesoPago",
+            "ObservacionPago",
+            "FechaDesembolso",
+            "MontoDevolucion",
+            "DescuentoDevolucion",
+            "EstadoDevolucion",
+            "ObservacionDevolucion",
+            "Anticipo",
+            "TramoAnticipo",
+            "FueraSistema",
+            "GastosDiversosSinIGV",
+            "Total factura Mora",
+            "Mes",
+            "Año",
+            "MesAño",
+            "Sector",
+            "GrupoEco",
+            "Referencia",
+            "TipoCambioFecha",
+            "TipoCambioCompra",
+            "TipoCambioVenta",
+            "ColocacionSoles",
+            "MontoDesembolsoSoles",
+            "Ingresos",
+            "IngresosSoles",
+            "MesSemana",
+            "CostosFondo",
+            "TotalIngresos",
+            "CostosFondoSoles",
+            "TotalIngresosSoles",
+            "MontoPagoSoles",
+            "Utilidad",
+        ),
+    ),
+)
+
+# Informe de KPI acumulado: el de KPI más el detalle de operación y pagos
+register_export_profile(
+    "kpi_acumulado",
+    ExportProfile(
+        nombre="informe",
+        columnas=(
+            "CodigoLiquidacion",
+            "CodigoSolicitud",
+            "RUCCliente",
+            "RazonSocialCliente",
+            "RUCPagador",
+            "RazonSocialPagador",
+            "Moneda",
+            "DeudaAnterior",
+            "ObservacionLiquidacion",
+            "ObservacionSolicitud",
+            "FlagPagoInteresConfirming",
+            "FechaInteresConfirming",
+            "TipoOperacion",
+            "TipoOperacionDetalle",
+            "Estado",
+            "NroDocumento",
+            "TasaNominalMensualPorc",
+            "FinanciamientoPorc",
+            "FechaConfirmado",
+            "FechaOperacion",
+            "DiasEfectivo",
+            "NetoConfirmado",
+            "FondoResguardo",
+            "MontoComisionEstructuracion",
+            "ComisionEstructuracionIGV",
+            "ComisionEstructuracionConIGV",
+            "MontoCobrar",
+            "Interes",
+            "InteresConIGV",
+            "GastosContrato",
+            "GastoVigenciaPoder",
+            "ServicioCobranza",
+            "ServicioCustodia",
+            "GastosDiversosIGV",
+            "GastosDiversosConIGV",
+            "MontoTotalFacturado",
+            "MontoDesembolso",
+            "FacturasGeneradas",
+            "Ejecutivo",
+            "FechaPago",
+            "FechaPagoCreacion",
+            "FechaPagoModificacion",
+            "DiasMora",
+            "MontoCobrarPago",
+            "MontoPago",
+            "FacturasMoraGeneradas",
+            "InteresPago",
+            "GastosPago",
+            "TipoPago",
+            "SaldoDeuda",
+            "ExcesoPago",
+            "ObservacionPago",
+            "FechaDesembolso",
+            "MontoDevolucion",
+            "DescuentoDevolucion",
+            "EstadoDevolucion",
+            "ObservacionDevolucion",
+            "Anticipo",
+            "TramoAnticipo",
+            "FueraSistema",
+            "GastosDiversosSinIGV",
+            "Total factura Mora",
+            "Mes",
+            "Año",
+            "MesAño",
+            "Sector",
+            "GrupoEco",
+            "Referencia",
+            "TipoCambioFecha",
+            "TipoCambioCompra",
+            "TipoCambioVenta",
+            "ColocacionSoles",
+            "MontoDesembolsoSoles",
+            "Ingresos",
+            "IngresosSoles",
+            "MesSemana",
+            "CostosFondo",
+            "TotalIngresos",
+            "CostosFondoSoles",
+            "TotalIngresosSoles",
+            "MontoPagoSoles",
+            "Utilidad",
+        ),
+    ),
+)
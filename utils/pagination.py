@@ -0,0 +1,124 @@
+import base64
+import datetime
+import hashlib
+from typing import Any, Sequence
+from uuid import UUID
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import InstrumentedAttribute
+
+from config.logger import logger
+from config.redis import redis_manager
+from config.settings import settings
+
+# Orden de keyset: lista de (columna, descendente)
+KeysetOrder = Sequence[tuple[InstrumentedAttribute, bool]]
+
+
+def keyset_order_by(orden: KeysetOrder) -> list:
+    """Cláusulas ORDER BY equivalentes al orden del keyset."""
+    return [col.desc() if desc else col.asc() for col, desc in orden]
+
+
+def keyset_condition(orden: KeysetOrder, valores: Sequence[Any]):
+    """
+    Construye la condición "fila posterior al cursor" para un orden compuesto:
+    (c1 > v1) OR (c1 = v1 AND c2 > v2) OR ... respetando la dirección de cada columna.
+    Así la página N cuesta lo mismo que la primera (usa el índice, sin OFFSET).
+    """
+    condiciones = []
+    for i, (col, desc) in enumerate(orden):
+        iguales = [orden[j][0] == valores[j] for j in range(i)]
+        siguiente = col < valores[i] if desc else col > valores[i]
+        condiciones.append(and_(*iguales, siguiente))
+    return or_(*condiciones)
+
+
+def encode_cursor(valores: Sequence[Any]) -> str:
+    """Serializa los valores de la última fila en un token opaco (base64url)."""
+    payload = orjson.dumps([_to_json(v) for v in valores])
+    return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, orden: KeysetOrder) -> list[Any]:
+    """
+    Decodifica un token generado por encode_cursor y convierte cada valor
+    al tipo Python de su columna. Lanza HTTPException 400 si el token no es válido.
+    """
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        valores = orjson.loads(base64.urlsafe_b64decode(cursor + padding))
+        if not isinstance(valores, list) or len(valores) != len(orden):
+            raise ValueError("longitud inesperada")
+        return [_from_json(col, v) for (col, _), v in zip(orden, valores)]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Cursor inválido: {cursor}") from e
+
+
+def _to_json(valor: Any) -> Any:
+    if isinstance(valor, UUID):
+        return str(valor)
+    if isinstance(valor, (datetime.datetime, datetime.date)):
+        return valor.isoformat()
+    return valor
+
+
+def _from_json(col: InstrumentedAttribute, valor: Any) -> Any:
+    if valor is None:
+        return None
+    try:
+        python_type = col.type.python_type
+    except NotImplementedError:
+        return valor
+    if python_type is UUID:
+        return UUID(valor)
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(valor)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(valor)
+    return python_type(valor)
+
+
+class CountCache:
+    """
+    Cache en Redis de los COUNT(*) de las búsquedas paginadas.
+
+    La clave incluye la versión de la tabla (count:{tabla}:version), que se
+    incrementa en cada escritura, así que invalidar es un único INCR y las
+    entradas antiguas simplemente expiran por TTL.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    async def get_or_count(self, db, tabla: str, filtros: dict, total_query) -> int:
+        client = redis_manager.get_client()
+        try:
+            version = await client.get(f"count:{tabla}:version") or b"0"
+            firma = hashlib.sha1(
+                orjson.dumps(filtros, default=str, option=orjson.OPT_SORT_KEYS)
+            ).hexdigest()
+            key = f"count:{tabla}:{version.decode()}:{firma}"
+            if (cached := await client.get(key)) is not None:
+                return int(cached)
+        except Exception as e:
+            logger.warning(f"CountCache no disponible para {tabla}: {e}")
+            return (await db.execute(total_query)).scalar() or 0
+
+        total = (await db.execute(total_query)).scalar() or 0
+        try:
+            await client.set(key, total, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el conteo de {tabla}: {e}")
+        return total
+
+    async def invalidate(self, tabla: str) -> None:
+        try:
+            await redis_manager.get_client().incr(f"count:{tabla}:version")
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar el conteo de {tabla}: {e}")
+
+
+count_cache = CountCache(ttl=settings.COUNT_CACHE_TTL)
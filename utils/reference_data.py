@@ -0,0 +1,103 @@
+"""
+Datos de referencia que leen casi todas las recargas: tipo de cambio y
+sector de pagadores.
+
+Se guardan en Redis (ref:{nombre}:{versión}) para compartirlos entre
+corridas y procesos, y además en memoria del proceso: los workers de Celery
+los traen de Redis al arrancar (prefetch_reference_data en
+config/worker_runtime.py), así la primera task de un hijo reciclado no los
+vuelve a consultar.
+
+Las referencias con tabla asociada usan su versión de datos
+(utils/data_version.py): una recarga de la tabla las invalida. Las demás
+(hojas de cálculo) solo caducan con REFERENCE_DATA_TTL.
+"""
+
+import time
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+from config.logger import logger
+from config.redis import redis_manager_sync
+from config.settings import settings
+from utils.data_version import get_data_version_sync
+
+# nombre -> tabla cuya versión de datos invalida la referencia (None = solo TTL)
+REFERENCIAS: dict[str, str | None] = {
+    "tipo_cambio": "tipo_cambio",
+    "sector_pagadores": None,
+}
+
+# nombre -> (versión, vence_en (time.monotonic), valor)
+_memoria: dict[str, tuple[str, float, Any]] = {}
+
+
+def _key(nombre: str, version: str) -> str:
+    return f"ref:{nombre}:{version}"
+
+
+def _version(nombre: str) -> str:
+    tabla = REFERENCIAS[nombre]
+    return f"v{get_data_version_sync(tabla)}" if tabla else "ttl"
+
+
+def _leer(nombre: str) -> tuple[bool, str, Any]:
+    """(encontrado, versión, valor) desde memoria o Redis."""
+    try:
+        version = _version(nombre)
+        guardado = _memoria.get(nombre)
+        if guardado and guardado[0] == version and guardado[1] > time.monotonic():
+            return True, version, guardado[2]
+        client = redis_manager_sync.get_client_sync()
+        with client.pipeline(transaction=False) as pipe:
+            pipe.get(_key(nombre, version))
+            pipe.ttl(_key(nombre, version))
+            raw, ttl = pipe.execute()
+    except Exception as e:
+        logger.warning(f"[referencias] No se leyó {nombre}: {e}")
+        return False, "", None
+    if raw is None:
+        return False, version, None
+    valor = orjson.loads(raw)
+    _memoria[nombre] = (version, time.monotonic() + max(ttl, 0), valor)
+    return True, version, valor
+
+
+def _guardar(nombre: str, version: str, valor: Any) -> None:
+    _memoria[nombre] = (
+        version,
+        time.monotonic() + settings.REFERENCE_DATA_TTL,
+        valor,
+    )
+    if not version:
+        return  # no se pudo leer la versión: solo en memoria
+    try:
+        redis_manager_sync.get_client_sync().set(
+            _key(nombre, version), orjson.dumps(valor), ex=settings.REFERENCE_DATA_TTL
+        )
+    except Exception as e:
+        logger.warning(f"[referencias] No se guardó {nombre}: {e}")
+
+
+def reference_data(nombre: str, cargar: Callable[[], Any]) -> Any:
+    """Devuelve la referencia `nombre` cacheada o la obtiene con cargar()."""
+    encontrado, version, valor = _leer(nombre)
+    if not encontrado:
+        valor = cargar()
+        _guardar(nombre, version, valor)
+    return valor
+
+
+async def areference_data(nombre: str, cargar: Callable[[], Awaitable[Any]]) -> Any:
+    """Versión async de reference_data (cargar devuelve un awaitable)."""
+    encontrado, version, valor = _leer(nombre)
+    if not encontrado:
+        valor = await cargar()
+        _guardar(nombre, version, valor)
+    return valor
+
+
+def prefetch_reference_data() -> list[str]:
+    """Trae a memoria las referencias vigentes en Redis; devuelve las cargadas."""
+    return [nombre for nombre in REFERENCIAS if _leer(nombre)[0]]
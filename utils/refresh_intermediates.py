@@ -0,0 +1,143 @@
+"""
+Insumos compartidos dentro de una corrida del DAG de recarga.
+
+Las tareas de recarga (tablas_reportes, kpi_acumulado, tablas_cxc) leen los
+mismos insumos: tipo de cambio, sector de pagadores, operaciones fuera de
+sistema, las hojas de referidos... Dentro de una corrida (refresh_run con el
+id de la corrida) cada insumo se obtiene una sola vez y se guarda en
+refresh:{run_id}:{nombre}; los demás procesos del worker lo leen de ahí.
+
+Fuera de una corrida (API, tareas lanzadas sueltas) no se cachea nada y cada
+llamada obtiene sus datos como siempre, salvo los datos de referencia
+(tipo de cambio, sector de pagadores), que tienen su propia caché entre
+corridas: ver utils/reference_data.py.
+
+Los insumos se guardan como JSON comprimido con zstd (ARTIFACT_ZSTD_LEVEL,
+como los artefactos): algunos, como las colocaciones desde 2019, pesan
+decenas de MB sin comprimir. Solo aplica a resultados JSON (respuestas de
+webservices y hojas, filas de tablas con tipos simples).
+"""
+
+import functools
+import hashlib
+import inspect
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+
+import orjson
+import zstandard
+
+from config.logger import logger
+from config.redis import redis_manager_sync
+from config.settings import settings
+from utils.reference_data import REFERENCIAS, areference_data, reference_data
+
+_run_id: ContextVar[str | None] = ContextVar("refresh_run_id", default=None)
+
+
+@contextmanager
+def refresh_run(run_id: str | None):
+    """Activa la caché de insumos de la corrida `run_id` (None = sin caché)."""
+    token = _run_id.set(run_id)
+    try:
+        yield
+    finally:
+        _run_id.reset(token)
+
+
+def current_refresh_run() -> str | None:
+    return _run_id.get()
+
+
+def _key(run_id: str, nombre: str) -> str:
+    return f"refresh:{run_id}:{nombre}"
+
+
+def _leer(nombre: str) -> tuple[bool, Any]:
+    run_id = _run_id.get()
+    if run_id is None:
+        return False, None
+    try:
+        raw = redis_manager_sync.get_binary_client_sync().get(_key(run_id, nombre))
+    except Exception as e:
+        logger.warning(f"[refresh] No se leyó el insumo {nombre}: {e}")
+        return False, None
+    if raw is None:
+        return False, None
+    logger.debug(f"[refresh] {nombre} reutilizado de la corrida {run_id}")
+    return True, orjson.loads(zstandard.ZstdDecompressor().decompress(raw))
+
+
+def _guardar(nombre: str, valor: Any) -> None:
+    run_id = _run_id.get()
+    if run_id is None:
+        return
+    try:
+        compressor = zstandard.ZstdCompressor(level=settings.ARTIFACT_ZSTD_LEVEL)
+        redis_manager_sync.get_binary_client_sync().set(
+            _key(run_id, nombre),
+            compressor.compress(orjson.dumps(valor)),
+            ex=settings.REFRESH_INTERMEDIATE_TTL,
+        )
+    except Exception as e:
+        logger.warning(f"[refresh] No se guardó el insumo {nombre}: {e}")
+
+
+def shared_intermediate(nombre: str, cargar: Callable[[], Any]) -> Any:
+    """Devuelve el insumo `nombre` de la corrida o lo obtiene con cargar()."""
+    encontrado, valor = _leer(nombre)
+    if not encontrado:
+        valor = reference_data(nombre, cargar) if nombre in REFERENCIAS else cargar()
+        _guardar(nombre, valor)
+    return valor
+
+
+async def ashared_intermediate(
+    nombre: str, cargar: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Versión async de shared_intermediate (cargar devuelve un awaitable)."""
+    encontrado, valor = _leer(nombre)
+    if not encontrado:
+        if nombre in REFERENCIAS:
+            valor = await areference_data(nombre, cargar)
+        else:
+            valor = await cargar()
+        _guardar(nombre, valor)
+    return valor
+
+
+def shared_by_key(clave: Callable[..., str]):
+    """
+    Decorador: comparte el resultado de la función dentro de la corrida bajo
+    clave(*args, **kwargs), p.ej. la URL que descarga. Sirve para funciones
+    síncronas y async.
+    """
+
+    def nombre(*args, **kwargs) -> str:
+        return "src:" + hashlib.sha1(clave(*args, **kwargs).encode()).hexdigest()
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _run_id.get() is None:
+                    return await func(*args, **kwargs)
+                return await ashared_intermediate(
+                    nombre(*args, **kwargs), lambda: func(*args, **kwargs)
+                )
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _run_id.get() is None:
+                return func(*args, **kwargs)
+            return shared_intermediate(
+                nombre(*args, **kwargs), lambda: func(*args, **kwargs)
+            )
+
+        return wrapper
+
+    return decorator
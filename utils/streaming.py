@@ -0,0 +1,96 @@
+import asyncio
+import csv
+import io
+import os
+import tempfile
+from typing import AsyncIterator, Sequence
+
+import orjson
+
+from utils.excel_writer import XlsxBatchWriter
+
+# formato de exportación en streaming -> media type
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+async def orjson_array_stream(lotes: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    """
+    Serializa lotes de filas como un único array JSON, emitiendo cada lote
+    apenas llega para que la respuesta no se construya completa en memoria.
+    """
+    yield b"["
+    primero = True
+    async for lote in lotes:
+        if not lote:
+            continue
+        cuerpo = orjson.dumps(lote)[1:-1]
+        yield cuerpo if primero else b"," + cuerpo
+        primero = False
+    yield b"]"
+
+
+async def ndjson_stream(lotes: AsyncIterator[list[dict]]) -> AsyncIterator[bytes]:
+    """Una fila JSON por línea; cada lote se emite apenas llega."""
+    async for lote in lotes:
+        if lote:
+            yield b"".join(orjson.dumps(fila) + b"\n" for fila in lote)
+
+
+async def csv_stream(
+    lotes: AsyncIterator[list[dict]], columnas: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """
+    CSV con encabezado `columnas` (también si no hay filas), codificado lote a
+    lote en un buffer que se vacía tras cada uno.
+    """
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=columnas, lineterminator="\n")
+    writer.writeheader()
+    yield buf.getvalue().encode("utf-8")
+    async for lote in lotes:
+        if not lote:
+            continue
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows(lote)
+        yield buf.getvalue().encode("utf-8")
+
+
+async def xlsx_stream(
+    lotes: AsyncIterator[list[dict]], columnas: Sequence[str], chunk_size: int = 1 << 20
+) -> AsyncIterator[bytes]:
+    """
+    Excel escrito lote a lote (XlsxBatchWriter, en un hilo) a un archivo
+    temporal, que se envía al terminar: un xlsx no se puede emitir antes de
+    cerrarlo, pero la memoria queda acotada al tamaño de un lote.
+    """
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        writer = XlsxBatchWriter(path, columnas)
+        async for lote in lotes:
+            if lote:
+                await asyncio.to_thread(writer.write_batch, lote)
+        await asyncio.to_thread(writer.close)
+        with open(path, "rb") as f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def export_stream(
+    lotes: AsyncIterator[list[dict]], formato: str, columnas: Sequence[str]
+) -> AsyncIterator[bytes]:
+    """Codificador incremental de `formato` (ver EXPORT_MEDIA_TYPES)."""
+    if formato == "csv":
+        return csv_stream(lotes, columnas)
+    if formato == "ndjson":
+        return ndjson_stream(lotes)
+    if formato == "xlsx":
+        return xlsx_stream(lotes, columnas)
+    raise ValueError(f"Formato de exportación no soportado: {formato}")